@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:04
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("CreditSpread", "0002_alter_creditspread_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="creditspread",
+            name="entry_price",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=3,
+                help_text="The stock price when you entered the spread",
+                max_digits=10,
+                null=True,
+                validators=[django.core.validators.MinValueValidator(Decimal("0.00"))],
+            ),
+        ),
+    ]
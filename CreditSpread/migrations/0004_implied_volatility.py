@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("CreditSpread", "0003_creditspread_entry_price"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="creditspread",
+            name="long_implied_volatility",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=4,
+                help_text="Implied volatility backed out of current_long_price (0.30 = 30%)",
+                max_digits=7,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="creditspread",
+            name="short_implied_volatility",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=4,
+                help_text="Implied volatility backed out of current_short_price (0.30 = 30%)",
+                max_digits=7,
+                null=True,
+            ),
+        ),
+    ]
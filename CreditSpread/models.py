@@ -2,7 +2,8 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from decimal import Decimal
-from datetime import datetime
+from WheelTracker.clock import today_et
+from WheelTracker.trading_calendar import trading_days_between
 
 
 class CreditSpread(models.Model):
@@ -123,6 +124,20 @@ class CreditSpread(models.Model):
         blank=True,
         help_text="Current price of the short leg"
     )
+    long_implied_volatility = models.DecimalField(
+        max_digits=7,
+        decimal_places=4,
+        null=True,
+        blank=True,
+        help_text="Implied volatility backed out of current_long_price (0.30 = 30%)"
+    )
+    short_implied_volatility = models.DecimalField(
+        max_digits=7,
+        decimal_places=4,
+        null=True,
+        blank=True,
+        help_text="Implied volatility backed out of current_short_price (0.30 = 30%)"
+    )
 
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -147,19 +162,26 @@ class CreditSpread(models.Model):
 
     @property
     def days_in_trade(self):
-        """Calculate the number of days the trade was held"""
+        """Calculate the number of days the trade was held (using ET timezone)"""
         if self.close_date:
             return (self.close_date - self.open_date).days
-        return (datetime.now().date() - self.open_date).days
+        return (today_et() - self.open_date).days
 
     @property
     def days_to_expiration(self):
-        """Calculate the number of days remaining until expiration"""
+        """Calculate the number of days remaining until expiration (using ET timezone)"""
         if self.close_date:
             return 0
-        days = (self.expiration - datetime.now().date()).days
+        days = (self.expiration - today_et()).days
         return max(0, days)
 
+    @property
+    def trading_days_to_expiration(self):
+        """Calculate the number of NYSE sessions remaining until expiration (holiday aware)"""
+        if self.close_date:
+            return 0
+        return trading_days_between(today_et(), self.expiration)
+
     @property
     def days_open_to_expiration(self):
         """Calculate the number of days from open_date to expiration (original DTE)"""
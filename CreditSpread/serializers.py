@@ -1,12 +1,14 @@
 from rest_framework import serializers
 from .models import CreditSpread
+from WheelTracker.instrumentation import TimedRepresentationMixin
 
 
-class CreditSpreadSerializer(serializers.ModelSerializer):
+class CreditSpreadSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     # Read-only computed fields
     is_open = serializers.ReadOnlyField()
     days_in_trade = serializers.ReadOnlyField()
     days_to_expiration = serializers.ReadOnlyField()
+    trading_days_to_expiration = serializers.ReadOnlyField()
     days_open_to_expiration = serializers.ReadOnlyField()
     net_credit = serializers.ReadOnlyField()
     max_risk = serializers.ReadOnlyField()
@@ -41,12 +43,15 @@ class CreditSpreadSerializer(serializers.ModelSerializer):
             'entry_price',
             'current_long_price',
             'current_short_price',
+            'long_implied_volatility',
+            'short_implied_volatility',
             'created_at',
             'updated_at',
             # Computed fields
             'is_open',
             'days_in_trade',
             'days_to_expiration',
+            'trading_days_to_expiration',
             'days_open_to_expiration',
             'net_credit',
             'max_risk',
@@ -58,7 +63,7 @@ class CreditSpreadSerializer(serializers.ModelSerializer):
             'current_profit_loss',
             'break_even_price',
         ]
-        read_only_fields = ['user', 'created_at', 'updated_at']
+        read_only_fields = ['user', 'long_implied_volatility', 'short_implied_volatility', 'created_at', 'updated_at']
 
     def create(self, validated_data):
         # Automatically set the user from the request
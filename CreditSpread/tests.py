@@ -1 +1,86 @@
-# Create your tests here.
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+from django.test import TestCase, override_settings
+from CreditSpread.models import CreditSpread
+from WheelTracker.testing import EndpointPerformanceMixin
+
+# Per-request log lines would drown the test output
+logging.getLogger('WheelTracker.instrumentation').setLevel(logging.WARNING)
+
+# All tests run as of this session, so open/closed spreads are deterministic
+AS_OF = '2025-06-02T12:00'
+AS_OF_DATE = date(2025, 6, 2)
+
+STOCKS = ['SPY', 'QQQ', 'IWM', 'AAPL', 'MSFT', 'AMD', 'TSLA', 'NVDA']
+
+
+def seed_spreads(user, size):
+    """Create `size` spreads for the user; one in four is still open"""
+    spreads = []
+    for i in range(size):
+        is_open = i % 4 == 0
+        open_date = AS_OF_DATE - timedelta(days=5 + i % 300)
+        expiration = AS_OF_DATE + timedelta(days=7 + i % 40) if is_open else open_date + timedelta(days=30)
+        short_strike = Decimal(100 + i % 200)
+        width = Decimal(5)
+        bull_put = i % 2 == 0
+        spreads.append(CreditSpread(
+            user=user,
+            stock=STOCKS[i % len(STOCKS)],
+            open_date=open_date,
+            expiration=expiration,
+            type='BPS' if bull_put else 'BCS',
+            short_strike=short_strike,
+            long_strike=short_strike - width if bull_put else short_strike + width,
+            short_premium=Decimal('2.10') + Decimal(i % 9) / 10,
+            long_premium=Decimal('0.95'),
+            num_contracts=1 + i % 5,
+            open_fees=Decimal('2.60'),
+            close_date=None if is_open else expiration,
+            short_close_premium=None if is_open else Decimal(i % 3) / 2,
+            long_close_premium=None if is_open else Decimal('0.05'),
+            close_fees=None if is_open else Decimal('2.60'),
+        ))
+    CreditSpread.objects.bulk_create(spreads, batch_size=1000)
+    return size
+
+
+class CreditSpreadEndpointPerformanceMixin(EndpointPerformanceMixin):
+    """Query-count and wall-time bounds for the credit spread endpoints"""
+    UNIT = 'spreads'
+    seed = staticmethod(seed_spreads)
+
+    # Max queries per request, independent of portfolio size
+    MAX_QUERIES = {
+        'list': 2,
+        'summary': 5,
+        'by_stock': 1,
+    }
+
+    def test_list(self):
+        response = self.assert_bounds('/api/credit-spreads/', 'list', per_thousand=0.1)
+        self.assertEqual(response.data['count'], self.seeded)
+
+    def test_summary(self):
+        response = self.assert_bounds('/api/credit-spreads/summary/', 'summary', per_thousand=0.5)
+        self.assertEqual(response.data['total_spreads'], self.seeded)
+
+    def test_by_stock(self):
+        response = self.assert_bounds('/api/credit-spreads/by_stock/', 'by_stock', per_thousand=0.5)
+        self.assertEqual(sum(row['open_count'] + row['closed_count'] for row in response.data), self.seeded)
+
+
+@override_settings(CLOCK_AS_OF=AS_OF)
+class CreditSpreadEndpointPerformance10Tests(CreditSpreadEndpointPerformanceMixin, TestCase):
+    SIZE = 10
+
+
+@override_settings(CLOCK_AS_OF=AS_OF)
+class CreditSpreadEndpointPerformance1kTests(CreditSpreadEndpointPerformanceMixin, TestCase):
+    SIZE = 1000
+
+
+@override_settings(CLOCK_AS_OF=AS_OF)
+class CreditSpreadEndpointPerformance10kTests(CreditSpreadEndpointPerformanceMixin, TestCase):
+    SIZE = 10000
@@ -5,6 +5,7 @@ from rest_framework.permissions import IsAuthenticated
 from decimal import Decimal
 from .models import CreditSpread
 from .serializers import CreditSpreadSerializer
+from WheelTracker.db_routers import replica_reads
 
 
 class CreditSpreadViewSet(viewsets.ModelViewSet):
@@ -17,6 +18,7 @@ class CreditSpreadViewSet(viewsets.ModelViewSet):
         return CreditSpread.objects.filter(user=self.request.user)
 
     @action(detail=False, methods=['get'])
+    @replica_reads
     def summary(self, request):
         """Get summary statistics for credit spreads"""
         spreads = self.get_queryset()
@@ -76,6 +78,7 @@ class CreditSpreadViewSet(viewsets.ModelViewSet):
         })
 
     @action(detail=False, methods=['get'])
+    @replica_reads
     def by_stock(self, request):
         """Get spreads grouped by stock"""
         stock = request.query_params.get('stock')
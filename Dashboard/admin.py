@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Position, Feedback, Notification
+from .models import Position, Feedback, Notification, ShareLot, ShareLotEntry
+from .ledger import post_positions, rebuild as rebuild_share_lots
 
 
 @admin.register(Position)
@@ -43,6 +44,40 @@ class PositionAdmin(admin.ModelAdmin):
         }),
     )
 
+    def save_model(self, request, obj, form, change):
+        """Post closes and assignments to the share-lot ledger"""
+        super().save_model(request, obj, form, change)
+        post_positions([obj])
+
+    def delete_model(self, request, obj):
+        posted = set(obj.share_lot_entries.values_list('lot__user_id', 'lot__stock'))
+        super().delete_model(request, obj)
+        if posted:
+            rebuild_share_lots(keys=posted)
+
+
+class ShareLotEntryInline(admin.TabularInline):
+    model = ShareLotEntry
+    fields = ('date', 'kind', 'position', 'shares', 'amount')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+@admin.register(ShareLot)
+class ShareLotAdmin(admin.ModelAdmin):
+    """Share lots are maintained by Dashboard.ledger; rebuild them with manage.py rebuild_share_lots"""
+    list_display = ('stock', 'user', 'shares', 'cost_per_share', 'adjusted_cost_basis', 'acquired_on', 'sold_on',
+                    'realized_pl')
+    list_filter = ('stock', 'acquired_on', 'sold_on')
+    search_fields = ('stock', 'user__username')
+    date_hierarchy = 'acquired_on'
+    readonly_fields = [field.name for field in ShareLot._meta.fields]
+    inlines = [ShareLotEntryInline]
+
+    def has_add_permission(self, request):
+        return False
+
 
 @admin.register(Feedback)
 class FeedbackAdmin(admin.ModelAdmin):
@@ -0,0 +1,253 @@
+"""
+Native async views for I/O-bound endpoints.
+
+Under ASGI (``uvicorn WheelTracker.asgi:application``) these run on the event
+loop, so a request waiting on Yahoo Finance, a long-lived event stream or a
+large export does not hold a worker thread. ORM access uses Django's async
+query API; anything that is only available synchronously (JWT user lookup,
+yfinance) is offloaded with sync_to_async.
+
+A WSGI server (e.g. the Vercel deployment) can only stream a synchronous
+iterator, and would otherwise buffer an async one whole. So under WSGI the
+exports stream from a plain iterator instead, and the event stream answers
+501 so the client polls /api/notifications/unread_count/.
+
+These are plain Django views rather than DRF views because DRF dispatch is
+synchronous, so they authenticate the JWT bearer token themselves.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from CreditSpread.models import CreditSpread
+from CreditSpread.serializers import CreditSpreadSerializer
+from Dashboard.market_data import fetch_option_mids
+from Dashboard.models import Position
+from Dashboard.serializers import PositionSerializer
+from WheelTracker.db_routers import read_alias
+from Dashboard.utils import aget_unread_count, unread_notifications_for, sse_event
+import asyncio
+import csv
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Option chains fetched from Yahoo Finance at the same time per request
+QUOTE_FETCH_CONCURRENCY = 8
+
+# Threads shared by all requests for blocking Yahoo Finance calls. Sized for
+# network waits rather than CPU, unlike the event loop's default executor.
+QUOTE_FETCH_THREADS = 64
+_quote_executor = ThreadPoolExecutor(max_workers=QUOTE_FETCH_THREADS, thread_name_prefix='quotes')
+
+# Unread-count stream: how often the cached count is checked, how long an idle
+# stream waits before a keep-alive, and how long it stays open (seconds)
+STREAM_POLL_INTERVAL = 2
+STREAM_DURATION = 55
+STREAM_KEEPALIVE = 15
+
+# Rows fetched per database round trip while exporting
+EXPORT_CHUNK_SIZE = 500
+
+# Export columns: serializer fields minus those that need extra queries per row
+POSITION_EXPORT_FIELDS = [
+    field for field in PositionSerializer.Meta.fields
+    if field not in ('wheel_cycle_number', 'is_wheel_complete')
+]
+CREDIT_SPREAD_EXPORT_FIELDS = list(CreditSpreadSerializer.Meta.fields)
+
+# Foreign keys are exported as raw ids so no related row is loaded
+EXPORT_ATTRIBUTES = {'related_to': 'related_to_id', 'user': 'user_id'}
+
+
+def jwt_required(view):
+    """Authenticate the Bearer token (off the event loop) and set request.user"""
+    authenticator = JWTAuthentication()
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            result = await sync_to_async(authenticator.authenticate)(request)
+        except (AuthenticationFailed, InvalidToken) as e:
+            return JsonResponse({'detail': str(e)}, status=401)
+        if result is None:
+            return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+        request.user = result[0]
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+@csrf_exempt
+@require_POST
+@jwt_required
+async def refresh_quotes(request):
+    """
+    Refresh current option prices for all of the user's open positions and credit spreads,
+    then re-solve their implied volatilities from the new mids.
+    Each (stock, expiration) chain is fetched once, with up to
+    QUOTE_FETCH_CONCURRENCY chains in flight at the same time.
+    """
+    positions = [p async for p in Position.objects.filter(user=request.user, close_date__isnull=True)]
+    spreads = [s async for s in CreditSpread.objects.filter(user=request.user, close_date__isnull=True)]
+
+    chain_keys = {(p.stock, p.expiration) for p in positions} | {(s.stock, s.expiration) for s in spreads}
+    semaphore = asyncio.Semaphore(QUOTE_FETCH_CONCURRENCY)
+
+    async def fetch(stock, expiration):
+        async with semaphore:
+            try:
+                mids = await sync_to_async(
+                    fetch_option_mids, thread_sensitive=False, executor=_quote_executor
+                )(stock, expiration)
+                return (stock, expiration), mids, None
+            except Exception as e:
+                logger.warning(f"Quote fetch failed for {stock} {expiration}: {e}")
+                return (stock, expiration), None, str(e)
+
+    results = await asyncio.gather(*(fetch(*key) for key in chain_keys))
+    chains = {key: mids for key, mids, _ in results if mids is not None}
+    errors = [
+        {'stock': stock, 'expiration': expiration, 'error': error}
+        for (stock, expiration), _, error in results if error
+    ]
+
+    updated_positions = []
+    for position in positions:
+        mid = chains.get((position.stock, position.expiration), {}).get((position.type, position.strike))
+        if mid is not None:
+            position.current_option_price = mid
+            updated_positions.append(position)
+
+    updated_spreads = []
+    for spread in spreads:
+        mids = chains.get((spread.stock, spread.expiration), {})
+        option_type = 'P' if spread.type == 'BPS' else 'C'
+        long_mid = mids.get((option_type, spread.long_strike))
+        short_mid = mids.get((option_type, spread.short_strike))
+        if long_mid is not None and short_mid is not None:
+            spread.current_long_price = long_mid
+            spread.current_short_price = short_mid
+            updated_spreads.append(spread)
+
+    if updated_positions:
+        await Position.objects.abulk_update(updated_positions, ['current_option_price'])
+    if updated_spreads:
+        await CreditSpread.objects.abulk_update(updated_spreads, ['current_long_price', 'current_short_price'])
+
+    implied_volatilities = 0
+    if updated_positions or updated_spreads:
+        # NumPy is only imported here (see manage.py importtime)
+        from Dashboard.option_book import update_implied_volatilities
+        implied_volatilities, _ = await sync_to_async(update_implied_volatilities)(request.user)
+
+    return JsonResponse({
+        'success': True,
+        'updated_positions': len(updated_positions),
+        'updated_spreads': len(updated_spreads),
+        'implied_volatilities': implied_volatilities,
+        'chains_fetched': len(chains),
+        'errors': errors,
+    })
+
+
+@require_GET
+@jwt_required
+async def notification_stream(request):
+    """
+    Server-sent events stream of the unread notification count (ASGI only).
+    Emits an `unread_count` event on connect and whenever the count changes,
+    then closes after STREAM_DURATION seconds so the client reconnects. Waiting
+    happens on the event loop, so an open stream does not hold a worker thread.
+    Under WSGI it would hold one for the whole stream instead, so it answers
+    501 and the client polls unread_count.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'The notification stream needs an ASGI server; poll /api/notifications/unread_count/ instead'},
+            status=501,
+        )
+    user = request.user
+
+    async def count_unread():
+        return await unread_notifications_for(user).acount()
+
+    async def events():
+        last_count = None
+        last_sent = time.monotonic()
+        deadline = last_sent + STREAM_DURATION
+        while True:
+            count = await aget_unread_count(user.id, count_unread)
+            now = time.monotonic()
+            if count != last_count:
+                yield sse_event('unread_count', {'count': count})
+                last_count, last_sent = count, now
+            elif now - last_sent >= STREAM_KEEPALIVE:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                last_sent = now
+            if now >= deadline:
+                return
+            await asyncio.sleep(STREAM_POLL_INTERVAL)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class _Echo:
+    """File-like object whose write() returns the line, for streaming csv.writer output"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_response(request, queryset, fields, filename):
+    """
+    Stream a queryset as CSV, fetching EXPORT_CHUNK_SIZE rows per round trip:
+    from an async iterator under ASGI, a plain one under WSGI
+    """
+    writer = csv.writer(_Echo())
+    attributes = [EXPORT_ATTRIBUTES.get(field, field) for field in fields]
+
+    async def async_rows():
+        yield writer.writerow(fields)
+        async for obj in queryset.aiterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield writer.writerow([getattr(obj, attribute) for attribute in attributes])
+
+    def rows():
+        yield writer.writerow(fields)
+        for obj in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield writer.writerow([getattr(obj, attribute) for attribute in attributes])
+
+    response = StreamingHttpResponse(
+        async_rows() if isinstance(request, ASGIRequest) else rows(), content_type='text/csv'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@require_GET
+@jwt_required
+async def export_positions(request):
+    """Export all of the user's positions, with calculated fields, as CSV"""
+    alias = await sync_to_async(read_alias)(request.user.id)
+    queryset = Position.objects.using(alias).filter(user=request.user).order_by('-open_date')
+    return _csv_response(request, queryset, POSITION_EXPORT_FIELDS, 'positions.csv')
+
+
+@require_GET
+@jwt_required
+async def export_credit_spreads(request):
+    """Export all of the user's credit spreads, with calculated fields, as CSV"""
+    alias = await sync_to_async(read_alias)(request.user.id)
+    queryset = CreditSpread.objects.using(alias).filter(user=request.user).order_by('-created_at')
+    return _csv_response(request, queryset, CREDIT_SPREAD_EXPORT_FIELDS, 'credit_spreads.csv')
@@ -0,0 +1,312 @@
+"""
+Rule-based backtests over local price history (Dashboard/price_history.py).
+
+Two strategies are replayed over daily closes:
+- wheel: sell a put; once assigned, sell covered calls (never below the
+  assignment strike) until the shares are called away, then start over
+- spread: sell a bull put spread, then the next one when it is closed
+
+Options are priced with Black-Scholes at the trailing realized volatility,
+strikes are chosen by delta and rounded to listed increments, and a leg is
+bought back at the first close where `profit_take` of its premium is earned
+(otherwise it settles at intrinsic value on expiration). Every simulated
+trade is an unsaved Position or CreditSpread, so P/L and AR% come from the
+same model properties the dashboard uses.
+
+Strikes and premiums for every day are computed over the whole history at
+once, so the replay only steps from one trade to the next.
+
+Models are imported inside functions so pool workers can import this module
+before Django is set up. NumPy is imported at the top: import this module
+inside the code path that needs it (see `manage.py importtime`).
+"""
+import itertools
+from decimal import Decimal
+import numpy as np
+from Dashboard.price_history import PriceHistoryStore, to_date
+from Dashboard.pricing import DEFAULT_RISK_FREE_RATE, black_scholes, strike_for_delta
+
+# Trailing window (trading days) for realized volatility, and its floor
+VOLATILITY_WINDOW = 30
+MIN_VOLATILITY = 0.05
+
+# Legs worth less than this per share are not worth selling; wait a day instead
+MIN_PREMIUM = 0.05
+
+FEE_PER_CONTRACT = Decimal('0.65')
+
+DEFAULT_PARAMS = {
+    'strategy': 'wheel',
+    'put_delta': 0.30,
+    'call_delta': 0.30,
+    'dte': 30,
+    'profit_take': 0.0,  # Fraction of the premium earned before buying back; 0 holds to expiration
+    'spread_width': 0.05,  # Spread width as a fraction of the underlying price
+    'contracts': 1,
+    'rate': DEFAULT_RISK_FREE_RATE,
+}
+
+
+def _money(value):
+    return Decimal(str(round(max(float(value), 0), 2)))
+
+
+def strike_step(price):
+    """Listed strike increment for an underlying at this price (vectorized)"""
+    return np.where(price < 25, 0.5, np.where(price < 200, 1.0, 5.0))
+
+
+def round_strike(strike, price, up=False):
+    step = strike_step(price)
+    return np.maximum((np.ceil if up else np.round)(strike / step) * step, step)
+
+
+def realized_volatility(closes, window=VOLATILITY_WINDOW):
+    """
+    Annualised volatility of the `window` daily log returns up to each close,
+    from running sums (NaN for the first `window` closes)
+    """
+    returns = np.diff(np.log(closes))
+    sums = np.concatenate([[0], np.cumsum(returns)])
+    squares = np.concatenate([[0], np.cumsum(returns ** 2)])
+    volatility = np.full(len(closes), np.nan)
+    if len(closes) > window:
+        total = sums[window:] - sums[:-window]
+        total_squares = squares[window:] - squares[:-window]
+        variance = np.maximum((total_squares - total ** 2 / window) / (window - 1), 0)
+        volatility[window:] = np.maximum(np.sqrt(variance * 252), MIN_VOLATILITY)
+    return volatility
+
+
+class _Market:
+    """
+    One ticker's closes with, for every close, the trailing volatility and the
+    close index and time to expiration of an option opened that day
+    """
+
+    def __init__(self, days, closes, dte, rate):
+        self.days, self.closes, self.rate = days, closes, rate
+        self.volatility = realized_volatility(closes)
+        self.expiry = np.searchsorted(days, days + dte, side='left')
+        # Openings without a full volatility window or an expiration inside the history are never used
+        self.usable = ~np.isnan(self.volatility) & (self.expiry < len(days))
+        self.years = (days[np.minimum(self.expiry, len(days) - 1)] - days) / 365
+
+    def quotes(self, delta, is_call, floor=0.0):
+        """Strike for the target delta (rounded, not below `floor`) and its premium, for every close"""
+        volatility = np.where(self.usable, self.volatility, MIN_VOLATILITY)
+        strike = strike_for_delta(self.closes, self.years, volatility, delta, is_call, self.rate)
+        strike = round_strike(np.maximum(strike, floor), self.closes, up=is_call)
+        premium = black_scholes(self.closes, strike, self.years, volatility, is_call, self.rate)['price']
+        return strike, np.where(self.usable, premium, np.nan)
+
+    def next_opening(self, i, premium):
+        """First close from i on where the premium is worth selling, or None"""
+        candidates = np.flatnonzero(premium[i:] >= MIN_PREMIUM)
+        return i + candidates[0] if len(candidates) else None
+
+    def hold(self, i, legs, is_call, profit_take, credit):
+        """
+        Follow legs [(strike, quantity per contract), ...] opened at close i.
+        Returns (close index, per-share close price of each leg, whether it
+        was held to expiration).
+        """
+        j = self.expiry[i]
+        if profit_take > 0 and j > i + 1:
+            years = (self.days[j] - self.days[i + 1:j]) / 365
+            values = [
+                black_scholes(
+                    self.closes[i + 1:j], strike, years, self.volatility[i + 1:j], is_call, self.rate,
+                )['price']
+                for strike, _ in legs
+            ]
+            cost_to_close = -sum(quantity * value for (_, quantity), value in zip(legs, values))
+            hits = np.flatnonzero(cost_to_close <= credit * (1 - profit_take))
+            if len(hits):
+                return i + 1 + hits[0], [float(value[hits[0]]) for value in values], False
+        close = self.closes[j]
+        return j, [max(close - strike, 0) if is_call else max(strike - close, 0) for strike, _ in legs], True
+
+
+def backtest_wheel(ticker, days, closes, params):
+    """
+    Returns (closed Positions in order, stock P/L realized when each one
+    closed); shares still held at the end are marked to the last close on
+    the final trade.
+    """
+    from Dashboard.models import Position
+
+    market = _Market(days, closes, params['dte'], params['rate'])
+    put_strikes, put_premiums = market.quotes(params['put_delta'], False)
+    contracts = params['contracts']
+    shares = 100 * contracts
+    positions, stock_pl = [], []
+    basis = None  # Assignment strike of the shares held, if any
+    cycle = 1
+
+    i = 0
+    while True:
+        is_call = basis is not None
+        strikes, premiums = (call_strikes, call_premiums) if is_call else (put_strikes, put_premiums)
+        i = market.next_opening(i, premiums)
+        if i is None:
+            break
+        strike, premium = float(strikes[i]), float(premiums[i])
+
+        k, (close_price,), expired = market.hold(i, [(strike, -1)], is_call, params['profit_take'], premium)
+        assigned = expired and close_price > 0
+        positions.append(Position(
+            stock=ticker,
+            wheel_cycle_name=f'{ticker} Wheel #{cycle}',
+            open_date=to_date(days[i]),
+            expiration=to_date(days[market.expiry[i]]),
+            type='C' if is_call else 'P',
+            num_contracts=contracts,
+            strike=Decimal(str(strike)),
+            premium=_money(premium),
+            open_fees=FEE_PER_CONTRACT * contracts,
+            entry_price=_money(closes[i]),
+            close_date=to_date(days[k]),
+            # Assigned legs close at zero: the premium goes toward the cost basis
+            premium_paid_to_close=Decimal('0.00') if expired else _money(close_price),
+            close_fees=Decimal('0.00') if expired else FEE_PER_CONTRACT * contracts,
+            assigned='Yes' if assigned else 'No',
+        ))
+        stock_pl.append(0.0)
+
+        if assigned and is_call:
+            stock_pl[-1] = (strike - basis) * shares
+            basis = None
+            cycle += 1
+        elif assigned:
+            basis = strike
+            # Covered calls are never sold below the assignment strike
+            call_strikes, call_premiums = market.quotes(params['call_delta'], True, floor=basis)
+        i = max(k, i + 1)
+
+    if basis is not None and stock_pl:
+        stock_pl[-1] += (float(closes[-1]) - basis) * shares
+    return positions, stock_pl
+
+
+def backtest_spreads(ticker, days, closes, params):
+    """Returns (closed bull put CreditSpreads in order, zero stock P/L for each)"""
+    from CreditSpread.models import CreditSpread
+
+    market = _Market(days, closes, params['dte'], params['rate'])
+    short_strikes, short_premiums = market.quotes(params['put_delta'], False)
+    long_strikes = short_strikes - round_strike(closes * params['spread_width'], closes)
+    long_premiums = black_scholes(
+        closes, np.maximum(long_strikes, 1e-9), market.years, market.volatility, False, params['rate'],
+    )['price']
+    credits = np.where(long_strikes > 0, short_premiums - long_premiums, np.nan)
+    contracts = params['contracts']
+    spreads = []
+
+    i = 0
+    while True:
+        i = market.next_opening(i, credits)
+        if i is None:
+            break
+        short_strike, long_strike = float(short_strikes[i]), float(long_strikes[i])
+
+        k, (short_close, long_close), expired = market.hold(
+            i, [(short_strike, -1), (long_strike, 1)], False, params['profit_take'], float(credits[i]),
+        )
+        spreads.append(CreditSpread(
+            stock=ticker,
+            open_date=to_date(days[i]),
+            expiration=to_date(days[market.expiry[i]]),
+            type='BPS',
+            short_strike=Decimal(str(short_strike)),
+            long_strike=Decimal(str(long_strike)),
+            short_premium=_money(short_premiums[i]),
+            long_premium=_money(long_premiums[i]),
+            num_contracts=contracts,
+            open_fees=FEE_PER_CONTRACT * 2 * contracts,
+            entry_price=_money(closes[i]),
+            close_date=to_date(days[k]),
+            short_close_premium=_money(short_close),
+            long_close_premium=_money(long_close),
+            close_fees=Decimal('0.00') if expired else FEE_PER_CONTRACT * 2 * contracts,
+        ))
+        i = max(k, i + 1)
+
+    return spreads, [0.0] * len(spreads)
+
+
+def _assigned(trade):
+    """Assigned position, or a spread that expired with its short leg in the money"""
+    if hasattr(trade, 'assigned'):
+        return trade.assigned == 'Yes'
+    return trade.close_date == trade.expiration and trade.short_close_premium > 0
+
+
+def summarize(trades, stock_pl):
+    """
+    Totals over closed trades, from the models' profit_loss and
+    ar_of_closed_trade. Win rate and AR% are per option trade, as on the
+    dashboard; drawdown is on total equity, including stock P/L.
+    """
+    pl = np.array([float(trade.profit_loss) for trade in trades])
+    stock_pl = np.array(stock_pl, dtype=float)
+    ar = [float(trade.ar_of_closed_trade) for trade in trades if trade.ar_of_closed_trade is not None]
+    equity = np.concatenate([[0], np.cumsum(pl + stock_pl)])
+    return {
+        'trades': len(trades),
+        'win_rate': round(float((pl > 0).mean()) * 100, 2) if len(pl) else None,
+        'assignments': sum(1 for trade in trades if _assigned(trade)),
+        'option_pl': round(float(pl.sum()), 2),
+        'stock_pl': round(float(stock_pl.sum()), 2),
+        'total_pl': round(float(pl.sum() + stock_pl.sum()), 2),
+        'mean_ar': round(float(np.mean(ar)), 2) if ar else None,
+        'max_drawdown': round(float((np.maximum.accumulate(equity) - equity).max()), 2),
+    }
+
+
+STRATEGIES = {
+    'wheel': backtest_wheel,
+    'spread': backtest_spreads,
+}
+
+
+def run(ticker, params, start=None, end=None, root=None):
+    """Backtest one ticker with one parameter set; returns the summary row"""
+    params = {**DEFAULT_PARAMS, **params}
+    days, closes = PriceHistoryStore(root).series(ticker, start, end)
+    trades, stock_pl = STRATEGIES[params['strategy']](ticker, days, np.asarray(closes, dtype=float), params)
+    return {
+        'ticker': ticker,
+        **params,
+        'start': to_date(days[0]).isoformat() if len(days) else None,
+        'end': to_date(days[-1]).isoformat() if len(days) else None,
+        **summarize(trades, stock_pl),
+    }
+
+
+def _run_task(task):
+    return run(*task)
+
+
+def _setup_worker():
+    import django
+    django.setup()
+
+
+def parameter_grid(grid):
+    """Every combination of {name: [values, ...]}, as a list of parameter dicts"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def sweep(tickers, grid, start=None, end=None, root=None, workers=0):
+    """
+    Run every ticker x parameter combination. With workers > 1 the runs are
+    spread over a process pool; each worker maps the price files itself.
+    """
+    tasks = [(ticker, params, start, end, root) for ticker in tickers for params in parameter_grid(grid)]
+    if workers > 1 and len(tasks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers, initializer=_setup_worker) as executor:
+            return list(executor.map(_run_task, tasks, chunksize=max(len(tasks) // (workers * 4), 1)))
+    return [_run_task(task) for task in tasks]
@@ -0,0 +1,241 @@
+"""
+Share-lot ledger for assigned wheels.
+
+A put assignment opens a ShareLot: 100 shares per contract at the strike,
+credited with the put's P/L. Covered calls on the ticker credit their P/L to
+the open lots, oldest first, and a call assignment sells shares out of them,
+splitting a lot when only part of it is called away. Every posting is a
+ShareLotEntry, and a lot's adjusted cost basis and realized P/L are stored as
+they change, so neither is re-derived from the wheel cycle's positions.
+
+Legs are posted incrementally as they close, in close-date order. Editing,
+reopening or deleting a posted leg, or closing one before the ticker's latest
+posting, replays that user's ticker from its closed positions instead.
+"""
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Max, Q
+from django.db.models.functions import Upper
+from Dashboard.models import Position, ShareLot, ShareLotEntry
+
+SHARES_PER_CONTRACT = 100
+
+# Closed legs that post to the ledger: assigned puts and covered calls
+LEDGER_LEGS = Q(type='P', assigned='Yes') | Q(type='C')
+
+# Rows per INSERT/UPDATE when writing lots and entries
+BATCH_SIZE = 1000
+
+LOT_FIELDS = ['shares', 'premium_collected', 'adjusted_cost_basis', 'sold_on', 'sale_price', 'closed_by',
+              'realized_pl']
+
+_MILLS = Decimal('0.001')
+_BASIS = Decimal('0.0001')
+
+
+def _posts(position):
+    return position.close_date is not None and (position.type == 'C' or position.assigned == 'Yes')
+
+
+def _prorate(amount, weights):
+    """amount shared out in proportion to weights, rounded so the parts add up exactly"""
+    total = sum(weights)
+    parts = [(amount * weight / total).quantize(_MILLS) for weight in weights[:-1]]
+    return parts + [amount - sum(parts)]
+
+
+class _Ledger:
+    """Open lots of one user's ticker, oldest first, and the lots and entries to write"""
+
+    def __init__(self, user_id, stock, open_lots=()):
+        self.user_id = user_id
+        self.stock = stock
+        self.open = list(open_lots)
+        self.lots = {}  # id(lot): lot, for every lot created or changed
+        self.entries = []
+
+    def post(self, position):
+        shares = position.num_contracts * SHARES_PER_CONTRACT
+        amount = position.profit_loss
+
+        if position.type == 'P':
+            lot = ShareLot(
+                user_id=self.user_id, stock=self.stock, shares=shares, cost_per_share=position.strike,
+                premium_collected=amount, acquired_on=position.close_date, opened_by=position,
+            )
+            self.open.append(lot)
+            self._record(lot, position, 'assigned', shares, amount)
+            return
+
+        # A covered call covers the oldest open shares; calls on shares the
+        # ledger doesn't hold (e.g. bought outright) are not posted
+        covered, remaining = [], shares
+        for lot in self.open:
+            if not remaining:
+                break
+            covered.append((lot, min(lot.shares, remaining)))
+            remaining -= covered[-1][1]
+        if not covered:
+            return
+
+        called_away = position.assigned == 'Yes'
+        for (lot, taken), credit in zip(covered, _prorate(amount, [taken for _, taken in covered])):
+            if called_away:
+                if taken < lot.shares:
+                    lot = self._split(lot, taken)
+                else:
+                    self.open.remove(lot)
+                lot.premium_collected += credit
+                lot.sold_on = position.close_date
+                lot.sale_price = position.strike
+                lot.closed_by = position
+                lot.realized_pl = (position.strike - lot.cost_per_share) * lot.shares + lot.premium_collected
+            else:
+                lot.premium_collected += credit
+            self._record(lot, position, 'called_away' if called_away else 'premium', taken, credit)
+
+    def _split(self, lot, shares):
+        """Split shares (and their share of the premium) off an open lot into a new lot"""
+        premium, kept = _prorate(lot.premium_collected, [shares, lot.shares - shares])
+        part = ShareLot(
+            user_id=lot.user_id, stock=lot.stock, shares=shares, cost_per_share=lot.cost_per_share,
+            premium_collected=premium, acquired_on=lot.acquired_on, opened_by_id=lot.opened_by_id,
+        )
+        lot.shares -= shares
+        lot.premium_collected = kept
+        self._touch(lot)
+        return part
+
+    def _touch(self, lot):
+        lot.adjusted_cost_basis = (lot.cost_per_share - lot.premium_collected / lot.shares).quantize(_BASIS)
+        self.lots[id(lot)] = lot
+
+    def _record(self, lot, position, kind, shares, amount):
+        self._touch(lot)
+        self.entries.append(ShareLotEntry(
+            lot=lot, position=position, kind=kind, shares=shares, amount=amount, date=position.close_date,
+        ))
+
+
+def _write(ledgers):
+    lots = [lot for ledger in ledgers for lot in ledger.lots.values()]
+    created = [lot for lot in lots if lot.pk is None]
+    changed = [lot for lot in lots if lot.pk is not None]
+    ShareLot.objects.bulk_create(created, batch_size=BATCH_SIZE)
+    ShareLot.objects.bulk_update(changed, LOT_FIELDS, batch_size=BATCH_SIZE)
+    ShareLotEntry.objects.bulk_create(
+        [entry for ledger in ledgers for entry in ledger.entries], batch_size=BATCH_SIZE
+    )
+    return len(lots)
+
+
+def _owners(keys, user_field, stock_lookup):
+    condition = Q()
+    for user_id, stock in keys:
+        condition |= Q(**{user_field: user_id, stock_lookup: stock})
+    return condition
+
+
+def post_positions(positions):
+    """
+    Bring the ledger up to date after the positions were created, closed,
+    reopened or edited. Returns the number of lots created or changed.
+    """
+    positions = [p for p in positions if p.pk is not None]
+    if not positions:
+        return 0
+
+    # Positions already posted replay the ticker they were posted under (their
+    # stock may since have changed) as well as their current one
+    replay = set()
+    posted = set()
+    for position_id, user_id, stock in ShareLotEntry.objects.filter(position__in=positions).values_list(
+            'position_id', 'lot__user_id', 'lot__stock'):
+        posted.add(position_id)
+        replay.add((user_id, stock))
+
+    pending = {}
+    for position in positions:
+        key = (position.user_id, position.stock.upper())
+        if position.id in posted:
+            replay.add(key)
+        elif _posts(position):
+            pending.setdefault(key, []).append(position)
+    for key in replay:
+        pending.pop(key, None)
+
+    changed = 0
+    if pending:
+        latest = dict(
+            ((user_id, stock), last) for user_id, stock, last in ShareLotEntry.objects
+            .filter(_owners(pending, 'lot__user_id', 'lot__stock'))
+            .values_list('lot__user_id', 'lot__stock').annotate(last=Max('date')).order_by()
+        )
+        ledgers = {key: _Ledger(*key) for key in pending}
+        for key, legs in pending.items():
+            legs.sort(key=lambda p: (p.close_date, p.id))
+            # Closed before something already posted: the postings after it are stale
+            if key in latest and legs[0].close_date < latest[key]:
+                replay.add(key)
+                del ledgers[key]
+        if ledgers:
+            open_lots = ShareLot.objects.filter(_owners(ledgers, 'user_id', 'stock'), sold_on__isnull=True)
+            for lot in open_lots.order_by('acquired_on', 'id'):
+                ledgers[(lot.user_id, lot.stock)].open.append(lot)
+            for key, ledger in ledgers.items():
+                for position in pending[key]:
+                    ledger.post(position)
+            with transaction.atomic():
+                changed += _write(ledgers.values())
+
+    if replay:
+        changed += rebuild(keys=replay)['lots']
+    return changed
+
+
+def rebuild(user_ids=None, keys=None):
+    """
+    Replay the ledger from closed positions: everything, the given users, or
+    the given (user_id, ticker) pairs. Positions are streamed in one ordered
+    query and written in batches, all in one transaction.
+    Returns {'lots': n, 'entries': n}.
+    """
+    positions = Position.objects.filter(LEDGER_LEGS, close_date__isnull=False)
+    lots = ShareLot.objects.all()
+    if user_ids is not None:
+        positions = positions.filter(user_id__in=user_ids)
+        lots = lots.filter(user_id__in=user_ids)
+    if keys is not None:
+        keys = list(keys)
+        if not keys:
+            return {'lots': 0, 'entries': 0}
+        positions = positions.filter(_owners(keys, 'user_id', 'stock__iexact'))
+        lots = lots.filter(_owners(keys, 'user_id', 'stock'))
+    positions = positions.order_by('user_id', Upper('stock'), 'close_date', 'id')
+
+    totals = {'lots': 0, 'entries': 0}
+    batch, rows = [], 0
+
+    def flush():
+        nonlocal batch, rows
+        totals['lots'] += _write(batch)
+        totals['entries'] += sum(len(ledger.entries) for ledger in batch)
+        batch, rows = [], 0
+
+    with transaction.atomic():
+        # Entries first: with nothing left pointing at them, lots delete without cascading row by row
+        ShareLotEntry.objects.filter(lot__in=lots).delete()
+        lots.delete()
+        ledger = None
+        for position in positions.iterator(chunk_size=BATCH_SIZE):
+            key = (position.user_id, position.stock.upper())
+            if ledger is None or (ledger.user_id, ledger.stock) != key:
+                if rows >= BATCH_SIZE:
+                    flush()
+                ledger = _Ledger(*key)
+                batch.append(ledger)
+            entries = len(ledger.entries)
+            ledger.post(position)
+            rows += len(ledger.entries) - entries
+        flush()
+    return totals
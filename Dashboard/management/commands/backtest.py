@@ -0,0 +1,70 @@
+import json
+import time
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Backtest the wheel or bull put spreads over local price history (PRICE_HISTORY_DIR), "
+        "sweeping every combination of the given parameter values across tickers"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('tickers', nargs='*', help='Tickers to test (default: every ticker in the store)')
+        parser.add_argument('--strategy', nargs='+', choices=['wheel', 'spread'], default=['wheel'])
+        parser.add_argument('--put-delta', type=float, nargs='+', default=[0.30], help='Short put delta, e.g. 0.2 0.3')
+        parser.add_argument('--call-delta', type=float, nargs='+', default=[0.30], help='Covered call delta')
+        parser.add_argument('--dte', type=int, nargs='+', default=[30], help='Calendar days to expiration')
+        parser.add_argument('--profit-take', type=float, nargs='+', default=[0.0],
+                            help='Buy back once this fraction of the premium is earned (0 holds to expiration)')
+        parser.add_argument('--spread-width', type=float, nargs='+', default=[0.05],
+                            help='Spread width as a fraction of the underlying price')
+        parser.add_argument('--contracts', type=int, default=1)
+        parser.add_argument('--start', type=date.fromisoformat, help='First date (YYYY-MM-DD)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last date (YYYY-MM-DD)')
+        parser.add_argument('--store', help='Price history directory (default: PRICE_HISTORY_DIR)')
+        parser.add_argument('--workers', type=int, default=0, help='Worker processes (0 = run in-process)')
+        parser.add_argument('--top', type=int, default=20, help='Rows to print, best total P/L first')
+        parser.add_argument('--output', help='Write every result row to this JSON file')
+
+    def handle(self, *args, **options):
+        from Dashboard.backtest import sweep
+        from Dashboard.price_history import PriceHistoryStore
+
+        store = PriceHistoryStore(options['store'])
+        available = store.tickers()
+        tickers = [ticker.upper() for ticker in options['tickers']] or available
+        unknown = sorted(set(tickers) - set(available))
+        if unknown:
+            raise CommandError(f"No price history for {', '.join(unknown)} in {store.root}")
+        if not tickers:
+            raise CommandError(f"No price history in {store.root}")
+
+        grid = {
+            'strategy': options['strategy'],
+            'put_delta': options['put_delta'],
+            'call_delta': options['call_delta'],
+            'dte': options['dte'],
+            'profit_take': options['profit_take'],
+            'spread_width': options['spread_width'],
+            'contracts': [options['contracts']],
+        }
+        start = time.perf_counter()
+        results = sweep(tickers, grid, options['start'], options['end'], store.root, options['workers'])
+        elapsed = time.perf_counter() - start
+
+        columns = ['ticker', 'strategy', 'put_delta', 'call_delta', 'dte', 'profit_take', 'trades',
+                   'win_rate', 'assignments', 'total_pl', 'mean_ar', 'max_drawdown']
+        self.stdout.write(' '.join(f'{column:>12}' for column in columns))
+        for row in sorted(results, key=lambda row: row['total_pl'], reverse=True)[:options['top']]:
+            self.stdout.write(' '.join(f"{'-' if row[column] is None else row[column]!s:>12}" for column in columns))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Wrote {len(results)} rows to {options['output']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(results)} backtests ({len(tickers)} tickers) in {elapsed:.2f}s"
+        ))
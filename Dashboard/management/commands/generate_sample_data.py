@@ -0,0 +1,295 @@
+import csv
+import math
+import random
+import re
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from CreditSpread.models import CreditSpread
+from Dashboard.ledger import rebuild as rebuild_share_lots
+from Dashboard.models import Position
+from WheelTracker.trading_calendar import expiration_session, is_trading_day
+
+# Simulated underlyings: (ticker, starting price, annualised volatility)
+UNDERLYINGS = [
+    ('AAPL', 170, 0.25), ('MSFT', 330, 0.24), ('AMD', 110, 0.50), ('TSLA', 220, 0.60),
+    ('NVDA', 45, 0.55), ('SOFI', 8, 0.65), ('PLTR', 17, 0.70), ('F', 12, 0.35),
+    ('KO', 60, 0.15), ('INTC', 35, 0.35), ('T', 16, 0.22), ('BAC', 30, 0.28),
+    ('PFE', 35, 0.25), ('DIS', 90, 0.30), ('SPY', 440, 0.16), ('QQQ', 370, 0.21),
+    ('IWM', 190, 0.23), ('XOM', 105, 0.27), ('WMT', 155, 0.18), ('COIN', 80, 0.85),
+]
+
+# Wheel behaviour, as probabilities per leg
+ROLL_PROBABILITY = 0.35  # An in-the-money leg is rolled out instead of assigned
+EARLY_CLOSE_PROBABILITY = 0.3  # An out-of-the-money leg is bought back early at ~50% profit
+MAX_LEGS_PER_CYCLE = 12
+
+OPEN_FEE = Decimal('0.65')
+
+# Last day of the simulated history unless --end is given. Fixed rather than
+# today, so the same seed gives the same data whichever day the command runs;
+# it matches the as-of date of benchmarks/metrics.py.
+DEFAULT_END = date(2025, 6, 2)
+
+
+def _money(value):
+    return Decimal(str(round(max(value, 0), 2)))
+
+
+def _strike(price, otm):
+    """Round to a realistic strike increment"""
+    step = 0.5 if price < 25 else 1 if price < 200 else 5
+    return max(step, round(price * (1 + otm) / step) * step)
+
+
+def _intrinsic(price, strike, option_type):
+    return max(strike - price, 0) if option_type == 'P' else max(price - strike, 0)
+
+
+def _premium(price, strike, volatility, days, option_type):
+    """Rough option value: intrinsic plus time value decaying with moneyness"""
+    intrinsic = _intrinsic(price, strike, option_type)
+    time_value = 0.4 * price * volatility * math.sqrt(max(days, 1) / 365)
+    distance = abs(price - strike) / (price * volatility * math.sqrt(max(days, 1) / 365))
+    return intrinsic + time_value * math.exp(-distance)
+
+
+def _next_friday(day):
+    return day + timedelta(days=(4 - day.weekday()) % 7)
+
+
+class PriceHistory:
+    """Daily closes per ticker from a seeded geometric Brownian motion, forward-filled over non-trading days"""
+
+    def __init__(self, rng, start, end):
+        self.start = start
+        self.closes = {}
+        days = (end - start).days + 1
+        for ticker, price, volatility in UNDERLYINGS:
+            daily_vol = volatility / math.sqrt(252)
+            drift = 0.08 / 252 - daily_vol ** 2 / 2
+            closes = []
+            for offset in range(days):
+                if is_trading_day(start + timedelta(days=offset)):
+                    price *= math.exp(drift + daily_vol * rng.gauss(0, 1))
+                closes.append(price)
+            self.closes[ticker] = closes
+        self.volatility = {ticker: volatility for ticker, _, volatility in UNDERLYINGS}
+
+    def close(self, ticker, day):
+        closes = self.closes[ticker]
+        return closes[min(max((day - self.start).days, 0), len(closes) - 1)]
+
+    def write_csv(self, path):
+        """Write symbol,date,close rows for every trading day"""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['symbol', 'date', 'close'])
+            for ticker, closes in self.closes.items():
+                for offset, close in enumerate(closes):
+                    day = self.start + timedelta(days=offset)
+                    if is_trading_day(day):
+                        writer.writerow([ticker, day.isoformat(), f'{close:.4f}'])
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic benchmark database: N users x M wheel cycles x K credit spreads "
+        "with rolls, assignments, linked related_to chains and simulated price histories"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Users to create')
+        parser.add_argument('--cycles', type=int, default=20, help='Wheel cycles per user')
+        parser.add_argument('--spreads', type=int, default=50, help='Credit spreads per user')
+        parser.add_argument('--days', type=int, default=730, help='Length of the simulated history in days')
+        parser.add_argument('--end', type=date.fromisoformat, default=DEFAULT_END,
+                            help=f'Last day of the history (default {DEFAULT_END}); legs expiring after it are '
+                                 'left open, so run the app with CLOCK_AS_OF set to it to see them open')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT')
+        parser.add_argument('--username-prefix', default='sample', help='Generated users are <prefix>0001, ...')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete previously generated users with this prefix (and their data) first')
+        parser.add_argument('--prices-csv', help='Also write the simulated daily closes to this CSV file')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        end = options['end']
+        start = end - timedelta(days=options['days'])
+        prefix = options['username_prefix']
+        batch_size = options['batch_size']
+
+        # Only the generated <prefix>0001 names, never real accounts that share the prefix
+        existing = User.objects.filter(username__regex=rf'^{re.escape(prefix)}\d{{4,}}$')
+        if options['clear']:
+            deleted, _ = existing.delete()
+            self.stdout.write(f"Deleted {deleted} rows from a previous run")
+        elif existing.exists():
+            raise CommandError(f"Generated users {prefix}0001... already exist; use --clear or another --username-prefix")
+
+        prices = PriceHistory(rng, start, end)
+        if options['prices_csv']:
+            prices.write_csv(options['prices_csv'])
+            self.stdout.write(f"Wrote price histories to {options['prices_csv']}")
+
+        with transaction.atomic():
+            # Hashing is deliberately slow, so every generated user shares one hash
+            password = make_password(prefix)
+            users = User.objects.bulk_create([
+                User(username=f'{prefix}{i:04d}', password=password)
+                for i in range(1, options['users'] + 1)
+            ], batch_size=batch_size)
+
+            legs_by_depth = []
+            for user in users:
+                for cycle in range(options['cycles']):
+                    legs = self._wheel_cycle(rng, prices, user, cycle, start, end)
+                    for depth, leg in enumerate(legs):
+                        if depth == len(legs_by_depth):
+                            legs_by_depth.append([])
+                        legs_by_depth[depth].append(leg)
+
+            # Each depth is inserted after its parents, so related_to already has a primary key
+            positions = 0
+            for legs in legs_by_depth:
+                Position.objects.bulk_create(legs, batch_size=batch_size)
+                positions += len(legs)
+
+            spreads = [
+                self._credit_spread(rng, prices, user, start, end)
+                for user in users
+                for _ in range(options['spreads'])
+            ]
+            CreditSpread.objects.bulk_create(spreads, batch_size=batch_size)
+
+            # bulk_create bypasses the share-lot ledger; build the generated users' lots
+            lots = rebuild_share_lots(user_ids=[user.id for user in users])['lots']
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(users)} users, {positions} positions in "
+            f"{len(users) * options['cycles']} wheel cycles, {len(spreads)} credit spreads and {lots} share lots "
+            f"(seed {options['seed']})"
+        ))
+
+    def _wheel_cycle(self, rng, prices, user, cycle, start, end):
+        """
+        Sell puts until assigned (rolling some in-the-money puts), then covered
+        calls until called away. Legs that expire after end are left open.
+        """
+        ticker = rng.choice(UNDERLYINGS)[0]
+        volatility = prices.volatility[ticker]
+        open_date = start + timedelta(days=rng.randrange(max((end - start).days - 60, 1)))
+        option_type = 'P'
+        cost_basis = None
+        contracts = rng.choice([1, 1, 1, 2, 3, 5])
+        legs = []
+
+        while len(legs) < MAX_LEGS_PER_CYCLE and open_date < end:
+            price = prices.close(ticker, open_date)
+            expiration = expiration_session(_next_friday(open_date + timedelta(days=rng.randint(7, 45))))
+            if option_type == 'P':
+                strike = _strike(price, -rng.uniform(0.03, 0.12))
+            else:
+                strike = _strike(max(price, cost_basis or price), rng.uniform(0.02, 0.10))
+            days = (expiration - open_date).days
+            leg = Position(
+                user=user,
+                stock=ticker,
+                wheel_cycle_name=f'{ticker} Wheel #{cycle + 1}',
+                related_to=legs[-1] if legs else None,
+                open_date=open_date,
+                expiration=expiration,
+                type=option_type,
+                num_contracts=contracts,
+                strike=Decimal(str(strike)),
+                premium=_money(_premium(price, strike, volatility, days, option_type)),
+                open_fees=OPEN_FEE * contracts,
+                entry_price=_money(price),
+            )
+            legs.append(leg)
+
+            if expiration >= end:
+                leg.current_option_price = _money(
+                    _premium(prices.close(ticker, end), strike, volatility, (expiration - end).days, option_type)
+                )
+                break
+
+            close_price = prices.close(ticker, expiration)
+            in_the_money = close_price < strike if option_type == 'P' else close_price > strike
+            leg.close_fees = Decimal('0.00')
+            if in_the_money and rng.random() < ROLL_PROBABILITY:
+                # Buy back a day early and sell the next expiration
+                leg.close_date = expiration - timedelta(days=1)
+                leg.premium_paid_to_close = _money(
+                    _premium(prices.close(ticker, leg.close_date), strike, volatility, 1, option_type)
+                )
+                leg.close_fees = OPEN_FEE * contracts
+                open_date = leg.close_date
+            elif in_the_money:
+                leg.close_date = expiration
+                leg.assigned = 'Yes'
+                leg.premium_paid_to_close = Decimal('0.00')
+                if option_type == 'C':
+                    break  # Shares called away: the wheel is complete
+                cost_basis = strike - float(leg.premium)
+                option_type = 'C'
+                open_date = expiration + timedelta(days=3)
+            elif rng.random() < EARLY_CLOSE_PROBABILITY:
+                leg.close_date = open_date + timedelta(days=max(days // 2, 1))
+                leg.premium_paid_to_close = _money(float(leg.premium) * 0.5)
+                leg.close_fees = OPEN_FEE * contracts
+                open_date = leg.close_date + timedelta(days=1)
+            else:
+                leg.close_date = expiration
+                leg.premium_paid_to_close = Decimal('0.00')
+                open_date = expiration + timedelta(days=3)
+
+        return legs
+
+    def _credit_spread(self, rng, prices, user, start, end):
+        ticker = rng.choice(UNDERLYINGS)[0]
+        volatility = prices.volatility[ticker]
+        open_date = start + timedelta(days=rng.randrange(max((end - start).days, 1)))
+        expiration = expiration_session(_next_friday(open_date + timedelta(days=rng.randint(7, 45))))
+        price = prices.close(ticker, open_date)
+        days = (expiration - open_date).days
+        bull_put = rng.random() < 0.6
+        option_type = 'P' if bull_put else 'C'
+        short_strike = _strike(price, -rng.uniform(0.03, 0.10) if bull_put else rng.uniform(0.03, 0.10))
+        width = _strike(price, 0.03) - _strike(price, 0) or 1
+        long_strike = short_strike - width if bull_put else short_strike + width
+        contracts = rng.choice([1, 1, 2, 5, 10])
+
+        spread = CreditSpread(
+            user=user,
+            stock=ticker,
+            open_date=open_date,
+            expiration=expiration,
+            type='BPS' if bull_put else 'BCS',
+            short_strike=Decimal(str(short_strike)),
+            long_strike=Decimal(str(max(long_strike, 0.5))),
+            short_premium=_money(_premium(price, short_strike, volatility, days, option_type)),
+            long_premium=_money(_premium(price, long_strike, volatility, days, option_type)),
+            num_contracts=contracts,
+            open_fees=OPEN_FEE * 2 * contracts,
+            entry_price=_money(price),
+        )
+        if expiration >= end:
+            spread.current_short_price = _money(
+                _premium(prices.close(ticker, end), short_strike, volatility, (expiration - end).days, option_type)
+            )
+            spread.current_long_price = _money(
+                _premium(prices.close(ticker, end), long_strike, volatility, (expiration - end).days, option_type)
+            )
+        else:
+            # Held to expiration: each leg is worth its intrinsic value
+            close_price = prices.close(ticker, expiration)
+            spread.close_date = expiration
+            spread.short_close_premium = _money(_intrinsic(close_price, short_strike, option_type))
+            spread.long_close_premium = _money(_intrinsic(close_price, long_strike, option_type))
+            spread.close_fees = Decimal('0.00')
+        return spread
@@ -0,0 +1,43 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand
+from WheelTracker.trading_calendar import build_nyse_calendar
+import WheelTracker
+
+OUTPUT_PATH = Path(WheelTracker.__file__).resolve().parent / 'nyse_calendar_data.py'
+
+
+def _format_ordinals(name, days):
+    """Render a sorted list of dates as an array of ordinals, ten per line"""
+    ordinals = [str(d.toordinal()) for d in days]
+    rows = [', '.join(ordinals[i:i + 10]) for i in range(0, len(ordinals), 10)]
+    body = ''.join(f'    {row},\n' for row in rows)
+    return f"{name} = array('i', [\n{body}])\n"
+
+
+class Command(BaseCommand):
+    help = "Regenerate WheelTracker/nyse_calendar_data.py (NYSE holidays and early closes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--first-year', type=int, default=2000)
+        parser.add_argument('--last-year', type=int, default=2040)
+
+    def handle(self, *args, **options):
+        first_year, last_year = options['first_year'], options['last_year']
+        holidays, early_closes = build_nyse_calendar(first_year, last_year)
+
+        source = (
+            '# Generated by `python manage.py generate_trading_calendar` -- do not edit.\n'
+            '# Sorted date ordinals (date.toordinal()) for bisect lookups in trading_calendar.py\n'
+            'from array import array\n\n'
+            f'FIRST_YEAR = {first_year}\n'
+            f'LAST_YEAR = {last_year}\n\n'
+            + _format_ordinals('HOLIDAYS', holidays)
+            + '\n'
+            + _format_ordinals('EARLY_CLOSES', early_closes)
+        )
+        OUTPUT_PATH.write_text(source)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(holidays)} holidays and {len(early_closes)} early closes "
+            f"for {first_year}-{last_year} to {OUTPUT_PATH}"
+        ))
@@ -0,0 +1,106 @@
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Packages that must not be imported while booting the app; they belong behind
+# the first call that actually needs market data or numerical analytics
+DEFAULT_FORBIDDEN = ['yfinance', 'pandas', 'numpy', 'curl_cffi', 'google.protobuf']
+
+# Cold-start budget the test suite holds the WSGI entry point to
+START_UP_BUDGET_MS = 800
+
+# Runs in a fresh interpreter, like a serverless cold start: load the WSGI
+# entry point and the URLconf (which Django would otherwise import on the
+# first request), then report wall time and loaded modules on stdout.
+PROBE = '''
+import sys, time
+start = time.perf_counter()
+import {entry_point}
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(f"{{(time.perf_counter() - start) * 1000:.1f}}")
+print(",".join(sys.modules))
+'''
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into (module, self_us, cumulative_us, depth) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile cold-start imports of a WSGI entry point (python -X importtime) "
+        "and optionally fail if the start-up budget is exceeded or a heavy package is imported"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entry-point', default=settings.WSGI_APPLICATION.rsplit('.', 1)[0],
+                            help='Module to import, e.g. api.index or WheelTracker.wsgi_vercel')
+        parser.add_argument('--top', type=int, default=20, help='Number of slowest imports to list')
+        parser.add_argument('--budget-ms', type=float, default=None,
+                            help='Fail if the cold start takes longer than this')
+        parser.add_argument('--runs', type=int, default=3,
+                            help='Cold starts to measure; the fastest is compared to the budget')
+        parser.add_argument('--forbid', default=','.join(DEFAULT_FORBIDDEN),
+                            help='Comma-separated modules that must not be imported at start-up')
+
+    def _cold_start(self, entry_point, importtime):
+        command = [sys.executable]
+        if importtime:
+            command += ['-X', 'importtime']
+        command += ['-c', PROBE.format(entry_point=entry_point)]
+        result = subprocess.run(command, capture_output=True, text=True, cwd=settings.BASE_DIR)
+        if result.returncode != 0:
+            raise CommandError(f"Importing {entry_point} failed:\n{result.stderr[-2000:]}")
+        elapsed_ms, modules = result.stdout.strip().splitlines()[-2:]
+        return float(elapsed_ms), set(modules.split(',')), result.stderr
+
+    def handle(self, *args, **options):
+        entry_point = options['entry_point']
+
+        _, modules, stderr = self._cold_start(entry_point, importtime=True)
+        rows = parse_importtime(stderr)
+
+        self.stdout.write(f"Slowest imports for {entry_point} (cumulative, includes children):")
+        self.stdout.write(f"{'cumulative ms':>14}{'self ms':>10}  module")
+        for name, self_us, cumulative_us, depth in sorted(rows, key=lambda r: -r[2])[:options['top']]:
+            self.stdout.write(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {'  ' * depth}{name}")
+
+        # Self time grouped by top-level package shows which dependency costs the most
+        packages = {}
+        for name, self_us, _, _ in rows:
+            package = name.split('.')[0]
+            packages[package] = packages.get(package, 0) + self_us
+        self.stdout.write("\nSelf time by top-level package:")
+        for package, self_us in sorted(packages.items(), key=lambda p: -p[1])[:options['top']]:
+            self.stdout.write(f"{self_us / 1000:>14.1f}  {package}")
+
+        # Timed runs without -X importtime, which adds its own overhead
+        timings = [self._cold_start(entry_point, importtime=False)[0] for _ in range(max(1, options['runs']))]
+        cold_start_ms = min(timings)
+        self.stdout.write(
+            f"\nCold start ({entry_point} + URLconf): {cold_start_ms:.0f} ms "
+            f"(best of {len(timings)}: {', '.join(f'{t:.0f}' for t in timings)})"
+        )
+
+        failures = []
+        forbidden = [m for m in options['forbid'].split(',') if m]
+        loaded = sorted(m for m in forbidden if m in modules)
+        if loaded:
+            failures.append(f"heavy modules imported at start-up: {', '.join(loaded)}")
+        budget = options['budget_ms']
+        if budget is not None and cold_start_ms > budget:
+            failures.append(f"cold start {cold_start_ms:.0f} ms exceeds budget of {budget:.0f} ms")
+
+        if failures:
+            raise CommandError('; '.join(failures))
+        self.stdout.write(self.style.SUCCESS("Cold start within budget"))
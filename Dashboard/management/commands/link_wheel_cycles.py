@@ -0,0 +1,33 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Link unlinked positions into wheel cycles (assigned put, then covered calls; rolled puts) "
+        "and break related_to links that loop back on themselves"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', nargs='+', help='Usernames to link (default: everyone)')
+        parser.add_argument('--dry-run', action='store_true', help='Report the links without saving them')
+
+    def handle(self, *args, **options):
+        from Dashboard.wheel_links import auto_link_wheel_cycles
+
+        user_ids = None
+        if options['user']:
+            users = dict(User.objects.filter(username__in=options['user']).values_list('username', 'id'))
+            unknown = sorted(set(options['user']) - users.keys())
+            if unknown:
+                raise CommandError(f"Unknown users: {', '.join(unknown)}")
+            user_ids = list(users.values())
+
+        start = time.perf_counter()
+        result = auto_link_wheel_cycles(user_ids, dry_run=options['dry_run'])
+        verb = 'Would link' if options['dry_run'] else 'Linked'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {result['linked']} positions and broke {result['loops_broken']} looping links "
+            f"across {result['positions']} positions in {time.perf_counter() - start:.2f}s"
+        ))
@@ -0,0 +1,79 @@
+import csv
+import time
+from collections import defaultdict
+from django.core.management.base import BaseCommand, CommandError
+
+# Accepted header names, compared case-insensitively
+TICKER_COLUMNS = ('symbol', 'ticker')
+DATE_COLUMNS = ('date', 'datetime', 'timestamp')
+
+
+class Command(BaseCommand):
+    help = (
+        "Load daily closes from CSV files into the local price history store (PRICE_HISTORY_DIR). "
+        "Accepts symbol,date,close files (e.g. generate_sample_data --prices-csv) or single-ticker "
+        "Date,...,Close downloads with --ticker"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='CSV files')
+        parser.add_argument('--ticker', help='Ticker for files without a symbol column')
+        parser.add_argument('--close-column', default='close', help='Column holding the close (default: close)')
+        parser.add_argument('--store', help='Price history directory (default: PRICE_HISTORY_DIR)')
+        parser.add_argument('--replace', action='store_true',
+                            help="Replace each loaded ticker's history instead of appending to it")
+
+    def handle(self, *args, **options):
+        import numpy as np
+        from Dashboard.price_history import TICKER_PATTERN, PriceHistoryStore
+
+        start = time.perf_counter()
+        rows = defaultdict(lambda: ([], []))
+        for path in options['paths']:
+            self._read(path, options, rows)
+
+        invalid = sorted(ticker for ticker in rows if not TICKER_PATTERN.fullmatch(ticker.upper()))
+        if invalid:
+            raise CommandError(f"Invalid tickers: {', '.join(invalid)}")
+
+        store = PriceHistoryStore(options['store'])
+        appended = 0
+        for ticker, (dates, closes) in sorted(rows.items()):
+            # ISO dates, possibly with a time part (yfinance exports); the date is the first 10 characters
+            days = np.array([value[:10] for value in dates], dtype='datetime64[D]').astype('<i4')
+            write = store.write if options['replace'] else store.append
+            count = write(ticker, days, np.array(closes, dtype=float))
+            appended += count
+            self.stdout.write(f"{ticker}: {count} rows added, {len(days) - count} already stored or duplicated")
+
+        read = sum(len(dates) for dates, _ in rows.values())
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {read} rows for {len(rows)} tickers and stored {appended} in {elapsed:.2f}s "
+            f"({read / max(elapsed, 1e-9):,.0f} rows/s) in {store.root}"
+        ))
+
+    def _read(self, path, options, rows):
+        with open(path, newline='') as f:
+            reader = csv.reader(f)
+            header = [name.strip().lower() for name in next(reader, [])]
+            ticker_column = next((header.index(name) for name in TICKER_COLUMNS if name in header), None)
+            date_column = next((header.index(name) for name in DATE_COLUMNS if name in header), None)
+            close_name = options['close_column'].lower()
+            if date_column is None or close_name not in header:
+                raise CommandError(f"{path}: expected date and {close_name} columns, found {', '.join(header)}")
+            if ticker_column is None and not options['ticker']:
+                raise CommandError(f"{path} has no symbol column; pass --ticker")
+            close_column = header.index(close_name)
+
+            for line, row in enumerate(reader, start=2):
+                if not row or not row[close_column].strip():
+                    continue
+                ticker = row[ticker_column].strip().upper() if ticker_column is not None else options['ticker'].upper()
+                try:
+                    close = float(row[close_column])
+                except ValueError:
+                    raise CommandError(f"{path}:{line}: invalid close {row[close_column]!r}")
+                dates, closes = rows[ticker]
+                dates.append(row[date_column].strip())
+                closes.append(close)
@@ -0,0 +1,31 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the share-lot ledger (put assignments, covered calls, shares called away) "
+        "from closed positions, e.g. to backfill positions closed before the ledger existed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', nargs='+', help='Usernames to rebuild (default: everyone)')
+
+    def handle(self, *args, **options):
+        from Dashboard.ledger import rebuild
+
+        user_ids = None
+        if options['user']:
+            users = dict(User.objects.filter(username__in=options['user']).values_list('username', 'id'))
+            unknown = sorted(set(options['user']) - users.keys())
+            if unknown:
+                raise CommandError(f"Unknown users: {', '.join(unknown)}")
+            user_ids = list(users.values())
+
+        start = time.perf_counter()
+        totals = rebuild(user_ids=user_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {totals['lots']} share lots from {totals['entries']} postings "
+            f"in {time.perf_counter() - start:.2f}s"
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Fetch the underlying's close for every leg whose expiration session has ended "
+        "(one batched Yahoo Finance download per session) and settle those legs. "
+        "Requests only read closes already stored or cached, so schedule this after the close, "
+        "e.g. hourly from 4:15 PM ET"
+    )
+
+    def handle(self, *args, **options):
+        from Dashboard.market_data import fetch_missing_closes
+        from Dashboard.utils import auto_close_expired_positions, sessions_awaiting_close
+
+        for session, tickers in sorted(sessions_awaiting_close().items()):
+            fetched = fetch_missing_closes(tickers, session)
+            self.stdout.write(f"{session}: fetched {len(fetched)} of {len(tickers)} closes")
+
+        result = auto_close_expired_positions()
+        self.stdout.write(self.style.SUCCESS(
+            f"Closed {result['closed']} positions ({result['assigned']} assigned) and "
+            f"{result['spreads_closed']} spreads; reopened {result['reopened']}; "
+            f"{result['awaiting_price']} still waiting for a close"
+        ))
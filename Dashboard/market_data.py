@@ -0,0 +1,130 @@
+import logging
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Underlying prices seen while fetching option chains are kept this long (seconds)
+# for pricing without another network round trip
+SPOT_CACHE_TIMEOUT = 15 * 60
+
+# A session's closing price never changes; fetched closes are kept this long
+# (longer than the expiry grace period, see Dashboard.utils)
+CLOSE_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+
+
+def _spot_key(ticker):
+    return f'spot:{ticker.upper()}'
+
+
+def cache_spot_price(ticker, price):
+    cache.set(_spot_key(ticker), float(price), SPOT_CACHE_TIMEOUT)
+
+
+def get_cached_spot_prices(tickers):
+    """Return {ticker: last seen underlying price} for the tickers that have one"""
+    keys = {_spot_key(ticker): ticker for ticker in tickers}
+    return {keys[key]: price for key, price in cache.get_many(list(keys)).items()}
+
+
+def _close_key(ticker, day):
+    return f'close:{ticker.upper()}:{day.isoformat()}'
+
+
+def fetch_closes(tickers, day):
+    """
+    Fetch the closing price of every ticker for one session in a single Yahoo
+    Finance download. Returns {ticker: close} for the tickers that traded.
+    Blocks on the network like fetch_option_mids.
+    """
+    import yfinance as yf
+
+    tickers = sorted(tickers)
+    data = yf.download(
+        tickers, start=day, end=day + timedelta(days=1), auto_adjust=False, progress=False, threads=True,
+    )
+    if data is None or data.empty:
+        return {}
+    closes = data['Close']
+    row = closes.iloc[-1] if hasattr(closes, 'columns') else {tickers[0]: closes.iloc[-1]}
+    # Missing bars come back as NaN
+    return {ticker: float(close) for ticker, close in row.items() if close == close}
+
+
+def get_closing_prices(tickers, day):
+    """
+    Closing underlying price of each ticker for one session, as {ticker: close}
+    for the tickers with a known close.
+
+    Local data only - the price history store, then closes cached by
+    fetch_missing_closes - so it is safe to call in the request path.
+    """
+    from Dashboard.price_history import get_store
+
+    tickers = {ticker.upper() for ticker in tickers}
+    closes = {}
+    store = get_store()
+    for ticker in tickers:
+        try:
+            days, values = store.series(ticker, day, day)
+        except (FileNotFoundError, ValueError):
+            continue
+        if len(days):
+            closes[ticker] = float(values[0])
+
+    keys = {_close_key(ticker, day): ticker for ticker in tickers - closes.keys()}
+    closes.update({keys[key]: close for key, close in cache.get_many(list(keys)).items()})
+    return closes
+
+
+def fetch_missing_closes(tickers, day):
+    """
+    Fetch the closes get_closing_prices doesn't have yet, in one batched Yahoo
+    Finance download, and cache them for it. Returns {ticker: close} fetched.
+    Blocks on the network: call it from a scheduled job (manage.py
+    settle_expirations), never from a request.
+    """
+    missing = {ticker.upper() for ticker in tickers} - get_closing_prices(tickers, day).keys()
+    if not missing:
+        return {}
+    try:
+        fetched = fetch_closes(missing, day)
+    except Exception as e:
+        logger.warning(f"Closing price fetch failed for {', '.join(sorted(missing))} on {day}: {e}")
+        return {}
+    cache.set_many({_close_key(ticker, day): close for ticker, close in fetched.items()}, CLOSE_CACHE_TIMEOUT)
+    return fetched
+
+
+def _mid_price(bid, ask, last_price):
+    """Mid of bid/ask, falling back to the last trade when there is no market"""
+    # Yahoo reports missing quotes as NaN
+    bid, ask, last_price = (value if value == value else 0 for value in (bid, ask, last_price))
+    if not bid and not ask:
+        return last_price or 0
+    return (bid + ask) / 2
+
+
+def fetch_option_mids(stock, expiration):
+    """
+    Fetch one option chain from Yahoo Finance.
+    Returns {(type, strike): mid price} where type is 'P' or 'C'.
+    The underlying's price is cached on the way (see get_cached_spot_prices).
+
+    This blocks on the network for up to a few seconds; async callers should
+    run it in a worker thread (see Dashboard/async_views.py).
+    """
+    import yfinance as yf
+
+    chain = yf.Ticker(stock).option_chain(expiration.strftime('%Y-%m-%d'))
+    spot = (getattr(chain, 'underlying', None) or {}).get('regularMarketPrice')
+    if spot:
+        cache_spot_price(stock, spot)
+
+    mids = {}
+    for option_type, options in (('P', chain.puts), ('C', chain.calls)):
+        for option in options.itertuples():
+            mid = _mid_price(option.bid, option.ask, option.lastPrice)
+            mids[(option_type, Decimal(str(option.strike)))] = Decimal(str(round(mid, 2)))
+    return mids
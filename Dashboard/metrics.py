@@ -0,0 +1,31 @@
+from functools import wraps
+from WheelTracker.clock import today_et
+
+# Key under which a cached metrics dict remembers the date it was computed for
+_AS_OF = '_as_of'
+
+
+def cached_metric(func):
+    """
+    Read-only property whose value is computed once per instance.
+
+    Values live in the instance's ``_metrics_cache`` dict, which is dropped
+    whenever a field is assigned (see Position.__setattr__) or when the ET
+    date the values were computed against changes. ClockMiddleware pins that
+    date for the whole request.
+    """
+    name = func.__name__
+
+    @wraps(func)
+    def getter(self):
+        as_of = today_et()
+        cache = self.__dict__.get('_metrics_cache')
+        if cache is None or cache[_AS_OF] != as_of:
+            cache = self.__dict__['_metrics_cache'] = {_AS_OF: as_of}
+        try:
+            return cache[name]
+        except KeyError:
+            value = cache[name] = func(self)
+            return value
+
+    return property(getter)
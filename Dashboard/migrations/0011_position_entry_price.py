@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:01
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Dashboard", "0010_notification"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="position",
+            options={"ordering": ["-open_date"]},
+        ),
+        migrations.AddField(
+            model_name="position",
+            name="entry_price",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=3,
+                help_text="The stock price when you entered the position",
+                max_digits=10,
+                null=True,
+                validators=[django.core.validators.MinValueValidator(Decimal("0.00"))],
+            ),
+        ),
+    ]
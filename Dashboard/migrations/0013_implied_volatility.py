@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Dashboard", "0012_notification_broadcast_receipts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="position",
+            name="implied_volatility",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=4,
+                help_text="Implied volatility backed out of current_option_price (0.30 = 30%)",
+                max_digits=7,
+                null=True,
+            ),
+        ),
+    ]
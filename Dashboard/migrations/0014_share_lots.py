@@ -0,0 +1,180 @@
+# Generated by Django 5.2.7 on 2026-10-19 06:44
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Dashboard", "0013_implied_volatility"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ShareLot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("stock", models.CharField(max_length=10)),
+                ("shares", models.PositiveIntegerField()),
+                (
+                    "cost_per_share",
+                    models.DecimalField(
+                        decimal_places=3,
+                        help_text="Strike of the assigned put",
+                        max_digits=10,
+                    ),
+                ),
+                (
+                    "premium_collected",
+                    models.DecimalField(
+                        decimal_places=3,
+                        default=Decimal("0.00"),
+                        help_text="Option P/L credited to these shares (assigned put and covered calls, net of fees)",
+                        max_digits=12,
+                    ),
+                ),
+                (
+                    "adjusted_cost_basis",
+                    models.DecimalField(
+                        decimal_places=4,
+                        help_text="Break-even per share: cost per share less premium collected per share",
+                        max_digits=12,
+                    ),
+                ),
+                ("acquired_on", models.DateField()),
+                ("sold_on", models.DateField(blank=True, null=True)),
+                (
+                    "sale_price",
+                    models.DecimalField(
+                        blank=True, decimal_places=3, max_digits=10, null=True
+                    ),
+                ),
+                (
+                    "realized_pl",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=3,
+                        help_text="Stock gain or loss plus premium collected, once sold",
+                        max_digits=12,
+                        null=True,
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "closed_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="closed_share_lots",
+                        to="Dashboard.position",
+                    ),
+                ),
+                (
+                    "opened_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="opened_share_lots",
+                        to="Dashboard.position",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="share_lots",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["acquired_on", "id"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ShareLotEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("assigned", "Put assigned"),
+                            ("premium", "Covered call"),
+                            ("called_away", "Called away"),
+                        ],
+                        max_length=11,
+                    ),
+                ),
+                ("shares", models.PositiveIntegerField()),
+                (
+                    "amount",
+                    models.DecimalField(
+                        decimal_places=3,
+                        help_text="Premium credited to the lot",
+                        max_digits=12,
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "lot",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="entries",
+                        to="Dashboard.sharelot",
+                    ),
+                ),
+                (
+                    "position",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="share_lot_entries",
+                        to="Dashboard.position",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["date", "id"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="sharelot",
+            index=models.Index(
+                fields=["user", "stock", "sold_on"],
+                name="Dashboard_s_user_id_31da9a_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sharelot",
+            index=models.Index(
+                fields=["user", "sold_on"], name="Dashboard_s_user_id_6b3c24_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="sharelotentry",
+            constraint=models.UniqueConstraint(
+                fields=("lot", "position"), name="unique_share_lot_entry"
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Dashboard", "0014_share_lots"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="position",
+            name="auto_assigned",
+            field=models.BooleanField(
+                default=False,
+                help_text="Set when assigned was marked Yes automatically at expiration (cleared again if reopened)",
+            ),
+        ),
+    ]
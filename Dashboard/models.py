@@ -2,8 +2,9 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from decimal import Decimal
-from datetime import datetime
-import pytz
+from Dashboard.metrics import cached_metric
+from WheelTracker.clock import today_et
+from WheelTracker.trading_calendar import trading_days_between
 
 
 class Position(models.Model):
@@ -74,6 +75,10 @@ class Position(models.Model):
         default='No',
         help_text="Enter Yes if assigned shares or had shares called away, otherwise No"
     )
+    auto_assigned = models.BooleanField(
+        default=False,
+        help_text="Set when assigned was marked Yes automatically at expiration (cleared again if reopened)"
+    )
     premium_paid_to_close = models.DecimalField(
         max_digits=10,
         decimal_places=3,
@@ -112,6 +117,13 @@ class Position(models.Model):
         blank=True,
         help_text="The mid price the option is currently trading for (from Yahoo Finance)"
     )
+    implied_volatility = models.DecimalField(
+        max_digits=7,
+        decimal_places=4,
+        null=True,
+        blank=True,
+        help_text="Implied volatility backed out of current_option_price (0.30 = 30%)"
+    )
 
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -130,21 +142,42 @@ class Position(models.Model):
         cycle_info = f" ({self.wheel_cycle_name})" if self.wheel_cycle_name else ""
         return f"{self.stock}{cycle_info} - {self.get_type_display()} ${self.strike} exp {self.expiration}"
 
+    def __setattr__(self, name, value):
+        # Assigning any field invalidates the memoized metrics (see cached_metric)
+        if not name.startswith('_'):
+            self.__dict__.pop('_metrics_cache', None)
+        super().__setattr__(name, value)
+
     def get_wheel_cycle_positions(self):
         """Get all positions in this wheel cycle (following the chain)"""
-        positions = [self]
+        # Resolved in bulk for list endpoints (see Dashboard.utils.prefetch_wheel_cycles)
+        prefetched = self.__dict__.get('_wheel_cycle')
+        if prefetched is not None:
+            return list(prefetched)
+
+        # Positions already visited: a bad edit can link a chain back onto itself
+        seen = {self.pk}
 
         # Follow the chain backwards
+        ancestors = []
         current = self.related_to
-        while current:
-            positions.insert(0, current)
+        while current is not None and current.pk not in seen:
+            ancestors.append(current)
+            seen.add(current.pk)
             current = current.related_to
 
-        # Follow the chain forwards
-        for related in self.related_positions.all():
-            positions.extend(related.get_wheel_cycle_positions()[1:])  # Skip the current position
+        # Follow the chain forwards, depth first
+        descendants = []
+        stack = list(reversed(self.related_positions.all()))
+        while stack:
+            current = stack.pop()
+            if current.pk in seen:
+                continue
+            seen.add(current.pk)
+            descendants.append(current)
+            stack.extend(reversed(current.related_positions.all()))
 
-        return positions
+        return ancestors[::-1] + [self] + descendants
 
     @property
     def wheel_cycle_number(self):
@@ -168,31 +201,34 @@ class Position(models.Model):
         """Check if the position is still open"""
         return self.close_date is None
 
-    @property
+    @cached_metric
     def days_in_trade(self):
         """Calculate the number of days the trade was held (using ET timezone)"""
         if self.close_date:
             return (self.close_date - self.open_date).days
-        et_tz = pytz.timezone('US/Eastern')
-        today_et = datetime.now(et_tz).date()
-        return (today_et - self.open_date).days
+        return (today_et() - self.open_date).days
 
-    @property
+    @cached_metric
     def days_to_expiration(self):
         """Calculate the number of days remaining until expiration (using ET timezone)"""
         if self.close_date:
             return 0
-        et_tz = pytz.timezone('US/Eastern')
-        today_et = datetime.now(et_tz).date()
-        days = (self.expiration - today_et).days
+        days = (self.expiration - today_et()).days
         return max(0, days)
 
-    @property
+    @cached_metric
+    def trading_days_to_expiration(self):
+        """Calculate the number of NYSE sessions remaining until expiration (holiday aware)"""
+        if self.close_date:
+            return 0
+        return trading_days_between(today_et(), self.expiration)
+
+    @cached_metric
     def days_open_to_expiration(self):
         """Calculate total days from open to expiration"""
         return (self.expiration - self.open_date).days
 
-    @property
+    @cached_metric
     def profit_loss(self):
         """Calculate P/L: ((Premium received - Price paid to close) x # contracts) - total fees"""
         if self.close_date is None:
@@ -206,7 +242,7 @@ class Position(models.Model):
 
         return gross_profit - total_fees
 
-    @property
+    @cached_metric
     def collateral_requirement(self):
         """Calculate the collateral requirement for the position"""
         # For cash-secured puts: strike * 100 * num_contracts
@@ -215,13 +251,13 @@ class Position(models.Model):
             return self.strike * 100 * self.num_contracts
         return 0
 
-    @property
+    @cached_metric
     def risk_less_premium(self):
         """Calculate risk less premium collected on open"""
         premium_collected = (self.premium * self.num_contracts * 100) - self.open_fees
         return self.collateral_requirement - premium_collected
 
-    @property
+    @cached_metric
     def ar_if_held_to_expiration(self):
         """Calculate Annualized Rate of Return if held to expiration
         Formula: (365 / days_open_to_expiration) * (premium / collateral) * 100
@@ -242,7 +278,7 @@ class Position(models.Model):
 
         return (Decimal('365') / self.days_open_to_expiration) * (premium_dollars / collateral) * 100
 
-    @property
+    @cached_metric
     def ar_of_closed_trade(self):
         """Calculate actual Annualized Rate of Return for closed trades
         Formula: (365 / days_in_trade) * (profit_loss / collateral) * 100
@@ -265,7 +301,7 @@ class Position(models.Model):
 
         return (Decimal('365') / self.days_in_trade) * (pl / collateral) * 100
 
-    @property
+    @cached_metric
     def ar_on_realized_premium(self):
         """Calculate AR on realized premium for open positions"""
         if self.close_date is not None or self.days_in_trade == 0:
@@ -286,7 +322,7 @@ class Position(models.Model):
 
         return (Decimal('365') * realized_pl / risk / self.days_in_trade) * 100
 
-    @property
+    @cached_metric
     def ar_on_remaining_premium(self):
         """Calculate AR on remaining premium for open positions"""
         if self.close_date is not None or self.days_to_expiration == 0:
@@ -304,7 +340,7 @@ class Position(models.Model):
 
         return (Decimal('365') * cost_to_close / risk / self.days_to_expiration) * 100
 
-    @property
+    @cached_metric
     def percent_premium_earned(self):
         """Calculate % of premium earned at current option price"""
         if self.current_option_price is None:
@@ -316,7 +352,7 @@ class Position(models.Model):
         premium_earned = self.premium - self.current_option_price
         return (premium_earned / self.premium) * 100
 
-    @property
+    @cached_metric
     def set_break_even_price_puts(self):
         """
         Calculate break-even price for puts
@@ -340,7 +376,7 @@ class Position(models.Model):
         break_even = (strike_value - pl) / total_shares
         return break_even
 
-    @property
+    @cached_metric
     def roi_percentage(self):
         """
         Calculate ROI percentage: (premium / collateral) * 100
@@ -405,8 +441,14 @@ class Feedback(models.Model):
 class Notification(models.Model):
     """Model for system notifications sent to users
 
-    Each notification is sent to a specific user. To send to all users,
-    individual notification records are created for each user via bulk_create.
+    A notification with a user is sent to that user only. A notification
+    without a user is a broadcast to all users: it is stored once, and each
+    user's read state lives in a NotificationReceipt row that only exists
+    once they have read it.
+
+    Broadcasts sent before receipts existed were one copy per user. Those
+    copies are kept as ordinary per-user notifications, with the read state
+    they already have; nothing links them back into a single broadcast.
     """
 
     TYPE_CHOICES = [
@@ -416,12 +458,14 @@ class Notification(models.Model):
         ('announcement', 'Announcement'),
     ]
 
-    # User who receives the notification
+    # User who receives the notification (null = broadcast to all users)
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,
         related_name='notifications',
-        help_text="User who receives this notification"
+        help_text="User who receives this notification. Leave empty to broadcast to all users."
     )
 
     # Notification details
@@ -448,8 +492,118 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=['user', 'is_read']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['user', 'created_at']),
         ]
 
     def __str__(self):
         user_str = self.user.username if self.user else "All Users"
         return f"{self.get_type_display()} to {user_str}: {self.title}"
+
+
+class NotificationReceipt(models.Model):
+    """Read receipt for a broadcast notification (one row per user who has read it)"""
+
+    notification = models.ForeignKey(
+        Notification,
+        on_delete=models.CASCADE,
+        related_name='receipts'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notification_receipts'
+    )
+    read_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'notification'], name='unique_notification_receipt'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} read {self.notification_id}"
+
+
+class ShareLot(models.Model):
+    """
+    Shares acquired by a put assignment, held until called away.
+
+    premium_collected is the option P/L credited to the lot: the assigned put's
+    plus every covered call written against it. adjusted_cost_basis (the
+    break-even per share) and realized_pl are kept up to date as legs are
+    posted by Dashboard.ledger, so they never need re-deriving from positions.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='share_lots', null=True)
+    stock = models.CharField(max_length=10)
+    shares = models.PositiveIntegerField()
+    cost_per_share = models.DecimalField(max_digits=10, decimal_places=3, help_text="Strike of the assigned put")
+    premium_collected = models.DecimalField(
+        max_digits=12,
+        decimal_places=3,
+        default=Decimal('0.00'),
+        help_text="Option P/L credited to these shares (assigned put and covered calls, net of fees)"
+    )
+    adjusted_cost_basis = models.DecimalField(
+        max_digits=12,
+        decimal_places=4,
+        help_text="Break-even per share: cost per share less premium collected per share"
+    )
+    acquired_on = models.DateField()
+    opened_by = models.ForeignKey(Position, on_delete=models.CASCADE, related_name='opened_share_lots')
+
+    # Set once the shares are called away
+    sold_on = models.DateField(null=True, blank=True)
+    sale_price = models.DecimalField(max_digits=10, decimal_places=3, null=True, blank=True)
+    closed_by = models.ForeignKey(
+        Position, on_delete=models.SET_NULL, null=True, blank=True, related_name='closed_share_lots'
+    )
+    realized_pl = models.DecimalField(
+        max_digits=12,
+        decimal_places=3,
+        null=True,
+        blank=True,
+        help_text="Stock gain or loss plus premium collected, once sold"
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['acquired_on', 'id']
+        indexes = [
+            models.Index(fields=['user', 'stock', 'sold_on']),
+            models.Index(fields=['user', 'sold_on']),
+        ]
+
+    @property
+    def is_open(self):
+        return self.sold_on is None
+
+    def __str__(self):
+        return f"{self.shares} {self.stock} @ ${self.cost_per_share} (basis ${self.adjusted_cost_basis})"
+
+
+class ShareLotEntry(models.Model):
+    """One leg's posting to a share lot; a leg spanning several lots posts to each"""
+
+    KIND_CHOICES = [
+        ('assigned', 'Put assigned'),
+        ('premium', 'Covered call'),
+        ('called_away', 'Called away'),
+    ]
+
+    lot = models.ForeignKey(ShareLot, on_delete=models.CASCADE, related_name='entries')
+    position = models.ForeignKey(Position, on_delete=models.CASCADE, related_name='share_lot_entries')
+    kind = models.CharField(max_length=11, choices=KIND_CHOICES)
+    shares = models.PositiveIntegerField()
+    amount = models.DecimalField(max_digits=12, decimal_places=3, help_text="Premium credited to the lot")
+    date = models.DateField()
+
+    class Meta:
+        ordering = ['date', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['lot', 'position'], name='unique_share_lot_entry'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.shares} {self.lot.stock} on {self.date}"
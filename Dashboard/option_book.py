@@ -0,0 +1,340 @@
+"""
+The open option legs of a user's book as parallel NumPy arrays.
+
+Every open Position is one short leg; every open CreditSpread is a short and
+a long leg. Quantities are signed shares (-100 per short contract), so summing
+quantity * per-share value over legs gives the book's dollar exposure.
+Short legs also carry the capital they tie up if assigned: the position's
+collateral_requirement, or the spread's max_risk (on its short leg only).
+
+Underlying prices come from, in order: the request, the price cached when
+option chains were last fetched (Dashboard.market_data), or the entry price
+of the most recently opened leg on that ticker. Volatilities come from the
+request (per ticker, then the default), the leg's stored implied volatility,
+or DEFAULT_VOLATILITY.
+"""
+import numpy as np
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from CreditSpread.models import CreditSpread
+from Dashboard.market_data import get_cached_spot_prices
+from Dashboard.models import Position
+from Dashboard.pricing import (
+    DEFAULT_RISK_FREE_RATE, DEFAULT_VOLATILITY, SECONDS_PER_YEAR, black_scholes, implied_volatility,
+)
+from WheelTracker import clock
+from WheelTracker.trading_calendar import expiration_close_et
+
+# Default scenario grid: underlying moves in percent, and calendar days forward
+DEFAULT_SCENARIO_MOVES = (-20, -15, -10, -5, 0, 5, 10, 15, 20)
+DEFAULT_SCENARIO_DAYS = (0, 7, 14, 30)
+
+# Monte Carlo results are keyed by the as-of date, so they expire with it anyway
+MONTE_CARLO_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Books with fewer uncached trades than this are simulated in-process even
+# when MONTE_CARLO_WORKERS is set, since starting a pool costs more
+MONTE_CARLO_POOL_MIN_TRADES = 32
+
+# Upper bound on moves x days x legs priced per request
+MAX_SCENARIO_CELLS = 5_000_000
+
+# Cells priced at once when revaluing a scenario grid; Black-Scholes keeps a
+# dozen or so float64 temporaries per cell, so this holds a chunk near 50 MB
+SCENARIO_CHUNK_CELLS = 500_000
+
+
+def parse_values(text, default):
+    """Parse a comma-separated list of numbers, e.g. "-10,-5,0,5,10"; raises ValueError on bad input"""
+    if not text:
+        return list(default)
+    return [float(part) for part in text.split(',') if part.strip()]
+
+
+def parse_ticker_values(text):
+    """
+    Parse "0.3" or "AAPL:0.35,SPY:0.18" (optionally mixed, e.g. "0.3,TSLA:0.6").
+    Returns (default or None, {TICKER: value}); raises ValueError on bad input.
+    """
+    default, values = None, {}
+    for item in filter(None, (part.strip() for part in (text or '').split(','))):
+        ticker, sep, value = item.rpartition(':')
+        if sep:
+            values[ticker.strip().upper()] = float(value)
+        else:
+            default = float(value)
+    return default, values
+
+
+class OptionBook:
+    """Open legs of one user's positions and credit spreads"""
+
+    def __init__(self, legs, spots, spot_sources, now=None):
+        self.now = now or clock.now_et()
+        self.legs = legs
+        self.spot_sources = spot_sources
+
+        self.stock = np.array([leg['stock'] for leg in legs], dtype=object)
+        self.is_call = np.array([leg['is_call'] for leg in legs], dtype=bool)
+        self.strike = np.array([leg['strike'] for leg in legs], dtype=float)
+        self.quantity = np.array([leg['quantity'] for leg in legs], dtype=float)
+        self.premium = np.array([leg['premium'] for leg in legs], dtype=float)
+        self.mark = np.array([np.nan if leg['mark'] is None else leg['mark'] for leg in legs], dtype=float)
+        self.iv = np.array([leg['iv'] for leg in legs], dtype=float)
+        self.assignment_exposure = np.array([leg['assignment_exposure'] for leg in legs], dtype=float)
+        self.spot = np.array([spots[leg['stock']] for leg in legs], dtype=float)
+
+        expiry_years = {}
+        for leg in legs:
+            if leg['expiration'] not in expiry_years:
+                seconds = (expiration_close_et(leg['expiration']) - self.now).total_seconds()
+                expiry_years[leg['expiration']] = max(seconds, 0) / SECONDS_PER_YEAR
+        self.years = np.array([expiry_years[leg['expiration']] for leg in legs], dtype=float)
+
+        self.tickers, self.ticker_index = np.unique(self.stock.astype(str), return_inverse=True)
+
+    def __len__(self):
+        return len(self.legs)
+
+    @classmethod
+    def for_user(cls, user, spot_overrides=None, iv_overrides=None, default_iv=None, now=None):
+        """Build the book from the user's open positions and spreads (two queries)"""
+        spot_overrides = spot_overrides or {}
+        iv_overrides = iv_overrides or {}
+        legs = []
+        latest_entry = {}
+
+        def volatility(stock, stored):
+            if stock in iv_overrides:
+                return iv_overrides[stock]
+            if default_iv:
+                return default_iv
+            return DEFAULT_VOLATILITY if stored is None else float(stored)
+
+        def add_leg(stock, entry_price, open_date, **leg):
+            legs.append({'stock': stock, **leg})
+            if entry_price is not None and (stock not in latest_entry or open_date >= latest_entry[stock][0]):
+                latest_entry[stock] = (open_date, float(entry_price))
+
+        for position in Position.objects.filter(user=user, close_date__isnull=True):
+            add_leg(
+                position.stock, position.entry_price, position.open_date,
+                source='position', source_id=position.id, leg='short',
+                is_call=position.type == 'C', strike=float(position.strike),
+                expiration=position.expiration, contracts=position.num_contracts,
+                quantity=-100 * position.num_contracts, premium=float(position.premium),
+                mark=None if position.current_option_price is None else float(position.current_option_price),
+                iv=volatility(position.stock, position.implied_volatility),
+                assignment_exposure=float(position.collateral_requirement),
+                open_fees=float(position.open_fees),
+            )
+
+        for spread in CreditSpread.objects.filter(user=user, close_date__isnull=True):
+            is_call = spread.type == 'BCS'
+            for leg, strike, premium, mark, stored_iv, exposure, sign in (
+                ('short', spread.short_strike, spread.short_premium, spread.current_short_price,
+                 spread.short_implied_volatility, float(spread.max_risk), -1),
+                ('long', spread.long_strike, spread.long_premium, spread.current_long_price,
+                 spread.long_implied_volatility, 0.0, 1),
+            ):
+                add_leg(
+                    spread.stock, spread.entry_price, spread.open_date,
+                    source='credit_spread', source_id=spread.id, leg=leg,
+                    is_call=is_call, strike=float(strike),
+                    expiration=spread.expiration, contracts=spread.num_contracts,
+                    quantity=sign * 100 * spread.num_contracts, premium=float(premium),
+                    mark=None if mark is None else float(mark),
+                    iv=volatility(spread.stock, stored_iv), assignment_exposure=exposure,
+                    open_fees=float(spread.open_fees) if leg == 'short' else 0.0,
+                )
+
+        tickers = {leg['stock'] for leg in legs}
+        cached = get_cached_spot_prices(tickers - spot_overrides.keys())
+        spots, spot_sources, missing = {}, {}, []
+        for ticker in tickers:
+            if ticker in spot_overrides:
+                spots[ticker], spot_sources[ticker] = spot_overrides[ticker], 'request'
+            elif ticker in cached:
+                spots[ticker], spot_sources[ticker] = cached[ticker], 'quote'
+            elif ticker in latest_entry:
+                spots[ticker], spot_sources[ticker] = latest_entry[ticker][1], 'entry_price'
+            else:
+                missing.append(ticker)
+
+        book = cls([leg for leg in legs if leg['stock'] in spots], spots, spot_sources, now=now)
+        book.missing_spot = sorted(missing)
+        return book
+
+    def greeks(self, rate):
+        """Per-share theoretical value and Greeks for every leg"""
+        return black_scholes(self.spot, self.strike, self.years, self.iv, self.is_call, rate)
+
+    def scenarios(self, moves, days, rate):
+        """
+        Revalue the book over a grid of underlying moves x days forward, per ticker.
+
+        Every underlying moves by the same fraction (-0.1 = down 10%), volatility
+        is held constant and legs age by `days` calendar days. Arrays are
+        broadcast as (move, day, leg) and priced a few moves at a time (at most
+        SCENARIO_CHUNK_CELLS cells), each chunk summed per ticker before the
+        next, so memory does not grow with the grid.
+        Returns {name: array of shape (moves, days, tickers)}:
+        - pl: change in the legs' dollar value against their value now
+        - assignment_exposure: collateral / max risk of short legs that have
+          expired in the money by that day
+        """
+        moves = np.asarray(moves, dtype=float)
+        days = np.asarray(days, dtype=float)[None, :, None]
+        years = np.maximum(self.years - days / 365, 0)
+        now = black_scholes(self.spot, self.strike, self.years, self.iv, self.is_call, rate)['price']
+
+        grid = {
+            name: np.zeros((len(moves), days.shape[1], len(self.tickers)))
+            for name in ('pl', 'assignment_exposure')
+        }
+        rows = max(SCENARIO_CHUNK_CELLS // max(days.size * len(self), 1), 1)
+        for start in range(0, len(moves), rows):
+            spot = self.spot * (1 + moves[start:start + rows, None, None])
+            price = black_scholes(spot, self.strike, years, self.iv, self.is_call, rate)['price']
+            in_the_money = np.where(self.is_call, spot > self.strike, spot < self.strike)
+            chunk = self.grid_by_ticker({
+                'pl': self.quantity * (price - now),
+                'assignment_exposure': np.where(in_the_money & (years <= 0), self.assignment_exposure, 0.0),
+            })
+            for name, array in chunk.items():
+                grid[name][start:start + rows] = array
+        return grid
+
+    def by_ticker(self, values):
+        """Sum per-leg arrays per ticker: {name: array aligned with self.tickers}"""
+        return {
+            name: np.bincount(self.ticker_index, weights=array, minlength=len(self.tickers))
+            for name, array in values.items()
+        }
+
+    def grid_by_ticker(self, values):
+        """Sum (..., legs) arrays per ticker: {name: array of shape (..., tickers)}"""
+        membership = np.zeros((len(self), len(self.tickers)))
+        membership[np.arange(len(self)), self.ticker_index] = 1
+        return {name: array @ membership for name, array in values.items()}
+
+
+def update_implied_volatilities(user, spot_overrides=None, rate=DEFAULT_RISK_FREE_RATE):
+    """
+    Solve the implied volatility of every open leg from its stored mark and
+    save it next to the quote. Only legs whose spot came from the request or a
+    cached quote are solved; a leg priced off its entry price keeps its stored
+    value. Legs without a mark or without a solution (e.g. a mark below
+    intrinsic value), and legs on tickers with no spot at all, are cleared
+    rather than left stale. Returns (solved, unsolved) leg counts.
+    """
+    book = OptionBook.for_user(user, spot_overrides)
+    solved = implied_volatility(book.mark, book.spot, book.strike, book.years, book.is_call, rate)
+
+    positions, spreads = {}, {}
+    count = unsolved = 0
+    for leg, iv in zip(book.legs, solved.tolist()):
+        if book.spot_sources[leg['stock']] not in ('request', 'quote'):
+            unsolved += 1
+            continue
+        if np.isnan(iv):
+            value = None
+            unsolved += 1
+        else:
+            value = Decimal(f'{iv:.4f}')
+            count += 1
+        if leg['source'] == 'position':
+            positions[leg['source_id']] = value
+        else:
+            spreads.setdefault(leg['source_id'], {})[leg['leg']] = value
+
+    Position.objects.bulk_update(
+        [Position(id=id, implied_volatility=iv) for id, iv in positions.items()],
+        ['implied_volatility'], batch_size=1000,
+    )
+    # Both legs of a spread share its ticker, so both are solved or neither is
+    CreditSpread.objects.bulk_update(
+        [
+            CreditSpread(id=id, short_implied_volatility=ivs.get('short'), long_implied_volatility=ivs.get('long'))
+            for id, ivs in spreads.items()
+        ],
+        ['short_implied_volatility', 'long_implied_volatility'], batch_size=1000,
+    )
+    if book.missing_spot:
+        unsolved += Position.objects.filter(
+            user=user, close_date__isnull=True, stock__in=book.missing_spot,
+        ).update(implied_volatility=None)
+        unsolved += 2 * CreditSpread.objects.filter(
+            user=user, close_date__isnull=True, stock__in=book.missing_spot,
+        ).update(short_implied_volatility=None, long_implied_volatility=None)
+    return count, unsolved
+
+
+def outcome_probabilities(book, paths, seed, rate=DEFAULT_RISK_FREE_RATE):
+    """
+    Monte Carlo POP, probability of touch, expected P/L and tail loss for every
+    open credit spread and short put in the book (covered calls are skipped).
+
+    Per-share results are cached per (ticker, expiration, strikes, credit, IV,
+    spot, as-of date, paths, seed), so reloading the dashboard doesn't rerun
+    simulations. Returns (trades, cache hits), with dollar amounts for the
+    whole trade.
+    """
+    from Dashboard.monte_carlo import simulate_trades, trade_seed
+
+    grouped = {}
+    for i, leg in enumerate(book.legs):
+        if leg['source'] == 'position' and leg['is_call']:
+            continue
+        grouped.setdefault((leg['source'], leg['source_id']), []).append(i)
+
+    as_of = clock.as_of_key()
+    trades = []
+    for (source, source_id), indexes in grouped.items():
+        short = next(i for i in indexes if book.quantity[i] < 0)
+        first = book.legs[short]
+        shares = 100 * first['contracts']
+        strikes = [book.strike[i].item() for i in indexes]
+        credit = -sum(book.quantity[i] * book.premium[i] for i in indexes) / shares - first['open_fees'] / shares
+        key = ':'.join(str(part) for part in (
+            'montecarlo', first['stock'], first['expiration'], 'C' if first['is_call'] else 'P',
+            '/'.join(f'{strike:g}' for strike in strikes), f'{credit:.4f}', f'{book.iv[short]:.4f}',
+            f'{book.spot[short]:.2f}', as_of, paths, seed,
+        ))
+        trades.append({
+            'source': source, 'id': source_id, 'stock': first['stock'], 'expiration': first['expiration'],
+            'type': 'C' if first['is_call'] else 'P', 'strikes': strikes, 'contracts': first['contracts'],
+            'spot': book.spot[short].item(), 'iv': book.iv[short].item(), 'shares': shares, 'key': key,
+            'simulation': {
+                'spot': book.spot[short].item(), 'years': book.years[short].item(),
+                'volatility': book.iv[short].item(), 'rate': rate, 'credit': credit,
+                'legs': [
+                    (book.strike[i].item(), bool(book.is_call[i]), book.quantity[i].item() / shares)
+                    for i in indexes
+                ],
+                'touch_strike': book.strike[short].item(), 'touch_below': not first['is_call'],
+                'paths': paths, 'seed': trade_seed(seed, key),
+            },
+        })
+
+    cached = cache.get_many([trade['key'] for trade in trades])
+    missing = [trade for trade in trades if trade['key'] not in cached]
+    workers = settings.MONTE_CARLO_WORKERS if len(missing) >= MONTE_CARLO_POOL_MIN_TRADES else 0
+    simulated = simulate_trades([trade['simulation'] for trade in missing], workers=workers)
+    results = {**cached, **{trade['key']: result for trade, result in zip(missing, simulated)}}
+    cache.set_many(
+        {trade['key']: results[trade['key']] for trade in missing}, MONTE_CARLO_CACHE_TIMEOUT
+    )
+
+    for trade in trades:
+        result = results[trade.pop('key')]
+        shares = trade.pop('shares')
+        trade.pop('simulation')
+        trade.update(
+            pop=round(result['pop'], 4),
+            prob_touch=round(result['prob_touch'], 4),
+            expected_pl=round(result['expected_pl'] * shares, 2),
+            tail_loss=round(result['tail_loss'] * shares, 2),
+        )
+    return trades, len(cached)
@@ -0,0 +1,180 @@
+"""
+Local daily closing prices per underlying, as append-only memory-mapped files.
+
+Each ticker is one <TICKER>.prices file of fixed-size (day, close) records in
+day order, where day is the number of days since 1970-01-01. Closes are only
+ever appended, so a file can be mapped while it grows. index.json records
+each ticker's first and last date and row count.
+
+Reads map the file instead of loading it: slices are views of the page cache
+(zero-copy), and a store keeps its maps open until the file grows, so a
+lookup is a binary search over memory with no network access. There is one
+writer at a time (`manage.py load_price_history`).
+
+This module imports NumPy at the top, so import it inside the code path that
+needs it rather than at module level (see `manage.py importtime`).
+"""
+import json
+import os
+import re
+from datetime import date, timedelta
+from functools import lru_cache
+import numpy as np
+from django.conf import settings
+
+RECORD_DTYPE = np.dtype([('day', '<i4'), ('close', '<f8')])
+
+INDEX_FILE = 'index.json'
+EXTENSION = '.prices'
+
+# Tickers become file names, so anything else (e.g. "../") is rejected
+TICKER_PATTERN = re.compile(r'^[A-Z0-9.\-^]{1,10}$')
+
+_EPOCH = date(1970, 1, 1)
+
+
+def to_day(value):
+    return (value - _EPOCH).days
+
+
+def to_date(day):
+    return _EPOCH + timedelta(days=int(day))
+
+
+class PriceHistoryStore:
+    """Directory of <TICKER>.prices files (settings.PRICE_HISTORY_DIR by default)"""
+
+    def __init__(self, root=None):
+        self.root = str(root or settings.PRICE_HISTORY_DIR)
+        self._maps = {}  # ticker: (rows, (days, closes))
+
+    def path(self, ticker):
+        """File of the ticker's closes; raises ValueError for anything that isn't a ticker symbol"""
+        ticker = ticker.upper()
+        if not TICKER_PATTERN.fullmatch(ticker):
+            raise ValueError(f'Invalid ticker: {ticker!r}')
+        return os.path.join(self.root, f'{ticker}{EXTENSION}')
+
+    def tickers(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name[:-len(EXTENSION)] for name in os.listdir(self.root) if name.endswith(EXTENSION))
+
+    def index(self):
+        """{ticker: {'first': 'YYYY-MM-DD', 'last': 'YYYY-MM-DD', 'rows': n}}"""
+        try:
+            with open(os.path.join(self.root, INDEX_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_index(self, index):
+        path = os.path.join(self.root, INDEX_FILE)
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        os.replace(f'{path}.tmp', path)
+
+    def _columns(self, ticker):
+        """(days, closes) views of the ticker's mapped file, reopened only when it has grown"""
+        ticker = ticker.upper()
+        path = self.path(ticker)
+        # Only whole records: a concurrent append may be part-way through one
+        rows = os.path.getsize(path) // RECORD_DTYPE.itemsize
+        cached = self._maps.get(ticker)
+        if cached and cached[0] == rows:
+            return cached[1]
+        records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', shape=(rows,)) if rows else \
+            np.empty(0, dtype=RECORD_DTYPE)
+        # Plain ndarray views: slicing a memmap subclass is several times slower
+        columns = records['day'].view(np.ndarray), records['close'].view(np.ndarray)
+        self._maps[ticker] = (rows, columns)
+        return columns
+
+    def series(self, ticker, start=None, end=None):
+        """
+        (days, closes) between start and end dates inclusive, as read-only views
+        of the mapped file; raises FileNotFoundError for an unknown ticker and
+        ValueError for an invalid one
+        """
+        days, closes = self._columns(ticker)
+        lo = 0 if start is None else np.searchsorted(days, to_day(start), side='left')
+        hi = len(days) if end is None else np.searchsorted(days, to_day(end), side='right')
+        return days[lo:hi], closes[lo:hi]
+
+    def close_on(self, ticker, day):
+        """Last close on or before the date, or None"""
+        try:
+            days, closes = self._columns(ticker)
+        except (FileNotFoundError, ValueError):
+            return None
+        i = np.searchsorted(days, to_day(day), side='right')
+        return float(closes[i - 1]) if i else None
+
+    def closes_on(self, tickers, day):
+        """{ticker: last close on or before the date} for the tickers that have one"""
+        closes = {ticker: self.close_on(ticker, day) for ticker in tickers}
+        return {ticker: close for ticker, close in closes.items() if close is not None}
+
+    def append(self, ticker, days, closes):
+        """
+        Append closes after the ticker's last stored day. Earlier or duplicate
+        days are skipped (within the batch the last value for a day wins).
+        Returns the number of rows appended.
+        """
+        ticker = ticker.upper()
+        days = np.asarray(days, dtype='<i4')
+        closes = np.asarray(closes, dtype='<f8')
+        order = np.argsort(days, kind='stable')
+        days, closes = days[order], closes[order]
+
+        try:
+            existing, _ = self._columns(ticker)
+        except FileNotFoundError:
+            existing = np.empty(0, dtype='<i4')
+        last_day = existing[-1] if len(existing) else np.iinfo('<i4').min
+        keep = np.append(days[1:] != days[:-1], True) & (days > last_day) & ~np.isnan(closes)
+        if not keep.any():
+            return 0
+
+        records = np.empty(int(keep.sum()), dtype=RECORD_DTYPE)
+        records['day'] = days[keep]
+        records['close'] = closes[keep]
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.path(ticker), 'ab') as f:
+            records.tofile(f)
+
+        index = self.index()
+        first_day = existing[0] if len(existing) else records['day'][0]
+        index[ticker] = {
+            'first': to_date(first_day).isoformat(),
+            'last': to_date(records['day'][-1]).isoformat(),
+            'rows': len(existing) + len(records),
+        }
+        self._write_index(index)
+        return len(records)
+
+    def write(self, ticker, days, closes):
+        """Replace the ticker's whole history"""
+        self.delete(ticker)
+        return self.append(ticker, days, closes)
+
+    def delete(self, ticker):
+        ticker = ticker.upper()
+        self._maps.pop(ticker, None)
+        try:
+            os.remove(self.path(ticker))
+        except FileNotFoundError:
+            pass
+        index = self.index()
+        if index.pop(ticker, None) is not None:
+            self._write_index(index)
+
+
+def get_store(root=None):
+    """Shared store per directory, so its maps stay open across requests"""
+    return _shared_store(str(root or settings.PRICE_HISTORY_DIR))
+
+
+@lru_cache(maxsize=None)
+def _shared_store(root):
+    return PriceHistoryStore(root)
@@ -0,0 +1,205 @@
+"""
+Vectorized Black-Scholes pricing for European options.
+
+Every function takes NumPy arrays (or scalars that broadcast against them) of
+per-share inputs, so a whole book is priced in one call. Times are in years;
+volatility and rates are annualised decimals (0.30 = 30%).
+
+This module imports NumPy at the top, so import it inside the code path that
+needs it rather than at module level (see `manage.py importtime`).
+"""
+import numpy as np
+
+# Used when neither the request nor a stored quote supplies a value
+DEFAULT_RISK_FREE_RATE = 0.045
+DEFAULT_VOLATILITY = 0.30
+
+SECONDS_PER_YEAR = 365 * 24 * 60 * 60
+
+# Abramowitz & Stegun 7.1.26 coefficients for erf (absolute error < 1.5e-7)
+_ERF_P = 0.3275911
+_ERF_A = (0.254829592, -0.284496736, 1.421413741, -1.453152027, 1.061405429)
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * x * x) / np.sqrt(2 * np.pi)
+
+
+def norm_cdf(x):
+    """Standard normal CDF, vectorized (NumPy has no erf)"""
+    z = np.abs(x) / np.sqrt(2)
+    t = 1 / (1 + _ERF_P * z)
+    a1, a2, a3, a4, a5 = _ERF_A
+    erf = 1 - (((((a5 * t + a4) * t) + a3) * t + a2) * t + a1) * t * np.exp(-z * z)
+    return 0.5 * (1 + np.sign(x) * erf)
+
+
+# Acklam's rational approximation of the inverse normal CDF (relative error < 1.2e-9)
+_PPF_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+          1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_PPF_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+          6.680131188771972e+01, -1.328068155288572e+01)
+_PPF_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+          -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_PPF_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00, 3.754408661907416e+00)
+_PPF_LOW = 0.02425
+
+
+def _polyval(coefficients, x):
+    result = np.zeros_like(x)
+    for c in coefficients:
+        result = result * x + c
+    return result
+
+
+def norm_ppf(p):
+    """Inverse of norm_cdf, vectorized; p must be in (0, 1)"""
+    p = np.asarray(p, dtype=float)
+    # Central region, then the two tails by symmetry
+    q = p - 0.5
+    r = q * q
+    central = q * _polyval(_PPF_A, r) / (_polyval(_PPF_B, r) * r + 1)
+    tail_p = np.minimum(p, 1 - p)
+    t = np.sqrt(-2 * np.log(np.where(tail_p > 0, tail_p, 1e-300)))
+    tail = _polyval(_PPF_C, t) / (_polyval(_PPF_D, t) * t + 1)
+    return np.where(tail_p < _PPF_LOW, np.where(p < 0.5, tail, -tail), central)
+
+
+def strike_for_delta(spot, years, volatility, delta, is_call, rate=DEFAULT_RISK_FREE_RATE):
+    """
+    Strike at which an option has the given absolute delta (0.30 = a 30-delta
+    put or call), vectorized. Inverts the Black-Scholes delta in closed form.
+    """
+    spot, years, volatility, delta, is_call = np.broadcast_arrays(
+        np.asarray(spot, dtype=float), np.asarray(years, dtype=float),
+        np.asarray(volatility, dtype=float), np.asarray(delta, dtype=float),
+        np.asarray(is_call, dtype=bool),
+    )
+    d1 = np.where(is_call, norm_ppf(delta), norm_ppf(1 - delta))
+    vol_sqrt_t = volatility * np.sqrt(years)
+    return spot * np.exp((rate + 0.5 * volatility ** 2) * years - d1 * vol_sqrt_t)
+
+
+def _d1_d2(spot, strike, years, volatility, rate):
+    sqrt_t = np.sqrt(years)
+    vol_sqrt_t = volatility * sqrt_t
+    d1 = (np.log(spot / strike) + (rate + 0.5 * volatility ** 2) * years) / vol_sqrt_t
+    return d1, d1 - vol_sqrt_t, sqrt_t
+
+
+def black_scholes(spot, strike, years, volatility, is_call, rate=DEFAULT_RISK_FREE_RATE):
+    """
+    Theoretical value and Greeks per share.
+
+    Returns a dict of arrays:
+    - price
+    - delta (per $1 move in the underlying)
+    - gamma (change in delta per $1 move)
+    - theta (value change per calendar day)
+    - vega (value change per 1 volatility point, i.e. 0.01)
+
+    Expired legs (years <= 0) and legs without volatility are worth their
+    intrinsic value, with a step delta and zero gamma, theta and vega.
+    """
+    spot, strike, years, volatility, is_call = np.broadcast_arrays(
+        np.asarray(spot, dtype=float), np.asarray(strike, dtype=float),
+        np.asarray(years, dtype=float), np.asarray(volatility, dtype=float),
+        np.asarray(is_call, dtype=bool),
+    )
+    live = (years > 0) & (volatility > 0)
+    # Placeholders keep the math finite for dead legs; their results are replaced below
+    t = np.where(live, years, 1.0)
+    vol = np.where(live, volatility, 1.0)
+
+    d1, d2, sqrt_t = _d1_d2(spot, strike, t, vol, rate)
+    discount = np.exp(-rate * t)
+    cdf_d1, cdf_d2 = norm_cdf(d1), norm_cdf(d2)
+    pdf_d1 = norm_pdf(d1)
+
+    call_price = spot * cdf_d1 - strike * discount * cdf_d2
+    put_price = call_price - spot + strike * discount  # Put-call parity
+    price = np.where(is_call, call_price, put_price)
+    delta = np.where(is_call, cdf_d1, cdf_d1 - 1)
+    gamma = pdf_d1 / (spot * vol * sqrt_t)
+    vega = spot * pdf_d1 * sqrt_t / 100
+    decay = -spot * pdf_d1 * vol / (2 * sqrt_t)
+    theta = np.where(
+        is_call,
+        decay - rate * strike * discount * cdf_d2,
+        decay + rate * strike * discount * norm_cdf(-d2),
+    ) / 365
+
+    intrinsic = np.where(is_call, np.maximum(spot - strike, 0), np.maximum(strike - spot, 0))
+    in_the_money = np.where(is_call, spot > strike, spot < strike)
+    return {
+        'price': np.where(live, price, intrinsic),
+        'delta': np.where(live, delta, np.where(in_the_money, np.where(is_call, 1.0, -1.0), 0.0)),
+        'gamma': np.where(live, gamma, 0.0),
+        'theta': np.where(live, theta, 0.0),
+        'vega': np.where(live, vega, 0.0),
+    }
+
+
+# Implied volatility search bracket and stopping rules
+IV_LOWER_BOUND = 1e-4
+IV_UPPER_BOUND = 5.0
+IV_TOLERANCE = 1e-6  # Price error per share
+IV_MAX_ITERATIONS = 50
+
+
+def implied_volatility(price, spot, strike, years, is_call, rate=DEFAULT_RISK_FREE_RATE,
+                       tol=IV_TOLERANCE, max_iter=IV_MAX_ITERATIONS):
+    """
+    Volatility that reprices each option to `price`, vectorized.
+
+    Safeguarded Newton: every element keeps a bracket [lo, hi] that contains
+    the root (price is increasing in volatility), and falls back to bisection
+    whenever a Newton step would leave it or vega is too small to trust.
+    Elements stop iterating as they converge.
+
+    Returns NaN where there is no solution: missing price, expired option,
+    or a price outside the no-arbitrage bounds.
+    """
+    price, spot, strike, years, is_call = np.broadcast_arrays(
+        np.asarray(price, dtype=float), np.asarray(spot, dtype=float),
+        np.asarray(strike, dtype=float), np.asarray(years, dtype=float),
+        np.asarray(is_call, dtype=bool),
+    )
+    discount = np.exp(-rate * np.where(years > 0, years, 0))
+    lower = np.where(is_call, np.maximum(spot - strike * discount, 0), np.maximum(strike * discount - spot, 0))
+    upper = np.where(is_call, spot, strike * discount)
+    solvable = np.isfinite(price) & (years > 0) & (price > lower) & (price < upper)
+
+    result = np.full(price.shape, np.nan)
+    index = np.flatnonzero(solvable)
+    if not len(index):
+        return result
+
+    target, s, k, t, call = (a.ravel()[index] for a in (price, spot, strike, years, is_call))
+    lo = np.full(len(index), IV_LOWER_BOUND)
+    hi = np.full(len(index), IV_UPPER_BOUND)
+    # Brenner-Subrahmanyam at-the-money approximation as the starting point
+    vol = np.clip(np.sqrt(2 * np.pi / t) * target / s, lo, hi)
+
+    active = np.arange(len(index))
+    for _ in range(max_iter):
+        values = black_scholes(s[active], k[active], t[active], vol[active], call[active], rate)
+        error = values['price'] - target[active]
+        done = np.abs(error) < tol
+        # Keep the bracket around the root
+        hi[active] = np.where(error > 0, vol[active], hi[active])
+        lo[active] = np.where(error < 0, vol[active], lo[active])
+
+        vega = values['vega'] * 100
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            newton = vol[active] - error / vega
+        inside = (vega > 1e-8) & (newton > lo[active]) & (newton < hi[active])
+        stepped = np.where(inside, newton, 0.5 * (lo[active] + hi[active]))
+        vol[active] = np.where(done, vol[active], stepped)
+
+        active = active[~done & (hi[active] - lo[active] > 1e-10)]
+        if not len(active):
+            break
+
+    result.ravel()[index] = vol
+    return result
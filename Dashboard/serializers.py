@@ -1,10 +1,19 @@
 from rest_framework import serializers
-from .models import Position, Feedback, Notification
+from .models import Position, Feedback, Notification, ShareLot
 from decimal import Decimal
 from django.contrib.auth.models import User
+from WheelTracker.instrumentation import TimedRepresentationMixin
+from Dashboard.utils import prefetch_wheel_cycles
 
 
-class PositionSerializer(serializers.ModelSerializer):
+class PositionListSerializer(serializers.ListSerializer):
+    """Resolves wheel cycles for the whole page at once"""
+
+    def to_representation(self, data):
+        return super().to_representation(prefetch_wheel_cycles(data.all() if hasattr(data, 'all') else data))
+
+
+class PositionSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """Serializer for Position model with calculated fields"""
 
     # Wheel cycle fields
@@ -36,6 +45,7 @@ class PositionSerializer(serializers.ModelSerializer):
     is_open = serializers.BooleanField(read_only=True)
     days_in_trade = serializers.IntegerField(read_only=True)
     days_to_expiration = serializers.IntegerField(read_only=True)
+    trading_days_to_expiration = serializers.IntegerField(read_only=True)
     days_open_to_expiration = serializers.IntegerField(read_only=True)
     collateral_requirement = serializers.DecimalField(
         max_digits=10, decimal_places=3, read_only=True
@@ -66,12 +76,14 @@ class PositionSerializer(serializers.ModelSerializer):
             'close_fees',
             'notes',
             'entry_price',
+            'implied_volatility',
             'created_at',
             'updated_at',
             # Calculated fields
             'is_open',
             'days_in_trade',
             'days_to_expiration',
+            'trading_days_to_expiration',
             'days_open_to_expiration',
             'profit_loss',
             'collateral_requirement',
@@ -83,7 +95,8 @@ class PositionSerializer(serializers.ModelSerializer):
             'set_break_even_price_puts',
             'roi_percentage',
         ]
-        read_only_fields = ['created_at', 'updated_at']
+        read_only_fields = ['implied_volatility', 'created_at', 'updated_at']
+        list_serializer_class = PositionListSerializer
 
     def validate(self, data):
         """Validate position data"""
@@ -122,6 +135,50 @@ class PositionSummarySerializer(serializers.Serializer):
     stocks_traded = serializers.ListField(child=serializers.CharField())
 
 
+class WheelCycleSerializer(serializers.Serializer):
+    """Serializer for wheel cycle totals (see Dashboard.utils.wheel_cycles)"""
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    stock = serializers.CharField()
+    position_ids = serializers.ListField(child=serializers.IntegerField())
+    start_date = serializers.DateField()
+    end_date = serializers.DateField(allow_null=True)
+    days_in_cycle = serializers.IntegerField()
+    is_open = serializers.BooleanField()
+    is_complete = serializers.BooleanField()
+    premium_collected = serializers.DecimalField(max_digits=12, decimal_places=2)
+    option_pl = serializers.DecimalField(max_digits=12, decimal_places=2)
+    stock_pl = serializers.DecimalField(max_digits=12, decimal_places=2)
+    net_pl = serializers.DecimalField(max_digits=12, decimal_places=2)
+    shares_held = serializers.IntegerField()
+    break_even = serializers.DecimalField(max_digits=12, decimal_places=4, allow_null=True)
+    ar_of_cycle = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+
+
+class ShareLotSerializer(serializers.ModelSerializer):
+    """Serializer for ShareLot model (maintained by Dashboard.ledger, read-only)"""
+    is_open = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = ShareLot
+        fields = [
+            'id',
+            'stock',
+            'shares',
+            'cost_per_share',
+            'premium_collected',
+            'adjusted_cost_basis',
+            'acquired_on',
+            'opened_by',
+            'is_open',
+            'sold_on',
+            'sale_price',
+            'closed_by',
+            'realized_pl',
+        ]
+        read_only_fields = fields
+
+
 class FeedbackSerializer(serializers.ModelSerializer):
     """Serializer for Feedback model"""
     username = serializers.CharField(source='user.username', read_only=True)
@@ -153,10 +210,10 @@ class FeedbackSerializer(serializers.ModelSerializer):
         return data
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """Serializer for Notification model"""
 
-    username = serializers.CharField(source='user.username', read_only=True)
+    username = serializers.CharField(source='user.username', read_only=True, allow_null=True)
     created_by_username = serializers.CharField(source='created_by.username', read_only=True, allow_null=True)
 
     class Meta:
@@ -176,6 +233,15 @@ class NotificationSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'read_at', 'created_by']
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if instance.user_id is None:
+            # Broadcast: read state comes from the requesting user's receipt
+            read_at = getattr(instance, 'broadcast_read_at', None)
+            data['is_read'] = read_at is not None
+            data['read_at'] = self.fields['read_at'].to_representation(read_at) if read_at else None
+        return data
+
 
 class NotificationCreateSerializer(serializers.Serializer):
     """Serializer for creating notifications"""
@@ -193,9 +259,11 @@ class NotificationCreateSerializer(serializers.Serializer):
     message = serializers.CharField()
 
     def validate_user_ids(self, value):
-        """Validate that all user IDs exist"""
-        if value:
-            existing_users = User.objects.filter(id__in=value).count()
-            if existing_users != len(value):
-                raise serializers.ValidationError("Some user IDs do not exist")
-        return value
+        """Validate that all user IDs exist (duplicates are dropped)"""
+        user_ids = list(dict.fromkeys(value))
+        if user_ids:
+            existing_ids = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+            missing_ids = set(user_ids) - existing_ids
+            if missing_ids:
+                raise serializers.ValidationError(f"Some user IDs do not exist: {sorted(missing_ids)}")
+        return user_ids
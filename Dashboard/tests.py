@@ -1,3 +1,1025 @@
-from django.test import TestCase
+import logging
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from CreditSpread.models import CreditSpread
+from Dashboard.models import Position, ShareLot
+from Dashboard.price_history import PriceHistoryStore, to_day
+from Dashboard.utils import auto_close_expired_positions
+from WheelTracker.testing import EndpointPerformanceMixin
 
-# Create your tests here.
+# Per-request log lines would drown the test output
+logging.getLogger('WheelTracker.instrumentation').setLevel(logging.WARNING)
+
+# All tests run as of this session, so open/expired positions are deterministic
+AS_OF = '2025-06-02T12:00'
+AS_OF_DATE = date(2025, 6, 2)
+
+STOCKS = ['AAPL', 'MSFT', 'AMD', 'TSLA', 'NVDA', 'SOFI', 'PLTR', 'F', 'KO', 'INTC']
+
+# One wheel cycle, oldest first: (type, assigned, days before AS_OF opened, days held, close price)
+# a put rolled once, assigned put, covered call expired worthless, covered call called away
+WHEEL_CYCLE = [
+    ('P', 'No', 200, 30, Decimal('0.40')),
+    ('P', 'Yes', 165, 30, Decimal('0.00')),
+    ('C', 'No', 130, 30, Decimal('0.00')),
+    ('C', 'Yes', 95, 30, Decimal('0.00')),
+    ('P', 'No', 60, 30, Decimal('0.85')),
+]
+
+
+def seed_wheel_portfolio(user, size):
+    """
+    Create `size` positions for the user as linked wheel cycles.
+    The last position of every cycle is still open (expires after AS_OF).
+    """
+    cycles = max(1, size // len(WHEEL_CYCLE))
+    previous = [None] * cycles
+    created = 0
+    for step, (option_type, assigned, opened, held, close_price) in enumerate(WHEEL_CYCLE):
+        is_last = step == len(WHEEL_CYCLE) - 1
+        batch = []
+        for cycle in range(cycles):
+            if created + len(batch) >= size:
+                break
+            open_date = AS_OF_DATE - timedelta(days=opened + cycle % 20)
+            expiration = AS_OF_DATE + timedelta(days=10 + cycle % 30) if is_last else open_date + timedelta(days=held)
+            strike = Decimal(50 + cycle % 100)
+            batch.append(Position(
+                user=user,
+                stock=STOCKS[cycle % len(STOCKS)],
+                wheel_cycle_name=f'Cycle {cycle}',
+                related_to=previous[cycle],
+                open_date=open_date,
+                expiration=expiration,
+                type=option_type,
+                num_contracts=1 + cycle % 3,
+                strike=strike,
+                premium=Decimal('1.25') + Decimal(cycle % 7) / 10,
+                open_fees=Decimal('0.65'),
+                close_date=None if is_last else expiration,
+                assigned=assigned,
+                premium_paid_to_close=None if is_last else close_price,
+                close_fees=None if is_last else Decimal('0.65'),
+                current_option_price=Decimal('0.50') if is_last else None,
+            ))
+        previous[:len(batch)] = Position.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+class PositionEndpointPerformanceMixin(EndpointPerformanceMixin):
+    """Query-count and wall-time bounds for the position endpoints"""
+    UNIT = 'positions'
+    seed = staticmethod(seed_wheel_portfolio)
+
+    # Max queries per request, independent of portfolio size
+    # list: expiry job (2), count, page, wheel-cycle links, rest of the cycles
+    MAX_QUERIES = {
+        'list': 6,
+        'summary': 6,
+        'roi_summary': 1,
+        'by_stock': 1,
+        'by_stock_filtered': 2,
+        'cycles': 1,
+    }
+
+    def test_list(self):
+        response = self.assert_bounds('/api/positions/', 'list', per_thousand=0.1)
+        self.assertEqual(response.data['count'], self.seeded)
+
+    def test_summary(self):
+        response = self.assert_bounds('/api/positions/summary/', 'summary', per_thousand=0.5)
+        self.assertEqual(response.data['total_positions'], self.seeded)
+
+    def test_roi_summary(self):
+        self.assert_bounds('/api/positions/roi_summary/', 'roi_summary', per_thousand=0.5)
+
+    def test_by_stock(self):
+        self.assert_bounds('/api/positions/by_stock/', 'by_stock', per_thousand=0.1)
+
+    def test_by_stock_filtered(self):
+        self.assert_bounds('/api/positions/by_stock/?stock=kO', 'by_stock_filtered', per_thousand=1.0)
+
+    def test_cycles(self):
+        response = self.assert_bounds('/api/positions/cycles/', 'cycles', per_thousand=0.5)
+        self.assertEqual(sum(len(cycle['position_ids']) for cycle in response.data), self.seeded)
+        cycle = response.data[0]
+        legs = Position.objects.filter(id__in=cycle['position_ids'])
+        self.assertEqual(cycle['is_complete'], legs[0].is_wheel_complete)
+        self.assertEqual(Decimal(cycle['option_pl']),
+                         sum(leg.profit_loss for leg in legs if leg.profit_loss is not None).quantize(Decimal('0.01')))
+
+    def test_wheel_cycle_fields(self):
+        response = self.client.get('/api/positions/')
+        by_id = {row['id']: row for row in response.data['results']}
+        for position in Position.objects.filter(id__in=by_id)[:20]:
+            self.assertEqual(by_id[position.id]['wheel_cycle_number'], position.wheel_cycle_number)
+            self.assertEqual(by_id[position.id]['is_wheel_complete'], position.is_wheel_complete)
+
+
+@override_settings(CLOCK_AS_OF=AS_OF)
+class PositionEndpointPerformance10Tests(PositionEndpointPerformanceMixin, TestCase):
+    SIZE = 10
+
+
+@override_settings(CLOCK_AS_OF=AS_OF)
+class PositionEndpointPerformance1kTests(PositionEndpointPerformanceMixin, TestCase):
+    SIZE = 1000
+
+
+@override_settings(CLOCK_AS_OF=AS_OF)
+class PositionEndpointPerformance10kTests(PositionEndpointPerformanceMixin, TestCase):
+    SIZE = 10000
+
+
+class ExpiryAssignmentTests(TestCase):
+    """auto_close_expired_positions settles expired legs against the underlying's close"""
+    EXPIRATION = date(2025, 6, 6)
+    CLOSE = 95.0
+
+    def setUp(self):
+        self.user = User.objects.create_user('expiry', password='expiry')
+        self.addCleanup(cache.clear)
+        prices = tempfile.TemporaryDirectory()
+        self.addCleanup(prices.cleanup)
+        self.prices_dir = prices.name
+        PriceHistoryStore(self.prices_dir).append('AAPL', [to_day(self.EXPIRATION)], [self.CLOSE])
+        # Nothing else has a local close; keep the tests off the network
+        patcher = mock.patch('Dashboard.market_data.fetch_closes', return_value={})
+        self.fetch_closes = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def expire(self, as_of='2025-06-09T12:00'):
+        with override_settings(CLOCK_AS_OF=as_of, PRICE_HISTORY_DIR=self.prices_dir):
+            return auto_close_expired_positions()
+
+    def position(self, option_type, strike, stock='AAPL'):
+        return Position.objects.create(
+            user=self.user, stock=stock, open_date=self.EXPIRATION - timedelta(days=30),
+            expiration=self.EXPIRATION, type=option_type, num_contracts=1, strike=Decimal(strike),
+            premium=Decimal('2.00'), open_fees=Decimal('0.65'),
+        )
+
+    def test_in_the_money_legs_are_assigned(self):
+        put_itm, put_otm, call_itm = self.position('P', 100), self.position('P', 90), self.position('C', 90)
+        result = self.expire()
+        self.assertEqual(result['closed'], 3)
+        self.assertEqual(result['assigned'], 2)
+        for position, assigned in ((put_itm, 'Yes'), (put_otm, 'No'), (call_itm, 'Yes')):
+            position.refresh_from_db()
+            self.assertEqual(position.close_date, self.EXPIRATION)
+            self.assertEqual(position.premium_paid_to_close, Decimal('0.00'))
+            self.assertEqual(position.assigned, assigned)
+        self.assertEqual(put_itm.set_break_even_price_puts, Decimal('98.0065'))
+
+    def test_spreads_settle_at_intrinsic_value(self):
+        spread = CreditSpread.objects.create(
+            user=self.user, stock='AAPL', open_date=self.EXPIRATION - timedelta(days=30),
+            expiration=self.EXPIRATION, type='BPS', short_strike=Decimal('100'), long_strike=Decimal('97'),
+            short_premium=Decimal('1.50'), long_premium=Decimal('0.70'), num_contracts=2,
+            open_fees=Decimal('2.60'),
+        )
+        self.assertEqual(self.expire()['spreads_closed'], 1)
+        spread.refresh_from_db()
+        self.assertEqual((spread.short_close_premium, spread.long_close_premium), (Decimal('5.00'), Decimal('2.00')))
+        self.assertEqual(spread.profit_loss, -spread.max_risk)
+
+    def test_missing_close_waits_then_expires_worthless(self):
+        position = self.position('P', 100, stock='MSFT')
+        self.assertEqual(self.expire(as_of='2025-06-07T12:00')['awaiting_price'], 1)
+        position.refresh_from_db()
+        self.assertIsNone(position.close_date)
+        # Requests never fetch closes; only the settle_expirations job does
+        self.fetch_closes.assert_not_called()
+
+        with self.assertLogs('Dashboard.utils', 'WARNING'):
+            self.assertEqual(self.expire()['closed'], 1)
+        position.refresh_from_db()
+        self.assertEqual((position.close_date, position.assigned), (self.EXPIRATION, 'No'))
+
+    def test_settle_job_fetches_missing_closes(self):
+        position = self.position('C', 90, stock='MSFT')
+        self.fetch_closes.return_value = {'MSFT': 95.0}
+        with override_settings(CLOCK_AS_OF='2025-06-06T17:00', PRICE_HISTORY_DIR=self.prices_dir):
+            call_command('settle_expirations', stdout=open(os.devnull, 'w'))
+        # Closes are fetched once per session for every ticker still missing one
+        self.fetch_closes.assert_called_once_with({'MSFT'}, self.EXPIRATION)
+        position.refresh_from_db()
+        self.assertEqual((position.close_date, position.assigned), (self.EXPIRATION, 'Yes'))
+
+    def test_extended_expiration_reopens_assigned_position(self):
+        position = self.position('P', 100)
+        self.expire()
+        Position.objects.filter(id=position.id).update(expiration=date(2025, 6, 20))
+        self.assertEqual(self.expire()['reopened'], 1)
+        position.refresh_from_db()
+        self.assertEqual((position.close_date, position.assigned), (None, 'No'))
+
+    def test_reopen_keeps_assignment_entered_by_hand(self):
+        position = self.position('P', 90)
+        Position.objects.filter(id=position.id).update(
+            close_date=self.EXPIRATION, premium_paid_to_close=Decimal('0.00'), close_fees=Decimal('0.00'),
+            assigned='Yes', expiration=date(2025, 6, 20),
+        )
+        self.assertEqual(self.expire()['reopened'], 1)
+        position.refresh_from_db()
+        self.assertEqual((position.close_date, position.assigned), (None, 'Yes'))
+
+
+@override_settings(CLOCK_AS_OF=AS_OF)
+class ShareLotLedgerTests(TestCase):
+    """Assignments open and close share lots as positions are saved through the API"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('lots', password='lots')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def leg(self, option_type, strike, close_date, assigned='No', paid='0.00', contracts=1, stock='AAPL'):
+        response = self.client.post('/api/positions/', {
+            'stock': stock, 'open_date': '2025-01-02', 'expiration': close_date, 'type': option_type,
+            'num_contracts': contracts, 'strike': strike, 'premium': '2.00', 'open_fees': '0.65',
+            'close_date': close_date, 'assigned': assigned, 'premium_paid_to_close': paid, 'close_fees': '0.00',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data['id']
+
+    def lots(self, **params):
+        response = self.client.get('/api/positions/share_lots/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_assignments_open_and_sell_lots(self):
+        self.leg('P', '100', '2025-02-21', assigned='Yes')
+        self.leg('C', '105', '2025-03-21', paid='0.50')
+        data = self.lots()
+        self.assertEqual(data['shares_held'], 100)
+        # $100 strike less (199.35 + 149.35) of premium over 100 shares
+        self.assertEqual(data['break_even'], Decimal('96.5130'))
+
+        self.leg('C', '103', '2025-04-17', assigned='Yes')
+        data = self.lots()
+        self.assertEqual(data['shares_held'], 0)
+        self.assertEqual(data['realized_pl'], Decimal('300') + Decimal('199.35') * 2 + Decimal('149.35'))
+
+    def test_partial_call_away_splits_the_lot(self):
+        self.leg('P', '50', '2025-02-21', assigned='Yes', contracts=2)
+        self.leg('C', '55', '2025-03-21', assigned='Yes')
+        held, sold = self.lots(open='true')['lots'], self.lots(open='false')['lots']
+        self.assertEqual([(lot['shares'], lot['premium_collected']) for lot in held], [(100, '199.675')])
+        self.assertEqual([(lot['shares'], lot['realized_pl']) for lot in sold], [(100, '899.025')])
+
+    def test_editing_or_deleting_a_posted_leg_replays_the_ticker(self):
+        put = self.leg('P', '100', '2025-02-21', assigned='Yes')
+        call = self.leg('C', '105', '2025-03-21', assigned='Yes')
+        self.client.patch(f'/api/positions/{call}/', {'assigned': 'No'}, format='json')
+        self.assertEqual(self.lots()['shares_held'], 100)
+
+        # Closed before the call: the call now covers these shares instead
+        self.leg('P', '90', '2025-01-17', assigned='Yes', stock='aapl')
+        lots = ShareLot.objects.filter(user=self.user)
+        self.assertEqual([(lot.cost_per_share, lot.premium_collected) for lot in lots],
+                         [(Decimal('90'), Decimal('398.700')), (Decimal('100'), Decimal('199.350'))])
+
+        self.client.delete(f'/api/positions/{put}/')
+        self.assertEqual(ShareLot.objects.filter(user=self.user).count(), 1)
+
+    def test_rebuild_backfills_wheel_cycles(self):
+        seed_wheel_portfolio(self.user, 50)
+        call_command('rebuild_share_lots', stdout=open(os.devnull, 'w'))
+        lots = ShareLot.objects.filter(user=self.user)
+        self.assertEqual(len(lots), 10)
+        for lot in lots:
+            # Same put and call strikes: the cycle's P/L is the premium of its three legs
+            legs = Position.objects.filter(id__in=lot.entries.values('position'))
+            self.assertEqual(len(legs), 3)
+            self.assertEqual(lot.realized_pl, sum(leg.profit_loss for leg in legs))
+
+    def test_cycle_totals_include_share_lots(self):
+        put = self.leg('P', '100', '2025-02-21', assigned='Yes')
+        call = self.leg('C', '103', '2025-04-17', assigned='Yes')
+        Position.objects.filter(id=call).update(related_to=put)
+        # A bad edit linking the put back to the call must not hang the grouping
+        Position.objects.filter(id=put).update(related_to=call)
+
+        cycles = self.client.get('/api/positions/cycles/').data
+        self.assertEqual(len(cycles), 1)
+        cycle = cycles[0]
+        self.assertEqual((cycle['position_ids'], cycle['is_complete'], cycle['days_in_cycle']), ([put, call], True, 105))
+        lot = ShareLot.objects.get(user=self.user)
+        self.assertEqual(Decimal(cycle['net_pl']), lot.realized_pl.quantize(Decimal('0.01')))
+        self.assertEqual(Decimal(cycle['stock_pl']), Decimal('300.00'))
+
+
+@override_settings(CLOCK_AS_OF=AS_OF)
+class WheelLinkTests(TestCase):
+    """Unlinked positions are linked into wheel cycles, and looping links are broken"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('links', password='links')
+
+    def leg(self, option_type, opened, closed, assigned='No', stock='AAPL', related_to=None):
+        return Position.objects.create(
+            user=self.user, stock=stock, open_date=date.fromisoformat(opened), expiration=date.fromisoformat(closed),
+            type=option_type, num_contracts=1, strike=Decimal('100'), premium=Decimal('2.00'),
+            close_date=date.fromisoformat(closed), assigned=assigned, premium_paid_to_close=Decimal('0.00'),
+            related_to=related_to,
+        )
+
+    def test_links_rolls_assignment_and_calls(self):
+        rolled = self.leg('P', '2024-12-16', '2025-01-17')
+        assigned = self.leg('P', '2025-01-21', '2025-02-21', assigned='Yes')
+        covered = self.leg('C', '2025-02-24', '2025-03-21')
+        other = self.leg('C', '2025-02-24', '2025-03-21', stock='MSFT')
+        called_away = self.leg('C', '2025-03-24', '2025-04-17', assigned='Yes')
+        next_cycle = self.leg('P', '2025-04-21', '2025-05-16')
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/positions/auto_link/?dry_run=true')
+        self.assertEqual(response.data['linked'], 3)
+        self.assertFalse(Position.objects.filter(related_to__isnull=False).exists())
+
+        call_command('link_wheel_cycles', stdout=open(os.devnull, 'w'))
+        called_away.refresh_from_db()
+        self.assertEqual(
+            [position.id for position in called_away.get_wheel_cycle_positions()],
+            [rolled.id, assigned.id, covered.id, called_away.id],
+        )
+        for position in (other, next_cycle):
+            position.refresh_from_db()
+            self.assertIsNone(position.related_to_id)
+
+    def test_breaks_looping_links(self):
+        first = self.leg('P', '2025-01-21', '2025-02-21', assigned='Yes')
+        second = self.leg('C', '2025-02-24', '2025-03-21', related_to=first)
+        third = self.leg('C', '2025-03-24', '2025-04-17', related_to=second)
+        Position.objects.filter(id=first.id).update(related_to=third)
+        first.refresh_from_db()
+        # Each position once, even with the loop in place
+        self.assertEqual(len(first.get_wheel_cycle_positions()), 3)
+
+        from Dashboard.wheel_links import auto_link_wheel_cycles
+        result = auto_link_wheel_cycles([self.user.id])
+        self.assertEqual((result['loops_broken'], result['linked']), (1, 0))
+        # The bad link is the one pointing at a later leg
+        first.refresh_from_db()
+        third.refresh_from_db()
+        self.assertIsNone(first.related_to_id)
+        self.assertEqual([p.id for p in third.get_wheel_cycle_positions()], [first.id, second.id, third.id])
+
+
+class ImpliedVolatilitySolveTests(SimpleTestCase):
+    """implied_volatility inverts black_scholes, and returns NaN where nothing reprices the option"""
+
+    def test_round_trip(self):
+        import numpy as np
+        from Dashboard.pricing import black_scholes, implied_volatility
+
+        volatility = np.array([0.05, 0.2, 0.45, 1.2, 2.5])
+        strike = np.array([98, 95, 100, 110, 150])
+        is_call = np.array([True, False, True, False, True])
+        years = np.array([7, 30, 90, 365, 730]) / 365
+        price = black_scholes(100, strike, years, volatility, is_call)['price']
+        np.testing.assert_allclose(implied_volatility(price, 100, strike, years, is_call), volatility, atol=1e-5)
+
+    def test_no_solution(self):
+        import numpy as np
+        from Dashboard.pricing import implied_volatility
+
+        solved = implied_volatility(
+            [np.nan, 2.0, 4.0, 120.0, 3.0],
+            100,
+            [100, 100, 95, 100, 100],
+            [0.1, 0.0, 0.1, 0.1, 0.1],
+            [True, True, True, True, False],
+        )
+        # Missing price, expired, below intrinsic value, above the spot, then a solvable put
+        self.assertEqual(np.isnan(solved).tolist(), [True, True, True, True, False])
+
+
+@override_settings(CLOCK_AS_OF=AS_OF)
+class ImpliedVolatilityTests(TestCase):
+    """update_implied_volatilities stores IVs solved against a market spot only"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('iv', password='iv')
+        self.addCleanup(cache.clear)
+
+    def position(self, stock, entry_price=None):
+        return Position.objects.create(
+            user=self.user, stock=stock, open_date=AS_OF_DATE - timedelta(days=10),
+            expiration=AS_OF_DATE + timedelta(days=30), type='P', num_contracts=1, strike=Decimal('100'),
+            premium=Decimal('2.00'), entry_price=entry_price, current_option_price=Decimal('2.00'),
+            implied_volatility=Decimal('0.9900'),
+        )
+
+    def test_only_request_spots_are_stored(self):
+        from Dashboard.option_book import update_implied_volatilities
+
+        priced = self.position('AAPL')
+        entry_only = self.position('MSFT', entry_price=Decimal('105'))
+        no_spot = self.position('KO')
+        self.assertEqual(update_implied_volatilities(self.user, {'AAPL': 105.0}), (1, 2))
+
+        for position in (priced, entry_only, no_spot):
+            position.refresh_from_db()
+        self.assertNotEqual(priced.implied_volatility, Decimal('0.9900'))
+        self.assertGreater(priced.implied_volatility, 0)
+        # Solved against the entry price: the stored value is left alone
+        self.assertEqual(entry_only.implied_volatility, Decimal('0.9900'))
+        self.assertIsNone(no_spot.implied_volatility)
+
+
+@override_settings(CLOCK_AS_OF=AS_OF)
+class ScenarioGridTests(TestCase):
+    """The scenarios action prices the grid in chunks without changing the result"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('scenarios', password='scenarios')
+        self.addCleanup(cache.clear)
+        for stock, option_type, strike in (('AAPL', 'P', 100), ('AAPL', 'C', 110), ('MSFT', 'P', 400)):
+            Position.objects.create(
+                user=self.user, stock=stock, open_date=AS_OF_DATE - timedelta(days=10),
+                expiration=AS_OF_DATE + timedelta(days=10), type=option_type, num_contracts=1,
+                strike=Decimal(strike), premium=Decimal('2.00'),
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_chunked_grid_matches_one_pass(self):
+        url = '/api/positions/scenarios/?moves=-30,-10,0,10,30&days=0,7,14&spot=AAPL:105,MSFT:410&iv=0.3'
+        whole = self.client.get(url).data
+        with mock.patch('Dashboard.option_book.SCENARIO_CHUNK_CELLS', 1):
+            chunked = self.client.get(url).data
+        self.assertEqual(chunked, whole)
+
+        self.assertEqual([row['stock'] for row in whole['by_ticker']], ['AAPL', 'MSFT'])
+        self.assertEqual(len(whole['totals']['pl']), 5)
+        self.assertEqual(whole['totals']['pl'][2][0], 0)
+        # Down 30% by day 14 the puts have expired in the money
+        self.assertEqual(whole['by_ticker'][1]['assignment_exposure'][0][2], 40000)
+        self.assertEqual(whole['by_ticker'][1]['assignment_exposure'][0][1], 0)
+
+
+@override_settings(CLOCK_AS_OF=AS_OF, PERF_INSTRUMENTATION=True)
+class ServerTimingTests(TestCase):
+    """With PERF_INSTRUMENTATION on, only staff see the Server-Timing header"""
+
+    def get(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get('/api/positions/')
+
+    def test_header_for_staff_only(self):
+        staff = User.objects.create_user('staff', password='staff', is_staff=True)
+        regular = User.objects.create_user('regular', password='regular')
+        self.assertIn('db;dur=', self.get(staff)['Server-Timing'])
+        self.assertNotIn('Server-Timing', self.get(regular))
+        with override_settings(DEBUG=True):
+            self.assertIn('Server-Timing', self.get(regular))
+
+
+class BlackScholesTests(SimpleTestCase):
+    """black_scholes against textbook values (Hull, Options, Futures and Other Derivatives)"""
+
+    def test_price_and_greeks(self):
+        from Dashboard.pricing import black_scholes
+
+        call = black_scholes(100, 100, 1.0, 0.2, True, rate=0.05)
+        put = black_scholes(100, 100, 1.0, 0.2, False, rate=0.05)
+        self.assertAlmostEqual(call['price'].item(), 10.4506, places=3)
+        self.assertAlmostEqual(put['price'].item(), 5.5735, places=3)
+        self.assertAlmostEqual(call['delta'].item(), 0.6368, places=4)
+        self.assertAlmostEqual(put['delta'].item(), -0.3632, places=4)
+        self.assertAlmostEqual(call['gamma'].item(), 0.018762, places=5)
+        self.assertAlmostEqual(call['vega'].item(), 0.37524, places=4)
+        self.assertAlmostEqual(call['theta'].item() * 365, -6.4140, places=3)
+        self.assertAlmostEqual(put['theta'].item() * 365, -1.6579, places=3)
+
+        # Hull example 15.6: S=42, K=40, r=10%, vol=20%, six months
+        book = black_scholes([42, 42], 40, 0.5, 0.2, [True, False], rate=0.10)
+        self.assertEqual(book['price'].round(2).tolist(), [4.76, 0.81])
+
+    def test_expired_legs_are_worth_intrinsic_value(self):
+        from Dashboard.pricing import black_scholes
+
+        legs = black_scholes([90, 90, 110], 100, [0, 0, -0.1], 0.3, [False, True, True])
+        self.assertEqual(legs['price'].tolist(), [10.0, 0.0, 10.0])
+        self.assertEqual(legs['delta'].tolist(), [-1.0, 0.0, 1.0])
+        self.assertEqual(legs['gamma'].tolist(), [0.0, 0.0, 0.0])
+
+
+class TradingCalendarTests(SimpleTestCase):
+    """Holiday and early-close lookups against the published NYSE schedule"""
+
+    def test_holidays_and_early_closes(self):
+        from datetime import time as clock_time
+        from WheelTracker.trading_calendar import session_close
+
+        for day, close in (
+            (date(2025, 1, 1), None),
+            (date(2025, 1, 9), None),  # National day of mourning
+            (date(2025, 4, 18), None),  # Good Friday
+            (date(2025, 6, 19), None),
+            (date(2026, 7, 3), None),  # Independence Day falls on a Saturday
+            (date(2021, 12, 31), clock_time(16)),  # New Year's Day on a Saturday is not observed
+            (date(2025, 7, 3), clock_time(13)),
+            (date(2025, 11, 28), clock_time(13)),
+            (date(2025, 12, 24), clock_time(13)),
+            (date(2025, 6, 2), clock_time(16)),
+            (date(2025, 6, 7), None),
+        ):
+            self.assertEqual(session_close(day), close, day)
+
+    def test_sessions_and_expirations(self):
+        from WheelTracker.trading_calendar import expiration_close_et, trading_days_between
+
+        # Good Friday is skipped
+        self.assertEqual(trading_days_between(date(2025, 4, 14), date(2025, 4, 21)), 4)
+        self.assertEqual(trading_days_between(date(2025, 4, 21), date(2025, 4, 14)), 0)
+        # An expiration on a holiday moves to the prior session, and early closes expire at 1pm
+        self.assertEqual(expiration_close_et(date(2025, 4, 18)).isoformat(), '2025-04-17T16:00:00-04:00')
+        self.assertEqual(expiration_close_et(date(2025, 11, 28)).isoformat(), '2025-11-28T13:00:00-05:00')
+
+
+class MonteCarloTests(SimpleTestCase):
+    """simulate_trade is reproducible per seed and its estimates stay within their bounds"""
+    # Short 95 put for $1.50 on a $100 stock, 30 days out
+    TRADE = {
+        'spot': 100.0, 'years': 30 / 365, 'volatility': 0.3, 'rate': 0.045, 'credit': 1.5,
+        'legs': [(95.0, False, -1.0)], 'touch_strike': 95.0, 'touch_below': True, 'paths': 20000,
+    }
+
+    def test_same_seed_same_results(self):
+        from Dashboard.monte_carlo import simulate_trade, simulate_trades, trade_seed
+
+        first = simulate_trade(**self.TRADE, seed=trade_seed(7, 'AAPL'))
+        self.assertEqual(simulate_trade(**self.TRADE, seed=trade_seed(7, 'AAPL')), first)
+        self.assertNotEqual(simulate_trade(**self.TRADE, seed=trade_seed(8, 'AAPL')), first)
+        # A trade's seed comes from its key, not its place in the batch
+        batch = simulate_trades([{**self.TRADE, 'seed': trade_seed(7, key)} for key in ('MSFT', 'AAPL')])
+        self.assertEqual(batch[1], first)
+
+    def test_probability_bounds(self):
+        import numpy as np
+        from Dashboard.monte_carlo import simulate_trade
+        from Dashboard.pricing import norm_cdf
+
+        result = simulate_trade(**self.TRADE, seed=0)
+        for name in ('pop', 'prob_touch'):
+            self.assertTrue(0 <= result[name] <= 1, name)
+        # Touching the strike at some close is at least as likely as finishing below it
+        self.assertGreaterEqual(result['prob_touch'], 1 - result['pop'])
+        self.assertLessEqual(result['tail_loss'], result['expected_pl'])
+        self.assertLessEqual(result['expected_pl'], self.TRADE['credit'])
+
+        # POP is the risk-neutral chance of finishing above the break-even, N(d2)
+        trade = self.TRADE
+        volatility, years = trade['volatility'], trade['years']
+        d2 = (np.log(trade['spot'] / (95.0 - trade['credit'])) + (trade['rate'] - volatility ** 2 / 2) * years) \
+            / (volatility * np.sqrt(years))
+        self.assertAlmostEqual(result['pop'], float(norm_cdf(d2)), delta=0.01)
+
+
+class PriceHistoryStoreTests(SimpleTestCase):
+    """PriceHistoryStore only ever appends later, non-NaN closes"""
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.store = PriceHistoryStore(root.name)
+        self.days = [to_day(date(2025, 6, day)) for day in (2, 3, 4)]
+
+    def test_append_is_idempotent(self):
+        self.assertEqual(self.store.append('aapl', self.days, [100.0, 101.0, 102.0]), 3)
+        self.assertEqual(self.store.append('AAPL', self.days, [100.0, 101.0, 102.0]), 0)
+        days, closes = self.store.series('AAPL')
+        self.assertEqual(days.tolist(), self.days)
+        self.assertEqual(closes.tolist(), [100.0, 101.0, 102.0])
+        self.assertEqual(self.store.index()['AAPL'], {'first': '2025-06-02', 'last': '2025-06-04', 'rows': 3})
+
+    def test_skips_out_of_order_and_nan_closes(self):
+        # Unsorted input is sorted, and a day repeated in the batch keeps its last value
+        self.assertEqual(self.store.append('AAPL', [self.days[2], self.days[0], self.days[0]], [102.0, 99.0, 100.0]), 2)
+        # Days before the last stored one and NaN closes are dropped
+        later = [to_day(date(2025, 6, day)) for day in (5, 6)]
+        self.assertEqual(self.store.append('AAPL', [self.days[1], *later], [101.0, float('nan'), 104.0]), 1)
+        days, closes = self.store.series('AAPL')
+        self.assertEqual(days.tolist(), [self.days[0], self.days[2], later[1]])
+        self.assertEqual(closes.tolist(), [100.0, 102.0, 104.0])
+
+    def test_close_on(self):
+        self.store.append('AAPL', self.days, [100.0, 101.0, 102.0])
+        self.assertIsNone(self.store.close_on('AAPL', date(2025, 6, 1)))
+        self.assertEqual(self.store.close_on('AAPL', date(2025, 6, 3)), 101.0)
+        # A weekend or holiday falls back to the last session before it
+        self.assertEqual(self.store.close_on('AAPL', date(2025, 6, 8)), 102.0)
+        self.assertIsNone(self.store.close_on('MSFT', date(2025, 6, 3)))
+
+    def test_rejects_invalid_tickers(self):
+        for ticker in ('../secrets', 'AAPL/x', '', 'TOOLONGTICKER', 'A B'):
+            with self.assertRaises(ValueError):
+                self.store.path(ticker)
+        self.assertTrue(self.store.path('brk.b').endswith('BRK.B.prices'))
+        self.assertTrue(self.store.path('^VIX').endswith('^VIX.prices'))
+        self.assertIsNone(self.store.close_on('../secrets', date(2025, 6, 3)))
+
+        client = APIClient()
+        client.force_authenticate(User(id=1, username='prices'))
+        with override_settings(PRICE_HISTORY_DIR=self.store.root), self.assertLogs('django.request', 'WARNING'):
+            self.assertEqual(client.get('/api/prices/A%20B/').status_code, 400)
+            self.assertEqual(client.get('/api/prices/MSFT/').status_code, 404)
+
+
+@override_settings(CLOCK_AS_OF=AS_OF)
+class AsyncEndpointTests(TestCase):
+    """The async views under WSGI: exports stream from a plain iterator, the event stream is refused"""
+
+    def setUp(self):
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        self.user = User.objects.create_user('exports', password='exports')
+        self.addCleanup(cache.clear)
+        seed_wheel_portfolio(self.user, 5)
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+
+    def test_export_streams_under_wsgi(self):
+        import warnings
+
+        with warnings.catch_warnings():
+            # Django warns when it has to buffer an async iterator for WSGI
+            warnings.filterwarnings('error', message='StreamingHttpResponse must consume')
+            response = self.client.get('/api/export/positions/', **self.auth)
+            lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.is_async)
+        self.assertEqual(len(lines), 1 + Position.objects.filter(user=self.user).count())
+
+    async def test_export_streams_under_asgi(self):
+        response = await self.async_client.get('/api/export/positions/', headers={
+            'Authorization': self.auth['HTTP_AUTHORIZATION'],
+        })
+        self.assertTrue(response.is_async)
+        lines = b''.join([chunk async for chunk in response.streaming_content]).decode().splitlines()
+        self.assertEqual(len(lines), 1 + await Position.objects.filter(user=self.user).acount())
+
+    def test_stream_tells_wsgi_clients_to_poll(self):
+        with self.assertLogs('django.request', 'ERROR'):
+            response = self.client.get('/api/notifications/stream/', **self.auth)
+        self.assertEqual(response.status_code, 501)
+        self.assertIn('unread_count', response.json()['error'])
+
+
+class UnreadCountTests(TestCase):
+    """Unread counts stay in step with every change, cached or not"""
+
+    def setUp(self):
+        from Dashboard.models import Notification
+
+        self.addCleanup(cache.clear)
+        self.admin = User.objects.create_user('admin', password='admin', is_staff=True)
+        self.user = User.objects.create_user('reader', password='reader')
+        self.notifications = [
+            Notification.objects.create(user=self.user, title=f'Note {i}', message='...') for i in range(2)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.admin_client = APIClient()
+        self.admin_client.force_authenticate(self.admin)
+
+    def count(self):
+        return self.client.get('/api/notifications/unread_count/').data['count']
+
+    def send(self, **data):
+        with self.assertLogs('Dashboard', 'INFO'):
+            response = self.admin_client.post(
+                '/api/notifications/send_notification/', {'title': 'Hello', 'message': '...', **data}, format='json'
+            )
+        self.assertEqual(response.status_code, 201)
+
+    @override_settings(UNREAD_COUNT_CACHE=True)
+    def test_mark_as_read_and_mark_all(self):
+        self.assertEqual(self.count(), 2)
+        self.client.post(f'/api/notifications/{self.notifications[0].id}/mark_as_read/')
+        self.assertEqual(self.count(), 1)
+        # Marking it again does not count it twice
+        self.client.post(f'/api/notifications/{self.notifications[0].id}/mark_as_read/')
+        self.assertEqual(self.count(), 1)
+        self.send()
+        self.assertEqual(self.count(), 2)
+        self.client.post('/api/notifications/mark_all_as_read/')
+        self.assertEqual(self.count(), 0)
+
+    @override_settings(UNREAD_COUNT_CACHE=True)
+    def test_send_notification(self):
+        self.assertEqual(self.count(), 2)
+        self.send(user_ids=[self.user.id])
+        self.assertEqual(self.count(), 3)
+        self.send()
+        self.assertEqual(self.count(), 4)
+
+    @override_settings(UNREAD_COUNT_CACHE=True)
+    def test_broadcast_version_bump(self):
+        from Dashboard.models import Notification
+        from Dashboard.utils import invalidate_all_unread_counts
+
+        self.assertEqual(self.count(), 2)
+        # Made outside the API: the cached count is stale until the version moves on
+        Notification.objects.create(user=None, title='Maintenance', message='...')
+        self.assertEqual(self.count(), 2)
+        invalidate_all_unread_counts()
+        self.assertEqual(self.count(), 3)
+
+    def test_counts_are_queried_without_a_shared_cache(self):
+        from Dashboard.models import Notification
+
+        self.assertEqual(self.count(), 2)
+        # e.g. handled by another worker process
+        Notification.objects.filter(id=self.notifications[0].id).update(is_read=True)
+        self.assertEqual(self.count(), 1)
+        with self.assertNumQueries(1):
+            self.count()
+
+
+class BroadcastNotificationTests(TestCase):
+    """A broadcast is one row; each user's read state is their receipt"""
+
+    def setUp(self):
+        from Dashboard.models import Notification
+
+        self.admin = User.objects.create_user('admin', password='admin', is_staff=True)
+        self.alice = User.objects.create_user('alice', password='alice')
+        self.bob = User.objects.create_user('bob', password='bob')
+        self.broadcast = Notification.objects.create(user=None, title='Maintenance', message='...')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def listed(self, user):
+        return {row['id']: row for row in self.client_for(user).get('/api/notifications/').data['results']}
+
+    def test_receipts_mark_broadcasts_read_per_user(self):
+        from Dashboard.models import NotificationReceipt
+        from Dashboard.utils import unread_notifications_for
+
+        response = self.client_for(self.alice).post(f'/api/notifications/{self.broadcast.id}/mark_as_read/')
+        self.assertTrue(response.data['is_read'])
+        self.assertEqual(NotificationReceipt.objects.filter(notification=self.broadcast).count(), 1)
+        self.broadcast.refresh_from_db()
+        self.assertFalse(self.broadcast.is_read)
+
+        # The anti-join leaves out broadcasts the user has a receipt for
+        self.assertEqual(unread_notifications_for(self.alice).count(), 0)
+        self.assertEqual(list(unread_notifications_for(self.bob)), [self.broadcast])
+
+        read, unread = self.listed(self.alice)[self.broadcast.id], self.listed(self.bob)[self.broadcast.id]
+        self.assertTrue(read['is_read'])
+        self.assertIsNotNone(read['read_at'])
+        self.assertFalse(unread['is_read'])
+        self.assertIsNone(unread['read_at'])
+
+    def test_only_broadcasts_sent_since_joining(self):
+        from Dashboard.models import Notification
+        from Dashboard.utils import unread_notifications_for
+
+        late = User.objects.create_user('late', password='late')
+        User.objects.filter(id=late.id).update(date_joined=self.broadcast.created_at + timedelta(seconds=1))
+        late.refresh_from_db()
+        self.assertNotIn(self.broadcast.id, self.listed(late))
+        self.assertEqual(unread_notifications_for(late).count(), 0)
+
+        later = Notification.objects.create(user=None, title='Release notes', message='...')
+        Notification.objects.filter(id=later.id).update(created_at=late.date_joined + timedelta(seconds=1))
+        self.assertEqual(list(self.listed(late)), [later.id])
+
+    def test_only_admins_change_broadcasts(self):
+        from Dashboard.models import Notification
+
+        own = Notification.objects.create(user=self.alice, title='Welcome', message='...')
+        alice = self.client_for(self.alice)
+        url = f'/api/notifications/{self.broadcast.id}/'
+        with self.assertLogs('django.request', 'WARNING'):
+            self.assertEqual(alice.patch(url, {'title': 'Changed'}, format='json').status_code, 403)
+            self.assertEqual(alice.delete(url).status_code, 403)
+        self.assertEqual(alice.patch(f'/api/notifications/{own.id}/', {'title': 'Hi'}, format='json').status_code, 200)
+
+        admin = self.client_for(self.admin)
+        self.assertEqual(admin.patch(url, {'title': 'Maintenance window'}, format='json').status_code, 200)
+        self.assertEqual(admin.delete(url).status_code, 204)
+        self.assertFalse(Notification.objects.filter(id=self.broadcast.id).exists())
+
+
+class SampleDataTests(TestCase):
+    """generate_sample_data gives the same data for a seed whichever day it runs"""
+
+    def generate(self, as_of):
+        with override_settings(CLOCK_AS_OF=as_of):
+            call_command('generate_sample_data', users=1, cycles=3, spreads=5, seed=7, clear=True,
+                         stdout=open(os.devnull, 'w'))
+        fields = ('stock', 'open_date', 'expiration', 'type', 'strike', 'premium', 'close_date', 'assigned')
+        return (
+            list(Position.objects.order_by('open_date', 'stock', 'id').values_list(*fields)),
+            list(CreditSpread.objects.order_by('open_date', 'stock', 'id').values_list(
+                'stock', 'open_date', 'expiration', 'type', 'short_strike', 'long_strike', 'short_premium',
+            )),
+        )
+
+    def test_same_seed_same_data(self):
+        first = self.generate('2025-06-02T12:00')
+        self.assertTrue(first[0] and first[1])
+        self.assertEqual(self.generate('2026-01-15T12:00'), first)
+        self.assertLessEqual(max(row[1] for row in first[0]), date(2025, 6, 2))
+
+
+class ColdStartTests(SimpleTestCase):
+    """Booting the WSGI app stays within budget and imports no heavy package"""
+
+    def test_cold_start_budget(self):
+        from Dashboard.management.commands.importtime import START_UP_BUDGET_MS
+
+        # Fails on a forbidden import as well as on the budget
+        call_command('importtime', budget_ms=START_UP_BUDGET_MS, stdout=open(os.devnull, 'w'))
+
+    def test_reports_forbidden_imports(self):
+        from django.core.management.base import CommandError
+        from Dashboard.management.commands.importtime import DEFAULT_FORBIDDEN
+
+        with self.assertRaisesRegex(CommandError, 'heavy modules imported at start-up: django'):
+            call_command('importtime', runs=1, forbid=','.join([*DEFAULT_FORBIDDEN, 'django']),
+                         stdout=open(os.devnull, 'w'))
+
+
+class BacktestTests(SimpleTestCase):
+    """The backtest engine over synthetic closes in a temporary price store"""
+    START = date(2025, 1, 1)
+
+    def setUp(self):
+        import numpy as np
+
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = root.name
+        # +/-1% every day, so the trailing volatility is defined after 30 closes
+        self.wiggle = np.where(np.arange(100) % 2, 1.01, 0.99)
+        self.days = np.arange(to_day(self.START), to_day(self.START) + 100)
+
+    def store(self, closes):
+        PriceHistoryStore(self.root).write('TEST', self.days, closes)
+        return PriceHistoryStore(self.root).series('TEST')
+
+    def test_realized_volatility(self):
+        import numpy as np
+        from Dashboard.backtest import MIN_VOLATILITY, VOLATILITY_WINDOW, realized_volatility
+
+        closes = 100 * np.exp(np.cumsum(np.where(np.arange(60) % 2, 0.01, -0.01)))
+        volatility = realized_volatility(closes)
+        self.assertTrue(np.isnan(volatility[:VOLATILITY_WINDOW]).all())
+        # Returns alternate +/-1%, so every window has mean 0 and 30 squares of 0.0001
+        expected = np.sqrt(VOLATILITY_WINDOW * 1e-4 / (VOLATILITY_WINDOW - 1) * 252)
+        np.testing.assert_allclose(volatility[VOLATILITY_WINDOW:], expected)
+        self.assertEqual(realized_volatility(np.full(40, 50.0))[-1], MIN_VOLATILITY)
+
+    def test_wheel_assigned_put_then_called_away_call(self):
+        import numpy as np
+        from Dashboard.backtest import DEFAULT_PARAMS, backtest_wheel, run, summarize
+
+        # Flat, then down through the put strike, then up through the call strike
+        closes = np.concatenate([np.full(40, 100.0), np.full(50, 92.0), np.full(10, 120.0)]) * self.wiggle
+        days, closes = self.store(closes)
+        put, call = positions = backtest_wheel('TEST', days, np.asarray(closes), DEFAULT_PARAMS)[0]
+
+        self.assertEqual((put.type, put.assigned, call.type, call.assigned), ('P', 'Yes', 'C', 'Yes'))
+        for leg in positions:
+            self.assertEqual(leg.close_date, leg.expiration)
+            self.assertEqual(leg.premium_paid_to_close, Decimal('0.00'))
+        self.assertEqual(call.open_date, put.close_date)
+        self.assertEqual(put.wheel_cycle_name, call.wheel_cycle_name)
+        self.assertGreater(call.strike, put.strike)
+
+        # P/L and AR% are the dashboard's, from the model properties
+        summary = run('TEST', {}, root=self.root)
+        stock_pl = float(call.strike - put.strike) * 100
+        option_pl = float(put.profit_loss + call.profit_loss)
+        self.assertEqual(summary['trades'], 2)
+        self.assertEqual(summary['assignments'], 2)
+        self.assertEqual(summary['option_pl'], round(option_pl, 2))
+        self.assertEqual(summary['stock_pl'], stock_pl)
+        self.assertEqual(summary['total_pl'], round(option_pl + stock_pl, 2))
+        self.assertEqual(summary['mean_ar'], round(float(put.ar_of_closed_trade + call.ar_of_closed_trade) / 2, 2))
+        self.assertEqual(summary['win_rate'], 100.0)
+        self.assertLessEqual(summarize(positions, [0.0, stock_pl]).items(), summary.items())
+
+    def test_profit_take_buys_back_early(self):
+        import numpy as np
+        from Dashboard.backtest import DEFAULT_PARAMS, FEE_PER_CONTRACT, backtest_wheel
+
+        # A steady rise: short puts lose value quickly
+        days, closes = self.store(100 * np.exp(np.arange(100) * 0.004) * self.wiggle)
+        held = backtest_wheel('TEST', days, np.asarray(closes), DEFAULT_PARAMS)[0][0]
+        taken = backtest_wheel('TEST', days, np.asarray(closes), {**DEFAULT_PARAMS, 'profit_take': 0.5})[0][0]
+
+        self.assertEqual(held.close_date, held.expiration)
+        self.assertEqual((taken.open_date, taken.strike, taken.premium), (held.open_date, held.strike, held.premium))
+        self.assertLess(taken.close_date, taken.expiration)
+        self.assertEqual(taken.assigned, 'No')
+        self.assertEqual(taken.close_fees, FEE_PER_CONTRACT)
+        self.assertGreater(taken.premium_paid_to_close, 0)
+        self.assertLessEqual(taken.premium_paid_to_close, taken.premium * Decimal('0.5') + Decimal('0.01'))
+
+
+@override_settings(CLOCK_AS_OF=AS_OF)
+class ReplicaRoutingTests(TestCase):
+    """Analytics reads go to the replica; writes, the expiry job and a user who just wrote use the primary"""
+
+    def setUp(self):
+        from django.db import connections
+
+        self.addCleanup(cache.clear)
+        # A second alias over the same SQLite connection, so it sees the test's rows
+        # but logs its own queries
+        default = connections['default']
+        default.ensure_connection()
+        self.replica = default.__class__({**default.settings_dict}, alias='replica')
+        self.replica.connection = default.connection
+        connections['replica'] = self.replica
+        self.addCleanup(connections.__delitem__, 'replica')
+        patcher = mock.patch.dict(settings.DATABASES, {'replica': self.replica.settings_dict})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user('replica', password='replica')
+        seed_wheel_portfolio(self.user, 5)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def queries(self, request):
+        """(response, queries on the primary, queries on the replica)"""
+        with CaptureQueriesContext(connection) as primary, CaptureQueriesContext(self.replica) as replica:
+            response = request()
+        return response, len(primary), len(replica)
+
+    def summary(self):
+        return self.queries(lambda: self.client.get('/api/positions/summary/'))
+
+    def create(self, **data):
+        return self.client.post('/api/positions/', {
+            'stock': 'AAPL', 'open_date': AS_OF_DATE, 'expiration': AS_OF_DATE + timedelta(days=30),
+            'type': 'P', 'num_contracts': 1, 'strike': '100', 'premium': '2.00', **data,
+        }, format='json')
+
+    def test_summary_reads_from_the_replica(self):
+        response, primary, replica = self.summary()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_writes_and_expiry_job_use_the_primary(self):
+        from WheelTracker.db_routers import replica
+
+        response, primary, replica_queries = self.queries(self.create)
+        self.assertEqual(response.status_code, 201)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica_queries, 0)
+
+        # Even from inside a replica block
+        def expire():
+            with replica(self.user.id):
+                return auto_close_expired_positions()
+        _, primary, replica_queries = self.queries(expire)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica_queries, 0)
+
+    def test_successful_write_pins_the_user_to_the_primary(self):
+        with self.assertLogs('django.request', 'WARNING'):
+            self.assertEqual(self.create(strike='not a number').status_code, 400)
+        self.assertEqual(self.summary()[1], 0)
+
+        position = Position.objects.filter(user=self.user, close_date__isnull=True).first()
+        self.assertEqual(
+            self.client.patch(f'/api/positions/{position.id}/', {'notes': 'rolled'}, format='json').status_code, 200
+        )
+        _, primary, replica = self.summary()
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        # Back on the replica once DB_REPLICA_STICKY_SECONDS have passed
+        later = time.time() + settings.DB_REPLICA_STICKY_SECONDS + 1
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=later):
+            _, primary, replica = self.summary()
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
@@ -1,12 +1,24 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PositionViewSet, FeedbackViewSet, NotificationViewSet
+from .views import PositionViewSet, FeedbackViewSet, NotificationViewSet, price_history
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'positions', PositionViewSet, basename='position')
 router.register(r'feedback', FeedbackViewSet, basename='feedback')
 router.register(r'notifications', NotificationViewSet, basename='notification')
 
+# Native async views (I/O bound); listed before the router so they are not
+# captured by its detail routes
+async_urlpatterns = [
+    path('quotes/refresh/', async_views.refresh_quotes, name='refresh_quotes'),
+    path('notifications/stream/', async_views.notification_stream, name='notification_stream'),
+    path('export/positions/', async_views.export_positions, name='export_positions'),
+    path('export/credit-spreads/', async_views.export_credit_spreads, name='export_credit_spreads'),
+]
+
 urlpatterns = [
+    path('api/', include(async_urlpatterns)),
+    path('api/prices/<str:ticker>/', price_history, name='price_history'),
     path('api/', include(router.urls)),
 ]
@@ -1,78 +1,503 @@
-from datetime import datetime, time
+from datetime import timedelta
 from decimal import Decimal
-import pytz
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from WheelTracker import clock, db_routers
+from WheelTracker.trading_calendar import expiration_close_et, expiration_session
+import json
+import logging
 
+logger = logging.getLogger(__name__)
 
+# Expired legs wait this many days for the underlying's closing price before
+# being closed as expired worthless
+EXPIRY_PRICE_GRACE_DAYS = 3
+
+# Expiration dates this far past today can still be in an already-closed
+# session (e.g. a Saturday expiration trades until Friday's close)
+EXPIRY_LOOKAHEAD = timedelta(days=3)
+
+# Rows per INSERT when fanning a notification out to many users
+NOTIFICATION_BATCH_SIZE = 1000
+
+# Cached unread counts (settings.UNREAD_COUNT_CACHE) are recomputed at least
+# this often (seconds), so a change made outside the API (e.g. the admin site)
+# is picked up eventually
+UNREAD_COUNT_TIMEOUT = 300
+
+# Bumped on every broadcast; part of each unread-count key so that one
+# broadcast invalidates every user's cached count without touching them all
+BROADCAST_VERSION_KEY = 'notifications:broadcast_version'
+
+
+def _expiry_candidates(now_et):
+    """
+    (open positions past their expiration session, auto-closed positions whose
+    expiration has moved into the future, open spreads past their session)
+    """
+    from CreditSpread.models import CreditSpread
+    from Dashboard.models import Position
+
+    today = now_et.date()
+
+    # Expiry cut-off per expiration date (many positions share an expiration)
+    expiry_cutoffs = {}
+
+    def has_expired(expiration):
+        if expiration not in expiry_cutoffs:
+            expiry_cutoffs[expiration] = expiration_close_et(expiration)
+        return now_et >= expiry_cutoffs[expiration]
+
+    # Open legs that may have expired (the session can end before a weekend
+    # expiration date), and auto-closed positions whose expiration may have moved
+    positions = Position.objects.filter(
+        Q(close_date__isnull=True, expiration__lte=today + EXPIRY_LOOKAHEAD)
+        | Q(close_date__isnull=False, premium_paid_to_close=Decimal('0.00'), close_fees=Decimal('0.00'),
+            expiration__gte=today)
+    )
+    spreads = CreditSpread.objects.filter(close_date__isnull=True, expiration__lte=today + EXPIRY_LOOKAHEAD)
+
+    expired_positions, reopened = [], []
+    for position in positions:
+        if position.close_date is None and has_expired(position.expiration):
+            expired_positions.append(position)
+        elif position.close_date is not None and not has_expired(position.expiration):
+            reopened.append(position)
+    expired_spreads = [spread for spread in spreads if has_expired(spread.expiration)]
+    return expired_positions, reopened, expired_spreads
+
+
+def _tickers_by_session(legs):
+    tickers = {}
+    for leg in legs:
+        tickers.setdefault(expiration_session(leg.expiration), set()).add(leg.stock.upper())
+    return tickers
+
+
+def sessions_awaiting_close():
+    """{session: tickers} for open legs whose expiration session has ended"""
+    expired_positions, _, expired_spreads = _expiry_candidates(clock.now_et())
+    return _tickers_by_session(expired_positions + expired_spreads)
+
+
+@db_routers.primary()
 def auto_close_expired_positions():
     """
-    Automatically manage position expiration status:
-    1. Close open positions that have expired (at 4:00 PM ET on expiration date)
-    2. Reopen closed positions where expiration was extended to a future date
+    Automatically manage expiration status of positions and credit spreads:
+    1. Close open positions and spreads that have expired (at the close of the
+       expiration session), settling them against the underlying's close
+    2. Reopen auto-closed positions where expiration was extended to a future date
+
+    The expiration session comes from the NYSE calendar: contracts stop trading
+    at 4:00 PM ET, at 1:00 PM ET on early-close days, and at the prior session's
+    close when the expiration date is an exchange holiday.
+
+    Closing prices come from get_closing_prices, which only reads local data
+    (the price history store and closes cached by `manage.py settle_expirations`),
+    so this never waits on the network when run from a request.
 
     For auto-closed positions:
     - Sets close_date to expiration date
-    - Sets premium_paid_to_close to 0
-    - Sets close_fees to 0
+    - Sets premium_paid_to_close to 0 and close_fees to 0
+    - Sets assigned to "Yes" when the option finished in the money (the
+      premium goes toward the cost basis), otherwise "No"
+
+    For auto-closed credit spreads:
+    - Sets close_date to expiration date and close_fees to 0
+    - Settles each leg at its intrinsic value (max loss when both are in the money)
+
+    Legs whose closing price is not available yet stay open for up to
+    EXPIRY_PRICE_GRACE_DAYS, then are closed as expired worthless.
 
     For reopened positions (extended expiration):
-    - Clears close_date, premium_paid_to_close, and close_fees
+    - Clears close_date, premium_paid_to_close and close_fees, and resets
+      assigned if it was set here (auto_assigned) rather than by the user
+
+    Closed and reopened positions are posted to the share-lot ledger (Dashboard.ledger).
     """
+    from CreditSpread.models import CreditSpread
+    from Dashboard.ledger import post_positions
+    from Dashboard.market_data import get_closing_prices
     from Dashboard.models import Position
 
-    # Get current time in ET timezone
-    et_tz = pytz.timezone('US/Eastern')
-    now_et = datetime.now(et_tz)
-    today_et = now_et.date()
-
-    # Define 4:00 PM ET as the closing time
-    closing_time = time(16, 0)  # 4:00 PM
-
-    closed_count = 0
-    reopened_count = 0
-
-    # PART 1: Close expired open positions
-    open_positions = Position.objects.filter(close_date__isnull=True)
-
-    for position in open_positions:
-        # Check if position has expired
-        if position.expiration < today_et:
-            # Past expiration date - close immediately
-            position.close_date = position.expiration
-            position.premium_paid_to_close = Decimal('0.00')
-            position.close_fees = Decimal('0.00')
-            position.save()
-            closed_count += 1
-        elif position.expiration == today_et and now_et.time() >= closing_time:
-            # Today is expiration date and it's past 4:00 PM ET - close now
-            position.close_date = position.expiration
-            position.premium_paid_to_close = Decimal('0.00')
-            position.close_fees = Decimal('0.00')
-            position.save()
-            closed_count += 1
-
-    # PART 2: Reopen closed positions where expiration was extended
-    # Only reopen positions that were auto-closed (premium_paid_to_close = 0 and close_fees = 0)
-    closed_positions = Position.objects.filter(
-        close_date__isnull=False,
-        premium_paid_to_close=Decimal('0.00'),
-        close_fees=Decimal('0.00')
+    now_et = clock.now_et()
+    today = now_et.date()
+    expired_positions, reopened, expired_spreads = _expiry_candidates(now_et)
+
+    # One closing-price lookup per expiration session
+    closes = {
+        session: get_closing_prices(tickers, session)
+        for session, tickers in _tickers_by_session(expired_positions + expired_spreads).items()
+    }
+
+    def settlement_price(leg):
+        """
+        (ready, close): the underlying's close; not ready while still waiting
+        for it; ready without a close once the grace period has passed
+        """
+        session = expiration_session(leg.expiration)
+        close = closes[session].get(leg.stock.upper())
+        if close is not None:
+            return True, Decimal(str(close))
+        if (today - session).days < EXPIRY_PRICE_GRACE_DAYS:
+            return False, None
+        logger.warning(f"No closing price for {leg.stock} on {session}; closing {leg} as expired worthless")
+        return True, None
+
+    closed, assigned, awaiting_price = [], 0, 0
+    for position in expired_positions:
+        ready, close = settlement_price(position)
+        if not ready:
+            awaiting_price += 1
+            continue
+        in_the_money = close is not None and (
+            close < position.strike if position.type == 'P' else close > position.strike
+        )
+        position.close_date = position.expiration
+        position.premium_paid_to_close = Decimal('0.00')
+        position.close_fees = Decimal('0.00')
+        position.assigned = 'Yes' if in_the_money else 'No'
+        position.auto_assigned = in_the_money
+        assigned += in_the_money
+        closed.append(position)
+
+    for position in reopened:
+        position.close_date = None
+        position.premium_paid_to_close = None
+        position.close_fees = None
+        # Only undo an assignment made here, never one entered by hand
+        if position.auto_assigned:
+            position.assigned = 'No'
+            position.auto_assigned = False
+
+    settled = []
+    for spread in expired_spreads:
+        ready, close = settlement_price(spread)
+        if not ready:
+            awaiting_price += 1
+            continue
+        is_call = spread.type == 'BCS'
+        for field, strike in (('short_close_premium', spread.short_strike), ('long_close_premium', spread.long_strike)):
+            intrinsic = 0 if close is None else max(close - strike if is_call else strike - close, 0)
+            setattr(spread, field, Decimal(intrinsic).quantize(Decimal('0.01')))
+        spread.close_date = spread.expiration
+        spread.close_fees = Decimal('0.00')
+        settled.append(spread)
+
+    if closed or reopened or settled:
+        with transaction.atomic():
+            Position.objects.bulk_update(
+                closed + reopened, ['close_date', 'premium_paid_to_close', 'close_fees', 'assigned', 'auto_assigned'],
+                batch_size=1000,
+            )
+            CreditSpread.objects.bulk_update(
+                settled, ['close_date', 'short_close_premium', 'long_close_premium', 'close_fees'], batch_size=1000,
+            )
+            # Assigned puts open share lots, assigned calls sell them, reopened legs are backed out
+            post_positions(closed + reopened)
+
+    return {
+        'closed': len(closed),
+        'assigned': assigned,
+        'reopened': len(reopened),
+        'spreads_closed': len(settled),
+        'awaiting_price': awaiting_price,
+    }
+
+
+def prefetch_wheel_cycles(positions):
+    """
+    Resolve the wheel cycle of every position in two queries instead of walking
+    related_to one row at a time (which costs several queries per position).
+
+    Loads the (id, related_to_id) links of the positions' owners, builds each
+    cycle in memory - ancestors from the root, the position itself, then its
+    descendants - and stores it on the instance, where
+    Position.get_wheel_cycle_positions picks it up. Returns the positions as a list.
+    """
+    from Dashboard.models import Position
+
+    positions = list(positions)
+    if not positions:
+        return positions
+
+    owners = Q(user_id__in={p.user_id for p in positions if p.user_id is not None})
+    if any(p.user_id is None for p in positions):
+        owners |= Q(user__isnull=True)
+    parent_of = {}
+    children_of = {}
+    # Model ordering (newest first) matches the order of related_positions.all()
+    for position_id, parent_id in Position.objects.filter(owners).values_list('id', 'related_to_id'):
+        parent_of[position_id] = parent_id
+        if parent_id is not None:
+            children_of.setdefault(parent_id, []).append(position_id)
+
+    cycle_ids = {}
+    for position in positions:
+        ancestors = []
+        seen = {position.id}
+        current = parent_of.get(position.id)
+        while current is not None and current not in seen:
+            ancestors.append(current)
+            seen.add(current)
+            current = parent_of.get(current)
+
+        descendants = []
+        stack = list(reversed(children_of.get(position.id, [])))
+        while stack:
+            current = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            descendants.append(current)
+            stack.extend(reversed(children_of.get(current, [])))
+
+        cycle_ids[position] = ancestors[::-1] + [position.id] + descendants
+
+    loaded = {p.id: p for p in positions}
+    missing = {i for ids in cycle_ids.values() for i in ids} - loaded.keys()
+    loaded.update(Position.objects.in_bulk(missing))
+
+    for position, ids in cycle_ids.items():
+        position.__dict__['_wheel_cycle'] = [loaded[i] for i in ids if i in loaded]
+    return positions
+
+
+class DisjointSet:
+    """Union-find over hashable items (path halving, union by size)"""
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def find(self, item):
+        parent = self.parent
+        if item not in parent:
+            parent[item] = item
+            self.size[item] = 1
+            return item
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        """Merge the sets of a and b; False if they were already one set"""
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return True
+
+
+def wheel_cycles(user):
+    """
+    Every wheel cycle of the user's positions - the groups linked through
+    related_to, a lone position being a cycle of its own - with its totals.
+
+    One query loads the positions, annotated with the stock P/L and held
+    shares of the share lots each one opened (see Dashboard.ledger); the
+    cycles are then grouped with one union-find pass over the related_to
+    links, which also tolerates bad links that loop back on themselves.
+    Returns a list of dicts, most recently started first.
+    """
+    from django.db.models import DecimalField, F, IntegerField, OuterRef, Subquery, Sum
+    from Dashboard.models import Position, ShareLot
+
+    def lot_total(expression, output_field, **filters):
+        lots = ShareLot.objects.filter(opened_by=OuterRef('pk'), **filters).order_by().values('opened_by')
+        total = lots.annotate(total=Sum(expression, output_field=output_field)).values('total')
+        return Subquery(total, output_field=output_field)
+
+    amount = DecimalField(max_digits=14, decimal_places=4)
+    positions = Position.objects.filter(user=user).annotate(
+        lot_stock_pl=lot_total((F('sale_price') - F('cost_per_share')) * F('shares'), amount, sold_on__isnull=False),
+        lot_shares_held=lot_total(F('shares'), IntegerField(), sold_on__isnull=True),
+        lot_basis_held=lot_total(F('adjusted_cost_basis') * F('shares'), amount, sold_on__isnull=True),
+    ).order_by('open_date', 'id')
+
+    links = DisjointSet()
+    members = {}
+    for position in positions:
+        links.find(position.id)
+        if position.related_to_id is not None:
+            links.union(position.id, position.related_to_id)
+        members[position.id] = position
+    legs_of = {}
+    for position_id, position in members.items():
+        legs_of.setdefault(links.find(position_id), []).append(position)
+
+    today = clock.today_et()
+    cycles = []
+    for legs in legs_of.values():
+        is_open = any(leg.close_date is None for leg in legs)
+        start = legs[0].open_date
+        end = None if is_open else max(leg.close_date for leg in legs)
+        days = ((end or today) - start).days
+
+        option_pl = sum((leg.profit_loss for leg in legs if leg.close_date is not None), Decimal('0.00'))
+        stock_pl = sum((Decimal(leg.lot_stock_pl) for leg in legs if leg.lot_stock_pl is not None), Decimal('0.00'))
+        net_pl = option_pl + stock_pl
+        shares_held = sum(leg.lot_shares_held or 0 for leg in legs)
+        basis_held = sum((Decimal(leg.lot_basis_held) for leg in legs if leg.lot_basis_held is not None), Decimal('0'))
+        # Capital tied up: the largest put collateral or covered share value in the cycle
+        capital = max(leg.strike * 100 * leg.num_contracts for leg in legs)
+
+        ar = None
+        if days > 0 and capital > 0:
+            ar = (Decimal('365') / days) * (net_pl / capital) * 100
+
+        cycles.append({
+            'id': legs[0].id,
+            'name': next((leg.wheel_cycle_name for leg in legs if leg.wheel_cycle_name), ''),
+            'stock': legs[0].stock.upper(),
+            'position_ids': [leg.id for leg in legs],
+            'start_date': start,
+            'end_date': end,
+            'days_in_cycle': days,
+            'is_open': is_open,
+            'is_complete': any(leg.type == 'P' and leg.assigned == 'Yes' for leg in legs)
+            and any(leg.type == 'C' and leg.assigned == 'Yes' for leg in legs),
+            'premium_collected': sum(leg.premium * leg.num_contracts * 100 for leg in legs),
+            'option_pl': option_pl,
+            'stock_pl': stock_pl,
+            'net_pl': net_pl,
+            'shares_held': shares_held,
+            'break_even': basis_held / shares_held if shares_held else None,
+            'ar_of_cycle': ar,
+        })
+
+    cycles.sort(key=lambda cycle: (cycle['start_date'], cycle['id']), reverse=True)
+    return cycles
+
+
+def fan_out_notification(user_ids, notification_type, title, message, created_by,
+                         batch_size=NOTIFICATION_BATCH_SIZE, progress=None):
+    """
+    Create one Notification per recipient in fixed-size bulk_create batches.
+
+    user_ids can be any iterable (e.g. a values_list(...).iterator()), so the
+    full recipient list never has to be held in memory. All batches run in a
+    single transaction: either every recipient gets the notification or none
+    does. progress, if given, is called with the running total after each batch.
+
+    Returns the number of notifications created.
+    """
+    from Dashboard.models import Notification
+
+    created = 0
+    batch = []
+
+    def flush():
+        nonlocal created, batch
+        Notification.objects.bulk_create(batch, batch_size=batch_size)
+        created += len(batch)
+        batch = []
+        logger.info(f"Notification fan-out: {created} created so far")
+        if progress:
+            progress(created)
+
+    with transaction.atomic():
+        for user_id in user_ids:
+            batch.append(Notification(
+                user_id=user_id,
+                type=notification_type,
+                title=title,
+                message=message,
+                created_by=created_by
+            ))
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+
+    return created
+
+
+def unread_notifications_for(user):
+    """Unread notifications for a user: their own plus broadcasts without a receipt"""
+    from Dashboard.models import Notification, NotificationReceipt
+
+    receipts = NotificationReceipt.objects.filter(notification=OuterRef('pk'), user=user)
+    return Notification.objects.filter(
+        Q(user=user, is_read=False)
+        | Q(~Exists(receipts), user__isnull=True, created_at__gte=user.date_joined)
     )
 
-    for position in closed_positions:
-        # Check if expiration is in the future or today before 4:00 PM ET
-        if position.expiration > today_et:
-            # Expiration is in the future - reopen
-            position.close_date = None
-            position.premium_paid_to_close = None
-            position.close_fees = None
-            position.save()
-            reopened_count += 1
-        elif position.expiration == today_et and now_et.time() < closing_time:
-            # Expiration is today but before 4:00 PM ET - reopen
-            position.close_date = None
-            position.premium_paid_to_close = None
-            position.close_fees = None
-            position.save()
-            reopened_count += 1
-
-    return {'closed': closed_count, 'reopened': reopened_count}
\ No newline at end of file
+
+def sse_event(event, data):
+    """Format one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _unread_count_key(user_id, version=None):
+    if version is None:
+        version = cache.get_or_set(BROADCAST_VERSION_KEY, 0, timeout=None)
+    return f'notifications:unread:{version}:{user_id}'
+
+
+def get_unread_count(user_id, compute):
+    """
+    Return the user's cached unread count, calling compute() to fill a miss.
+    Without a shared cache (settings.UNREAD_COUNT_CACHE) every call computes.
+    """
+    if not settings.UNREAD_COUNT_CACHE:
+        return compute()
+    key = _unread_count_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = compute()
+        cache.set(key, count, UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+async def aget_unread_count(user_id, compute):
+    """Async variant of get_unread_count; compute is a coroutine function"""
+    if not settings.UNREAD_COUNT_CACHE:
+        return await compute()
+    version = await cache.aget_or_set(BROADCAST_VERSION_KEY, 0, timeout=None)
+    key = _unread_count_key(user_id, version)
+    count = await cache.aget(key)
+    if count is None:
+        count = await compute()
+        await cache.aset(key, count, UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def adjust_unread_count(user_id, delta):
+    """Shift a cached unread count; a missing entry is left to be recomputed"""
+    if not settings.UNREAD_COUNT_CACHE:
+        return
+    try:
+        cache.incr(_unread_count_key(user_id), delta)
+    except ValueError:
+        pass
+
+
+def set_unread_count(user_id, count):
+    if not settings.UNREAD_COUNT_CACHE:
+        return
+    cache.set(_unread_count_key(user_id), count, UNREAD_COUNT_TIMEOUT)
+
+
+def invalidate_unread_counts(user_ids):
+    """Drop cached unread counts so they are recomputed on next read"""
+    if not settings.UNREAD_COUNT_CACHE:
+        return
+    version = cache.get_or_set(BROADCAST_VERSION_KEY, 0, timeout=None)
+    cache.delete_many([_unread_count_key(user_id, version) for user_id in user_ids])
+
+
+def invalidate_all_unread_counts():
+    """Invalidate every user's cached unread count (used after a broadcast)"""
+    if not settings.UNREAD_COUNT_CACHE:
+        return
+    try:
+        cache.incr(BROADCAST_VERSION_KEY)
+    except ValueError:
+        cache.set(BROADCAST_VERSION_KEY, 1, timeout=None)
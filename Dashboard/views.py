@@ -1,20 +1,34 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
-from django.db.models import Sum, Count, Avg, Q
+from django.conf import settings
+from django.db.models import Sum, Count, Avg, Q, OuterRef, Subquery
 from django.utils import timezone
-from .models import Position, Feedback, Notification
+from .models import Position, Feedback, Notification, NotificationReceipt, ShareLot
 from .serializers import PositionSerializer, PositionSummarySerializer, FeedbackSerializer, NotificationSerializer, \
-    NotificationCreateSerializer
+    NotificationCreateSerializer, ShareLotSerializer, WheelCycleSerializer
 from django.contrib.auth.models import User
-import yfinance as yf
 import logging
+import time
+from datetime import date
 from decimal import Decimal
-from Dashboard.utils import auto_close_expired_positions
+from WheelTracker import instrumentation
+from WheelTracker.db_routers import replica_reads
+from Dashboard.ledger import post_positions, rebuild as rebuild_share_lots
+from Dashboard.utils import auto_close_expired_positions, fan_out_notification, get_unread_count, \
+    adjust_unread_count, set_unread_count, invalidate_unread_counts, invalidate_all_unread_counts, \
+    unread_notifications_for, wheel_cycles
 
 logger = logging.getLogger(__name__)
 
+# Monte Carlo paths per trade for the probabilities action, and the most
+# paths x daily steps one trade may simulate (compute grows with both)
+MONTE_CARLO_DEFAULT_PATHS = 10_000
+MONTE_CARLO_MAX_PATHS = 200_000
+MONTE_CARLO_MAX_PATH_STEPS = 20_000_000
+
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -23,6 +37,48 @@ def health_check(request):
     return Response({'status': 'ok', 'message': 'Django is running'})
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def perf_stats(request):
+    """Rolling p50/p95 query count and timings per view (enable with PERF_ENDPOINT=True)"""
+    if not (settings.PERF_INSTRUMENTATION and settings.PERF_ENDPOINT):
+        raise NotFound()
+    return Response({
+        'window_size': instrumentation.PERF_WINDOW_SIZE,
+        'views': instrumentation.perf_summary(),
+    })
+
+
+@api_view(['GET'])
+def price_history(request, ticker):
+    """
+    Daily closes for one underlying from the local price history store
+    (see manage.py load_price_history), for charts.
+    Query params (optional): start, end (YYYY-MM-DD, inclusive)
+    """
+    from Dashboard.price_history import get_store
+
+    try:
+        start, end = (
+            date.fromisoformat(request.query_params[name]) if request.query_params.get(name) else None
+            for name in ('start', 'end')
+        )
+    except ValueError:
+        return Response({'error': 'Invalid start or end. Use YYYY-MM-DD'}, status=400)
+
+    try:
+        days, closes = get_store().series(ticker, start, end)
+    except FileNotFoundError:
+        raise NotFound(f'No price history for {ticker.upper()}')
+    except ValueError:
+        return Response({'error': 'Invalid ticker'}, status=400)
+    return Response({
+        'ticker': ticker.upper(),
+        'dates': days.astype('datetime64[D]').astype(str).tolist(),
+        'closes': closes.round(4).tolist(),
+    })
+
+
 class PositionViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing wheel strategy positions.
@@ -47,7 +103,23 @@ class PositionViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         """Automatically assign the logged-in user to new positions"""
-        serializer.save(user=self.request.user)
+        position = serializer.save(user=self.request.user)
+        post_positions([position])
+
+    def perform_update(self, serializer):
+        """Keep the share-lot ledger in step with closes, assignments and edits"""
+        extra = {}
+        if 'assigned' in serializer.validated_data:
+            # An assignment entered by hand is not undone if the leg is reopened
+            extra['auto_assigned'] = False
+        post_positions([serializer.save(**extra)])
+
+    def perform_destroy(self, instance):
+        """Replay the ticker's share lots if the deleted leg had been posted to them"""
+        posted = set(instance.share_lot_entries.values_list('lot__user_id', 'lot__stock'))
+        instance.delete()
+        if posted:
+            rebuild_share_lots(keys=posted)
 
     def create(self, request, *args, **kwargs):
         """Override create to provide better error logging"""
@@ -63,6 +135,8 @@ class PositionViewSet(viewsets.ModelViewSet):
     #     """
     #     Fetch current option price from Yahoo Finance for a specific position
     #     """
+    #     import yfinance as yf  # Heavy (pandas, numpy, curl_cffi); import on first use only
+    #
     #     position = self.get_object()
     #
     #     try:
@@ -129,6 +203,8 @@ class PositionViewSet(viewsets.ModelViewSet):
     #     """
     #     Fetch current option prices for all open positions
     #     """
+    #     import yfinance as yf  # Heavy (pandas, numpy, curl_cffi); import on first use only
+    #
     #     open_positions = Position.objects.filter(close_date__isnull=True)
     #     updated_count = 0
     #     errors = []
@@ -173,6 +249,7 @@ class PositionViewSet(viewsets.ModelViewSet):
     #     })
 
     @action(detail=False, methods=['get'])
+    @replica_reads
     def summary(self, request):
         """
         Get summary statistics for all positions for the logged-in user
@@ -240,6 +317,7 @@ class PositionViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @replica_reads
     def by_stock(self, request):
         """
         Get positions grouped by stock
@@ -260,6 +338,7 @@ class PositionViewSet(viewsets.ModelViewSet):
         return Response(stocks)
 
     @action(detail=False, methods=['get'])
+    @replica_reads
     def roi_summary(self, request):
         """
         Get ROI summary for a date range
@@ -324,6 +403,293 @@ class PositionViewSet(viewsets.ModelViewSet):
             'end_date': end_date
         })
 
+    @action(detail=False, methods=['get'])
+    @replica_reads
+    def greeks(self, request):
+        """
+        Theoretical value and Greeks (Black-Scholes) for every open leg of the
+        user's book: each open position and both legs of each open credit spread.
+        Query params (all optional):
+          spot: underlying prices, e.g. AAPL:182.5,SPY:440 (default: last quote, then entry price)
+          iv: volatility, e.g. 0.3 or AAPL:0.35,SPY:0.18 (default 0.30)
+          rate: risk-free rate (default 0.045)
+        Leg exposures are signed dollars for the whole leg: delta in shares,
+        theta per calendar day, vega per volatility point.
+        """
+        from Dashboard import pricing
+        from Dashboard.option_book import OptionBook, parse_ticker_values
+
+        try:
+            _, spots = parse_ticker_values(request.query_params.get('spot'))
+            default_iv, ivs = parse_ticker_values(request.query_params.get('iv'))
+            rate = float(request.query_params.get('rate', pricing.DEFAULT_RISK_FREE_RATE))
+        except ValueError:
+            return Response(
+                {'error': 'Invalid spot, iv or rate. Use e.g. spot=AAPL:182.5&iv=0.3&rate=0.045'}, status=400
+            )
+
+        book = OptionBook.for_user(request.user, spots, ivs, default_iv)
+        values = book.greeks(rate)
+        exposures = {
+            'theoretical_value': book.quantity * values['price'],
+            'unrealized_pl': book.quantity * (values['price'] - book.premium),
+            'delta': book.quantity * values['delta'],
+            'dollar_delta': book.quantity * values['delta'] * book.spot,
+            'gamma': book.quantity * values['gamma'],
+            'theta': book.quantity * values['theta'],
+            'vega': book.quantity * values['vega'],
+        }
+
+        columns = {
+            'spot': book.spot, 'iv': book.iv, 'years_to_expiration': book.years,
+            'theoretical_price': values['price'], **exposures,
+        }
+        columns = {name: array.round(4).tolist() for name, array in columns.items()}
+        legs = [
+            {
+                'source': leg['source'], 'id': leg['source_id'], 'leg': leg['leg'], 'stock': leg['stock'],
+                'type': 'C' if leg['is_call'] else 'P', 'strike': leg['strike'],
+                'expiration': leg['expiration'], 'contracts': leg['contracts'], 'mark': leg['mark'],
+                **{name: column[i] for name, column in columns.items()},
+            }
+            for i, leg in enumerate(book.legs)
+        ]
+
+        per_ticker = {name: array.round(2).tolist() for name, array in book.by_ticker(exposures).items()}
+        by_ticker = [
+            {
+                'stock': ticker,
+                'spot': book.spot[book.ticker_index == i][0].item(),
+                'spot_source': book.spot_sources[ticker],
+                'legs': int((book.ticker_index == i).sum()),
+                **{name: values[i] for name, values in per_ticker.items()},
+            }
+            for i, ticker in enumerate(book.tickers.tolist())
+        ]
+
+        return Response({
+            'as_of': book.now.isoformat(),
+            'rate': rate,
+            'legs': legs,
+            'by_ticker': by_ticker,
+            'totals': {name: round(float(array.sum()), 2) for name, array in exposures.items()},
+            'missing_spot': book.missing_spot,
+        })
+
+    @action(detail=False, methods=['get'])
+    @replica_reads
+    def scenarios(self, request):
+        """
+        Stress test: P/L of the user's open legs over a grid of underlying moves
+        and days forward, per ticker and in total. Every underlying moves by the
+        same percentage and volatility is held constant.
+        Query params (all optional):
+          moves: percent moves, e.g. -20,-10,0,10,20 (default -20 to 20 in steps of 5)
+          days: calendar days forward, e.g. 0,7,30 (default 0,7,14,30)
+          spot, iv, rate: as for greeks
+        Matrices are indexed [move][day]. assignment_exposure is the collateral
+        (cash-secured puts) or max risk (credit spreads) of short legs that have
+        expired in the money by that day.
+        """
+        from Dashboard import pricing
+        from Dashboard.option_book import (
+            DEFAULT_SCENARIO_DAYS, DEFAULT_SCENARIO_MOVES, MAX_SCENARIO_CELLS, OptionBook, parse_ticker_values,
+            parse_values,
+        )
+
+        try:
+            moves = parse_values(request.query_params.get('moves'), DEFAULT_SCENARIO_MOVES)
+            days = parse_values(request.query_params.get('days'), DEFAULT_SCENARIO_DAYS)
+            _, spots = parse_ticker_values(request.query_params.get('spot'))
+            default_iv, ivs = parse_ticker_values(request.query_params.get('iv'))
+            rate = float(request.query_params.get('rate', pricing.DEFAULT_RISK_FREE_RATE))
+        except ValueError:
+            return Response(
+                {'error': 'Invalid moves, days, spot, iv or rate. Use e.g. moves=-10,0,10&days=0,7&spot=SPY:440'},
+                status=400,
+            )
+        if not moves or not days or min(moves) <= -100 or min(days) < 0:
+            return Response({'error': 'moves must be above -100 and days must not be negative'}, status=400)
+
+        book = OptionBook.for_user(request.user, spots, ivs, default_iv)
+        if len(moves) * len(days) * max(len(book), 1) > MAX_SCENARIO_CELLS:
+            return Response(
+                {'error': f'Grid too large: {len(moves)} moves x {len(days)} days x {len(book)} legs'}, status=400
+            )
+
+        per_ticker = book.scenarios([move / 100 for move in moves], days, rate)
+        by_ticker = [
+            {
+                'stock': ticker,
+                'spot': book.spot[book.ticker_index == i][0].item(),
+                'spot_source': book.spot_sources[ticker],
+                'legs': int((book.ticker_index == i).sum()),
+                **{name: array[:, :, i].round(2).tolist() for name, array in per_ticker.items()},
+            }
+            for i, ticker in enumerate(book.tickers.tolist())
+        ]
+
+        return Response({
+            'as_of': book.now.isoformat(),
+            'rate': rate,
+            'moves': moves,
+            'days': days,
+            'by_ticker': by_ticker,
+            'totals': {name: array.sum(axis=-1).round(2).tolist() for name, array in per_ticker.items()},
+            'missing_spot': book.missing_spot,
+        })
+
+    @action(detail=False, methods=['get'])
+    @replica_reads
+    def probabilities(self, request):
+        """
+        Monte Carlo probability of profit, probability of touching the short
+        strike, expected P/L and tail loss (mean of the worst 5%) at expiration
+        for every open credit spread and short put.
+        Query params (all optional):
+          paths: simulated paths per trade (default 10000, at most 200000, and at
+            most 20 million paths x trading days to the latest expiration)
+          seed: random seed; the same seed gives the same results (default 0)
+          spot, iv, rate: as for greeks
+        """
+        from Dashboard import pricing
+        from Dashboard.monte_carlo import step_count
+        from Dashboard.option_book import OptionBook, outcome_probabilities, parse_ticker_values
+
+        try:
+            paths = int(request.query_params.get('paths', MONTE_CARLO_DEFAULT_PATHS))
+            seed = int(request.query_params.get('seed', 0))
+            _, spots = parse_ticker_values(request.query_params.get('spot'))
+            default_iv, ivs = parse_ticker_values(request.query_params.get('iv'))
+            rate = float(request.query_params.get('rate', pricing.DEFAULT_RISK_FREE_RATE))
+        except ValueError:
+            return Response(
+                {'error': 'Invalid paths, seed, spot, iv or rate. Use e.g. paths=10000&seed=1&spot=AAPL:182.5'},
+                status=400,
+            )
+        if not 1 <= paths <= MONTE_CARLO_MAX_PATHS or seed < 0:
+            return Response(
+                {'error': f'paths must be between 1 and {MONTE_CARLO_MAX_PATHS} and seed must not be negative'},
+                status=400,
+            )
+
+        book = OptionBook.for_user(request.user, spots, ivs, default_iv)
+        steps = step_count(book.years.max()) if len(book.years) else 1
+        if paths * steps > MONTE_CARLO_MAX_PATH_STEPS:
+            return Response(
+                {'error': f'paths must be at most {MONTE_CARLO_MAX_PATH_STEPS // steps} for a book whose '
+                          f'latest expiration is {steps} trading days away'},
+                status=400,
+            )
+        start = time.perf_counter()
+        trades, cache_hits = outcome_probabilities(book, paths, seed, rate)
+        return Response({
+            'as_of': book.now.isoformat(),
+            'rate': rate,
+            'paths': paths,
+            'seed': seed,
+            'trades': trades,
+            'cache_hits': cache_hits,
+            'seconds': round(time.perf_counter() - start, 4),
+            'missing_spot': book.missing_spot,
+        })
+
+    @action(detail=False, methods=['get'])
+    @replica_reads
+    def cycles(self, request):
+        """
+        Every wheel cycle (positions linked through related_to) with its
+        premium collected, option and stock P/L, days in cycle, completion
+        state, break-even on shares still held, and AR% on the whole cycle.
+        Query params (optional): stock, and complete=true|false
+        """
+        cycles = wheel_cycles(request.user)
+
+        stock = request.query_params.get('stock')
+        if stock:
+            cycles = [cycle for cycle in cycles if cycle['stock'] == stock.upper()]
+        complete = request.query_params.get('complete')
+        if complete is not None:
+            if complete.lower() not in ('true', 'false'):
+                return Response({'error': 'Invalid complete. Use complete=true or complete=false'}, status=400)
+            cycles = [cycle for cycle in cycles if cycle['is_complete'] == (complete.lower() == 'true')]
+
+        return Response(WheelCycleSerializer(cycles, many=True).data)
+
+    @action(detail=False, methods=['post'])
+    def auto_link(self, request):
+        """
+        Link unlinked positions into wheel cycles (an assigned put followed by
+        covered calls, and rolled puts) and break related_to links that loop.
+        Query params (optional): dry_run=true to return the links without saving them
+        """
+        from Dashboard.wheel_links import auto_link_wheel_cycles
+
+        dry_run = request.query_params.get('dry_run', 'false').lower() == 'true'
+        result = auto_link_wheel_cycles([request.user.id], dry_run=dry_run)
+        return Response({
+            'positions': result['positions'],
+            'linked': result['linked'],
+            'loops_broken': result['loops_broken'],
+            'dry_run': dry_run,
+            'links': [{'id': position_id, 'related_to': parent} for position_id, parent in result['links'].items()],
+        })
+
+    @action(detail=False, methods=['get'])
+    @replica_reads
+    def share_lots(self, request):
+        """
+        Share lots from put assignments, with their adjusted cost basis (the
+        break-even per share) and, once called away, realized P/L.
+        Query params (optional): stock, and open=true|false
+        """
+        lots = ShareLot.objects.filter(user=request.user)
+        stock = request.query_params.get('stock')
+        if stock:
+            lots = lots.filter(stock=stock.upper())
+        is_open = request.query_params.get('open')
+        if is_open is not None:
+            if is_open.lower() not in ('true', 'false'):
+                return Response({'error': 'Invalid open. Use open=true or open=false'}, status=400)
+            lots = lots.filter(sold_on__isnull=is_open.lower() == 'true')
+
+        lots = list(lots)
+        held = [lot for lot in lots if lot.is_open]
+        shares_held = sum(lot.shares for lot in held)
+        cost_basis = sum((lot.adjusted_cost_basis * lot.shares for lot in held), Decimal('0.00'))
+        return Response({
+            'lots': ShareLotSerializer(lots, many=True).data,
+            'shares_held': shares_held,
+            'adjusted_cost_basis': cost_basis,
+            'break_even': (cost_basis / shares_held).quantize(Decimal('0.0001')) if shares_held else None,
+            'realized_pl': sum((lot.realized_pl for lot in lots if not lot.is_open), Decimal('0.00')),
+        })
+
+    @action(detail=False, methods=['post'])
+    def solve_iv(self, request):
+        """
+        Back out and store the implied volatility of every open leg from its
+        current mark (see refresh_quotes). The greeks action uses the stored
+        values when the request does not pass an iv.
+        Query params (optional): spot and rate, as for greeks.
+        """
+        from Dashboard import pricing
+        from Dashboard.option_book import parse_ticker_values, update_implied_volatilities
+
+        try:
+            _, spots = parse_ticker_values(request.query_params.get('spot'))
+            rate = float(request.query_params.get('rate', pricing.DEFAULT_RISK_FREE_RATE))
+        except ValueError:
+            return Response({'error': 'Invalid spot or rate. Use e.g. spot=AAPL:182.5&rate=0.045'}, status=400)
+
+        start = time.perf_counter()
+        solved, unsolved = update_implied_volatilities(request.user, spots, rate)
+        return Response({
+            'solved': solved,
+            'unsolved': unsolved,
+            'seconds': round(time.perf_counter() - start, 4),
+        })
+
 
 class FeedbackViewSet(viewsets.ModelViewSet):
     """
@@ -368,71 +734,110 @@ class NotificationViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        """Filter notifications by current user"""
-        return Notification.objects.filter(user=self.request.user)
+        """
+        Notifications sent to the current user plus broadcasts sent since they joined.
+        Broadcast read state comes from the user's NotificationReceipt, if any.
+        """
+        user = self.request.user
+        receipts = NotificationReceipt.objects.filter(notification=OuterRef('pk'), user=user)
+        return Notification.objects.filter(
+            Q(user=user) | Q(user__isnull=True, created_at__gte=user.date_joined)
+        ).annotate(broadcast_read_at=Subquery(receipts.values('read_at')[:1]))
+
+    def get_unread_queryset(self):
+        """Unread notifications for the current user (broadcasts without a receipt)"""
+        return unread_notifications_for(self.request.user)
+
+    def get_cached_unread_count(self):
+        """Unread count for the current user, served from the cache when possible"""
+        return get_unread_count(self.request.user.id, lambda: self.get_unread_queryset().count())
+
+    def _invalidate_counts_for(self, notification):
+        if notification.user_id is None:
+            invalidate_all_unread_counts()
+        else:
+            invalidate_unread_counts([notification.user_id])
+
+    def perform_create(self, serializer):
+        notification = serializer.save()
+        self._invalidate_counts_for(notification)
+
+    def perform_update(self, serializer):
+        """Broadcasts are shared by every user, so only admins may edit them"""
+        if serializer.instance.user_id is None and not self.request.user.is_staff:
+            raise PermissionDenied("Broadcast notifications can only be changed by an admin")
+        notification = serializer.save()
+        self._invalidate_counts_for(notification)
+
+    def perform_destroy(self, instance):
+        """Broadcasts are shared by every user, so only admins may delete them"""
+        if instance.user_id is None and not self.request.user.is_staff:
+            raise PermissionDenied("Broadcast notifications can only be deleted by an admin")
+        self._invalidate_counts_for(instance)
+        instance.delete()
 
     @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
     def send_notification(self, request):
-        """Send notification to users (admin only)"""
+        """
+        Send notification to users (admin only).
+        A notification to all users is stored once as a broadcast; explicit
+        recipients get one row each, inserted in fixed-size batches.
+        """
         try:
             serializer = NotificationCreateSerializer(data=request.data)
-            serializer.is_valid(raise_exception=True)
+            if not serializer.is_valid():
+                logger.error(f"Invalid notification request: {serializer.errors}")
+                errors = serializer.errors
+                error = errors['user_ids'][0] if 'user_ids' in errors else errors
+                return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
 
+            # Already de-duplicated and checked for existence by the serializer
             user_ids = serializer.validated_data.get('user_ids', [])
-            notification_type = serializer.validated_data['type']
-            title = serializer.validated_data['title']
-            message = serializer.validated_data['message']
-
-            if user_ids:
-                # Send to specific users
-                # Verify all user IDs exist first
-                existing_user_ids = list(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
-                if len(existing_user_ids) != len(user_ids):
-                    missing_ids = set(user_ids) - set(existing_user_ids)
-                    logger.error(f"User IDs do not exist: {missing_ids}")
-                    return Response({
-                        'error': f'Some user IDs do not exist: {missing_ids}'
-                    }, status=status.HTTP_400_BAD_REQUEST)
-
-                notifications = [
-                    Notification(
-                        user_id=user_id,
-                        type=notification_type,
-                        title=title,
-                        message=message,
-                        created_by=request.user
-                    ) for user_id in existing_user_ids
-                ]
-            else:
-                # Send to all users
-                users = list(User.objects.all())
-                if not users:
+            if not user_ids:
+                # Send to all users: store a single broadcast, read state is tracked per user
+                recipient_count = User.objects.count()
+                if not recipient_count:
                     logger.warning("No users found in the system")
                     return Response({
                         'error': 'No users found in the system'
                     }, status=status.HTTP_400_BAD_REQUEST)
 
-                notifications = [
-                    Notification(
-                        user=user,
-                        type=notification_type,
-                        title=title,
-                        message=message,
-                        created_by=request.user
-                    ) for user in users
-                ]
-
-            # Bulk create notifications
+                Notification.objects.create(
+                    user=None,
+                    type=serializer.validated_data['type'],
+                    title=serializer.validated_data['title'],
+                    message=serializer.validated_data['message'],
+                    created_by=request.user
+                )
+                invalidate_all_unread_counts()
+                logger.info(f"Broadcast notification to {recipient_count} user(s)")
+                return Response({
+                    'success': True,
+                    'message': f'Notification sent to {recipient_count} user(s)',
+                    'count': recipient_count,
+                    'broadcast': True
+                }, status=status.HTTP_201_CREATED)
+
+            batches = []
             try:
-                created_notifications = Notification.objects.bulk_create(notifications)
-                logger.info(f"Successfully created {len(created_notifications)} notifications")
+                count = fan_out_notification(
+                    user_ids,
+                    notification_type=serializer.validated_data['type'],
+                    title=serializer.validated_data['title'],
+                    message=serializer.validated_data['message'],
+                    created_by=request.user,
+                    progress=batches.append
+                )
+                invalidate_unread_counts(user_ids)
+                logger.info(f"Successfully created {count} notifications in {len(batches)} batch(es)")
                 return Response({
                     'success': True,
-                    'message': f'Notification sent to {len(created_notifications)} user(s)',
-                    'count': len(created_notifications)
+                    'message': f'Notification sent to {count} user(s)',
+                    'count': count,
+                    'batches': len(batches)
                 }, status=status.HTTP_201_CREATED)
             except Exception as db_error:
-                logger.error(f"Database error during bulk_create: {str(db_error)}", exc_info=True)
+                logger.error(f"Database error during notification fan-out: {str(db_error)}", exc_info=True)
                 return Response({
                     'error': f'Database error: {str(db_error)}'
                 }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -447,19 +852,37 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def mark_as_read(self, request, pk=None):
         """Mark notification as read"""
         notification = self.get_object()
-        notification.is_read = True
-        notification.read_at = timezone.now()
-        notification.save()
+        if notification.user_id is None:
+            # Broadcast: record a receipt instead of touching the shared row
+            receipt, was_unread = NotificationReceipt.objects.get_or_create(
+                notification=notification,
+                user=request.user
+            )
+            notification.broadcast_read_at = receipt.read_at
+        else:
+            was_unread = not notification.is_read
+            notification.is_read = True
+            notification.read_at = timezone.now()
+            notification.save()
+        if was_unread:
+            adjust_unread_count(request.user.id, -1)
         serializer = self.get_serializer(notification)
         return Response(serializer.data)
 
     @action(detail=False, methods=['post'])
     def mark_all_as_read(self, request):
         """Mark all notifications as read for current user"""
-        updated = self.get_queryset().filter(is_read=False).update(
+        unread = self.get_unread_queryset()
+        updated = unread.filter(user=request.user).update(
             is_read=True,
             read_at=timezone.now()
         )
+        receipts = NotificationReceipt.objects.bulk_create([
+            NotificationReceipt(notification_id=notification_id, user=request.user)
+            for notification_id in unread.filter(user__isnull=True).values_list('id', flat=True)
+        ], ignore_conflicts=True)
+        updated += len(receipts)
+        set_unread_count(request.user.id, 0)
         return Response({
             'success': True,
             'message': f'Marked {updated} notification(s) as read',
@@ -468,9 +891,11 @@ class NotificationViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
-        """Get count of unread notifications"""
-        count = self.get_queryset().filter(is_read=False).count()
-        return Response({'count': count})
+        """
+        Get count of unread notifications.
+        To be told when it changes, use the async event stream at /api/notifications/stream/.
+        """
+        return Response({'count': self.get_cached_unread_count()})
 
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
     def users_list(self, request):
@@ -0,0 +1,133 @@
+"""
+Infer wheel-cycle links (related_to) for positions entered without them.
+
+For each user, positions are sorted by ticker and open date and swept once.
+The sweep keeps the chains that can still be extended (their last leg, or
+"tail"), and links each unlinked position to the best tail it continues:
+
+- a covered call continues an assigned put, or a covered call that was not
+  called away, opened on or after that leg closed
+- a put continues a put that closed without assignment (a roll), opened
+  within AUTO_LINK_ROLL_DAYS of its close
+
+A called-away call completes its cycle, and a put is never linked after shares
+are held. Union-find tracks which positions are already connected. Existing
+links that loop back on themselves are broken first, and a link that would
+create a loop is never added, so get_wheel_cycle_positions always terminates.
+Existing links are kept as they are.
+"""
+from collections import namedtuple
+from Dashboard.models import Position
+from Dashboard.utils import DisjointSet
+
+# A put opened this many days after the previous put closed still rolls it
+AUTO_LINK_ROLL_DAYS = 7
+
+# Rows per UPDATE when writing links
+BATCH_SIZE = 1000
+
+_FIELDS = ('id', 'user_id', 'stock', 'type', 'assigned', 'open_date', 'close_date', 'related_to_id')
+_Row = namedtuple('_Row', _FIELDS)
+
+
+def _continues(tail, leg):
+    """Whether leg (a row) can be the next leg of the chain ending at tail"""
+    if tail.close_date is None or leg.open_date < tail.close_date:
+        return False
+    if tail.type == 'P' and tail.assigned == 'Yes':
+        return leg.type == 'C'
+    if tail.type == 'C':
+        return leg.type == 'C' and tail.assigned == 'No'
+    return leg.type == 'P' and (leg.open_date - tail.close_date).days <= AUTO_LINK_ROLL_DAYS
+
+
+def _link_user(rows):
+    """
+    Links for one user's rows: ({position_id: related_to_id}, ids whose
+    related_to closed a loop and is cleared)
+    """
+    by_id = {row.id: row for row in rows}
+    # Links to another user's (or a missing) position are left alone
+    linked = [row for row in rows if row.related_to_id in by_id]
+    connected = DisjointSet()
+    parent = {}
+    broken = []
+    # A loop is cut at a link pointing forward in time (to a leg opened later),
+    # which is the bad one; otherwise at the newest link, the same on every run
+    linked.sort(key=lambda row: (by_id[row.related_to_id].open_date > row.open_date, row.open_date, row.id))
+    for row in linked:
+        if connected.union(row.id, row.related_to_id):
+            parent[row.id] = row.related_to_id
+        else:
+            broken.append(row.id)
+    has_successor = set(parent.values())
+
+    links = {}
+    tails = {}  # ticker: rows that may still be extended
+    for row in sorted(rows, key=lambda row: (row.stock.upper(), row.open_date, row.id)):
+        candidates = tails.setdefault(row.stock.upper(), [])
+        if row.id not in parent:
+            fits = [tail for tail in candidates if _continues(tail, row)]
+            # The most recently closed chain it continues, skipping any it is already part of
+            for tail in sorted(fits, key=lambda tail: (tail.close_date, tail.id), reverse=True):
+                if connected.union(row.id, tail.id):
+                    links[row.id] = parent[row.id] = tail.id
+                    has_successor.add(tail.id)
+                    break
+
+        # Rolls only reach AUTO_LINK_ROLL_DAYS back; later rows open later still
+        candidates[:] = [
+            tail for tail in candidates
+            if tail.id not in has_successor
+            and not (tail.type == 'P' and tail.assigned == 'No'
+                     and (row.open_date - tail.close_date).days > AUTO_LINK_ROLL_DAYS)
+        ]
+        if row.id not in has_successor and row.close_date is not None \
+                and not (row.type == 'C' and row.assigned == 'Yes'):
+            candidates.append(row)
+
+    return links, broken
+
+
+def auto_link_wheel_cycles(user_ids=None, dry_run=False):
+    """
+    Infer related_to for unlinked positions and break looping links, for
+    every user or the given users. Streams one ordered query, then writes
+    every change with bulk_update (unless dry_run).
+    Returns {'positions': n, 'linked': n, 'loops_broken': n, 'links': {id: related_to_id}}.
+    """
+    positions = Position.objects.all()
+    if user_ids is not None:
+        positions = positions.filter(user_id__in=user_ids)
+    positions = positions.order_by('user_id').values_list(*_FIELDS)
+
+    scanned = 0
+    links, broken = {}, []
+    rows, user_id = [], None
+
+    def flush():
+        user_links, user_broken = _link_user(rows)
+        links.update(user_links)
+        broken.extend(user_broken)
+
+    for values in positions.iterator(chunk_size=10 * BATCH_SIZE):
+        row = _Row(*values)
+        if rows and row.user_id != user_id:
+            flush()
+            rows = []
+        user_id = row.user_id
+        rows.append(row)
+        scanned += 1
+    if rows:
+        flush()
+
+    if not dry_run:
+        # A broken link may have been replaced by an inferred one
+        changes = {position_id: None for position_id in broken}
+        changes.update(links)
+        Position.objects.bulk_update(
+            [Position(id=position_id, related_to_id=parent) for position_id, parent in changes.items()],
+            ['related_to'], batch_size=BATCH_SIZE,
+        )
+
+    return {'positions': scanned, 'linked': len(links), 'loops_broken': len(broken), 'links': links}
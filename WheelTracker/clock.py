@@ -0,0 +1,75 @@
+"""
+Shared "as-of" clock for every day-count calculation.
+
+Position and CreditSpread metrics and the expiry job all ask this module for
+the current time in US/Eastern instead of calling datetime.now() themselves,
+so both apps agree on the session date near midnight and the timezone
+conversion happens once per request (see ClockMiddleware).
+
+The clock can be pinned:
+- per block of code with ``frozen(...)`` (tests, backtests, management commands)
+- process-wide with the ``CLOCK_AS_OF`` setting, e.g. ``2025-01-17T16:30``
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, time
+import pytz
+
+ET_TZ = pytz.timezone('US/Eastern')
+
+# ET datetime pinned by frozen(); None means "read the wall clock"
+_frozen_now = ContextVar('clock_frozen_now', default=None)
+
+
+def _to_et(value):
+    """Coerce a date, naive datetime (taken as ET) or aware datetime to aware ET"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        # A bare date pins the start of that day
+        value = datetime.combine(value, time.min)
+    if value.tzinfo is None:
+        return ET_TZ.localize(value)
+    return value.astimezone(ET_TZ)
+
+
+def _configured_now():
+    from django.conf import settings
+
+    as_of = getattr(settings, 'CLOCK_AS_OF', None)
+    if as_of:
+        return _to_et(as_of)
+    return datetime.now(ET_TZ)
+
+
+def now_et():
+    """Return the current datetime in US/Eastern"""
+    now = _frozen_now.get()
+    if now is None:
+        now = _configured_now()
+    return now
+
+
+def today_et():
+    """Return the current session date in US/Eastern"""
+    return now_et().date()
+
+
+def as_of_key():
+    """Return the as-of date as a string suitable for cache keys"""
+    return today_et().isoformat()
+
+
+@contextmanager
+def frozen(at=None):
+    """
+    Pin the clock for the duration of the block.
+
+    With no argument the current time is captured once, which is how
+    ClockMiddleware gives each request a single consistent "now".
+    """
+    token = _frozen_now.set(_configured_now() if at is None else _to_et(at))
+    try:
+        yield
+    finally:
+        _frozen_now.reset(token)
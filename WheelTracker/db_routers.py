@@ -0,0 +1,100 @@
+"""
+Read-replica routing for read-only analytics endpoints.
+
+Nothing goes to the replica by default. Views opt in with ``@replica_reads``
+(summaries, ROI, by-stock breakdowns) or ``.using(read_alias(user_id))``
+(streamed exports, which run after the view returns). Writes and the expiry
+job always use the primary.
+
+Read-your-writes: a user who has just changed data is pinned to the primary
+for ``DB_REPLICA_STICKY_SECONDS``, so a summary loaded right after editing a
+position never shows the old values because of replication lag. The pin is
+stored in the cache, so it is shared by all workers when REDIS_URL is set.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_ALIAS = 'replica'
+
+# True while the current block has opted in to reading from the replica
+_reading_from_replica = ContextVar('db_reading_from_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def _pin_key(user_id):
+    return f'db:primary_pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Send this user's reads to the primary for the next few seconds"""
+    if user_id is not None and replica_configured():
+        cache.set(_pin_key(user_id), True, settings.DB_REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    return user_id is not None and cache.get(_pin_key(user_id)) is not None
+
+
+def read_alias(user_id=None):
+    """Database alias analytics reads for this user should use"""
+    if replica_configured() and not is_pinned(user_id):
+        return REPLICA_ALIAS
+    return DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def replica(user_id=None):
+    """Route reads in the block to the replica, unless the user is pinned to the primary"""
+    token = _reading_from_replica.set(read_alias(user_id) == REPLICA_ALIAS)
+    try:
+        yield
+    finally:
+        _reading_from_replica.reset(token)
+
+
+@contextmanager
+def primary():
+    """Route reads in the block to the primary, e.g. read-then-write jobs"""
+    token = _reading_from_replica.set(False)
+    try:
+        yield
+    finally:
+        _reading_from_replica.reset(token)
+
+
+def replica_reads(view_method):
+    """Decorator for read-only viewset actions: read from the replica for request.user"""
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        with replica(request.user.id):
+            return view_method(self, request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """Reads go to the replica only inside replica(); everything else uses the primary"""
+
+    def db_for_read(self, model, **hints):
+        if _reading_from_replica.get():
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives schema changes through replication
+        return db != REPLICA_ALIAS
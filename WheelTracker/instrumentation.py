@@ -0,0 +1,168 @@
+"""
+Per-request performance instrumentation.
+
+Off unless PERF_INSTRUMENTATION=True. RequestInstrumentationMiddleware
+(WheelTracker/middleware.py) then opens a RequestMetrics for every request;
+while it is active:
+- every SQL statement on any connection is counted and timed
+- serializers using TimedRepresentationMixin add their to_representation time
+  (which includes any queries they issue, e.g. wheel-cycle lookups)
+
+The totals are logged as one key=value line on the
+``WheelTracker.instrumentation`` logger and kept in a rolling window per view
+for /api/admin/perf/ (the window is per process). They are also returned in a
+Server-Timing header, but only to staff users or when DEBUG is on.
+"""
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Requests per view kept for the rolling percentiles
+PERF_WINDOW_SIZE = 500
+
+# Requests issuing more queries than this are logged as warnings (likely N+1)
+QUERY_COUNT_WARNING = 50
+
+_current = ContextVar('request_metrics', default=None)
+
+_window_lock = Lock()
+_windows = defaultdict(lambda: deque(maxlen=PERF_WINDOW_SIZE))
+
+
+class RequestMetrics:
+    """Counters for a single request; times are in seconds"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_db_time = 0.0  # Part of db_time spent inside serializers
+        self.serializer_depth = 0
+
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        total = self.total_time()
+        return {
+            'total_ms': total * 1000,
+            'db_ms': self.db_time * 1000,
+            'queries': self.queries,
+            'serializer_ms': self.serializer_time * 1000,
+            # Everything that is neither waiting on the database nor serializing
+            'python_ms': max(total - self.db_time - (self.serializer_time - self.serializer_db_time), 0) * 1000,
+        }
+
+
+def current_metrics():
+    """Return the RequestMetrics of the request being handled, or None"""
+    return _current.get()
+
+
+@contextmanager
+def measure():
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """connection.execute_wrapper hook: time the statement if a request is being measured"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.db_time += elapsed
+        metrics.queries += 1
+        if metrics.serializer_depth:
+            metrics.serializer_db_time += elapsed
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created receiver: attach record_query to the connection once"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedRepresentationMixin:
+    """Serializer mixin that adds to_representation time to the current request"""
+
+    def to_representation(self, instance):
+        metrics = _current.get()
+        if metrics is None:
+            return super().to_representation(instance)
+        # Only the outermost serializer is timed, so nested ones are not double counted
+        metrics.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_depth -= 1
+            if metrics.serializer_depth == 0:
+                metrics.serializer_time += time.perf_counter() - start
+
+
+def server_timing(values):
+    """Format metrics as a Server-Timing header value"""
+    return ', '.join([
+        f"db;dur={values['db_ms']:.1f};desc=\"{values['queries']} queries\"",
+        f"serializer;dur={values['serializer_ms']:.1f}",
+        f"python;dur={values['python_ms']:.1f}",
+        f"total;dur={values['total_ms']:.1f}",
+    ])
+
+
+def record_request(view, status_code, values):
+    """Log one request and add it to the view's rolling window"""
+    line = (
+        f"request view=\"{view}\" status={status_code} total_ms={values['total_ms']:.1f} "
+        f"db_ms={values['db_ms']:.1f} queries={values['queries']} "
+        f"serializer_ms={values['serializer_ms']:.1f} python_ms={values['python_ms']:.1f}"
+    )
+    if values['queries'] > QUERY_COUNT_WARNING:
+        logger.warning(line)
+    else:
+        logger.info(line)
+    with _window_lock:
+        _windows[view].append(values)
+
+
+def _percentile(ordered, fraction):
+    return ordered[round(fraction * (len(ordered) - 1))]
+
+
+def perf_summary():
+    """Rolling p50/p95 of each metric per view, slowest p95 total first"""
+    with _window_lock:
+        windows = {view: list(samples) for view, samples in _windows.items()}
+
+    summary = []
+    for view, samples in windows.items():
+        row = {'view': view, 'requests': len(samples)}
+        for key in ('total_ms', 'db_ms', 'queries', 'serializer_ms', 'python_ms'):
+            ordered = sorted(sample[key] for sample in samples)
+            row[key] = {
+                'p50': round(_percentile(ordered, 0.5), 1),
+                'p95': round(_percentile(ordered, 0.95), 1),
+            }
+        summary.append(row)
+    summary.sort(key=lambda row: -row['total_ms']['p95'])
+    return summary
+
+
+def reset():
+    with _window_lock:
+        _windows.clear()
@@ -0,0 +1,154 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.permissions import SAFE_METHODS
+from whitenoise.middleware import WhiteNoiseMiddleware
+from WheelTracker import clock, db_routers, instrumentation
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Measure query count, DB time, serializer time and Python time per request
+    and report them in a log line, /api/admin/perf/ and, for staff users or
+    with DEBUG on, a Server-Timing header. Listed first so the total covers
+    every other middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERF_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        # Every connection, including those opened later in worker threads
+        connection_created.connect(instrumentation.install_query_recorder)
+        for connection in connections.all(initialized_only=True):
+            instrumentation.install_query_recorder(None, connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with instrumentation.measure() as metrics:
+            response = self.get_response(request)
+        return self._report(request, response, metrics, self._shows_timing(request))
+
+    async def __acall__(self, request):
+        with instrumentation.measure() as metrics:
+            response = await self.get_response(request)
+        # request.user may still be the lazy session user, which queries the database
+        shows_timing = settings.DEBUG or await sync_to_async(self._shows_timing)(request)
+        return self._report(request, response, metrics, shows_timing)
+
+    @staticmethod
+    def _shows_timing(request):
+        """Timings describe the server, so only staff (or a DEBUG server) get the header"""
+        user = getattr(request, 'user', None)
+        return settings.DEBUG or bool(user and user.is_staff)
+
+    def _report(self, request, response, metrics, shows_timing):
+        values = metrics.as_dict()
+        match = request.resolver_match
+        view = f"{request.method} {match.view_name if match else 'unresolved'}"
+        if shows_timing:
+            response['Server-Timing'] = instrumentation.server_timing(values)
+        instrumentation.record_request(view, response.status_code, values)
+        return response
+
+
+class ClockMiddleware:
+    """Evaluate every request against a single as-of time in US/Eastern"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Stay async under ASGI so async views are not bounced through a thread
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with clock.frozen():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with clock.frozen():
+            return await self.get_response(request)
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Pin a user to the primary database after a successful write request, so
+    their next analytics reads see their own changes (see WheelTracker.db_routers).
+    Must run outside the view: DRF only authenticates the JWT user inside it.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self._is_write(request, response):
+            self._pin(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self._is_write(request, response):
+            # request.user may be a lazy session lookup
+            await sync_to_async(self._pin)(request)
+        return response
+
+    def _is_write(self, request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400
+
+    def _pin(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            db_routers.pin_to_primary(user.id)
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise middleware that can also run natively under ASGI.
+
+    Upstream WhiteNoiseMiddleware is sync-only, which makes Django run every
+    request below it in the single sync thread and serialises all async views.
+    Static lookups are in-memory, so only serving a matched file leaves the loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,61 @@
+# Generated by `python manage.py generate_trading_calendar` -- do not edit.
+# Sorted date ordinals (date.toordinal()) for bisect lookups in trading_calendar.py
+from array import array
+
+FIRST_YEAR = 2000
+LAST_YEAR = 2040
+
+HOLIDAYS = array('i', [
+    730136, 730171, 730231, 730269, 730305, 730367, 730447, 730479, 730486, 730500,
+    730535, 730588, 730633, 730670, 730731, 730739, 730740, 730741, 730742, 730811,
+    730844, 730851, 730871, 730899, 730938, 730997, 731035, 731095, 731182, 731209,
+    731216, 731235, 731263, 731323, 731361, 731400, 731459, 731546, 731574, 731581,
+    731599, 731627, 731680, 731732, 731743, 731767, 731830, 731910, 731939, 731963,
+    731998, 732030, 732096, 732131, 732194, 732274, 732306, 732313, 732327, 732362,
+    732415, 732460, 732496, 732558, 732638, 732670, 732677, 732678, 732691, 732726,
+    732772, 732824, 732861, 732922, 733002, 733035, 733042, 733062, 733090, 733122,
+    733188, 733227, 733286, 733373, 733401, 733408, 733426, 733454, 733507, 733552,
+    733591, 733657, 733737, 733766, 733773, 733790, 733818, 733864, 733923, 733958,
+    734021, 734101, 734130, 734154, 734189, 734249, 734287, 734322, 734385, 734465,
+    734497, 734504, 734518, 734553, 734599, 734651, 734688, 734749, 734805, 734806,
+    734829, 734862, 734869, 734889, 734917, 734956, 735015, 735053, 735113, 735200,
+    735227, 735234, 735253, 735281, 735341, 735379, 735418, 735477, 735564, 735592,
+    735599, 735617, 735645, 735691, 735743, 735782, 735848, 735928, 735957, 735964,
+    735981, 736009, 736048, 736114, 736149, 736212, 736292, 736324, 736331, 736345,
+    736380, 736433, 736478, 736514, 736576, 736656, 736688, 736695, 736709, 736744,
+    736783, 736842, 736879, 736940, 737020, 737033, 737053, 737060, 737080, 737108,
+    737168, 737206, 737244, 737304, 737391, 737418, 737425, 737444, 737472, 737525,
+    737570, 737609, 737675, 737755, 737784, 737791, 737808, 737836, 737882, 737941,
+    737976, 738039, 738119, 738148, 738172, 738207, 738260, 738305, 738326, 738340,
+    738403, 738483, 738515, 738522, 738536, 738571, 738617, 738669, 738690, 738705,
+    738767, 738847, 738879, 738886, 738900, 738935, 738974, 739033, 739056, 739071,
+    739131, 739218, 739245, 739252, 739260, 739271, 739299, 739359, 739397, 739421,
+    739436, 739495, 739582, 739610, 739617, 739635, 739663, 739709, 739761, 739786,
+    739800, 739866, 739946, 739975, 739982, 739999, 740027, 740066, 740132, 740150,
+    740167, 740230, 740310, 740339, 740363, 740398, 740451, 740496, 740517, 740532,
+    740594, 740674, 740706, 740713, 740727, 740762, 740801, 740860, 740882, 740897,
+    740958, 741038, 741071, 741078, 741098, 741126, 741186, 741224, 741247, 741262,
+    741322, 741409, 741436, 741443, 741462, 741490, 741543, 741588, 741612, 741627,
+    741686, 741773, 741801, 741808, 741826, 741854, 741893, 741959, 741977, 741994,
+    742057, 742137, 742166, 742190, 742225, 742278, 742323, 742344, 742358, 742421,
+    742501, 742533, 742540, 742554, 742589, 742635, 742687, 742708, 742723, 742785,
+    742865, 742897, 742904, 742918, 742953, 742985, 743051, 743073, 743088, 743149,
+    743229, 743262, 743269, 743289, 743317, 743370, 743415, 743439, 743454, 743513,
+    743600, 743628, 743635, 743653, 743681, 743727, 743779, 743804, 743818, 743884,
+    743964, 743993, 744000, 744017, 744045, 744112, 744150, 744168, 744185, 744248,
+    744328, 744357, 744381, 744416, 744462, 744514, 744535, 744549, 744612, 744692,
+    744724, 744731, 744745, 744780, 744819, 744878, 744900, 744915, 744976, 745056,
+    745089,
+])
+
+EARLY_CLOSES = array('i', [
+    730304, 730448, 730669, 730812, 730843, 731034, 731183, 731208, 731399, 731547,
+    731573, 731911, 732275, 732495, 732639, 732860, 733003, 733034, 733226, 733374,
+    733400, 733738, 733765, 734102, 734466, 734687, 734830, 734861, 735052, 735201,
+    735226, 735417, 735565, 735591, 735929, 735956, 736293, 736513, 736657, 736878,
+    737021, 737052, 737243, 737392, 737417, 737756, 737783, 738120, 738484, 738704,
+    738848, 739070, 739219, 739244, 739435, 739583, 739609, 739947, 739974, 740311,
+    740531, 740675, 740896, 741039, 741070, 741261, 741410, 741435, 741626, 741774,
+    741800, 742138, 742502, 742722, 742866, 743087, 743230, 743261, 743453, 743601,
+    743627, 743965, 743992, 744329, 744693, 744914, 745057, 745088,
+])
@@ -1,6 +1,8 @@
+from importlib.util import find_spec
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -38,8 +40,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "WheelTracker.middleware.RequestInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "WheelTracker.middleware.AsyncWhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -47,8 +50,37 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "WheelTracker.middleware.ClockMiddleware",
+    "WheelTracker.middleware.ReplicaStickinessMiddleware",
 ]
 
+# Per-request query count and timing (log line, plus a Server-Timing header for
+# staff or with DEBUG), and the admin-only rolling percentiles at /api/admin/perf/
+# (off unless PERF_ENDPOINT=True)
+PERF_INSTRUMENTATION = os.getenv('PERF_INSTRUMENTATION', 'False') == 'True'
+PERF_ENDPOINT = os.getenv('PERF_ENDPOINT', 'False') == 'True'
+
+# Local daily underlying closes (Dashboard/price_history.py), one file per ticker
+PRICE_HISTORY_DIR = os.getenv('PRICE_HISTORY_DIR', str(BASE_DIR / 'price_history'))
+
+# Process-pool workers for Monte Carlo simulations of large books (0 = in-process)
+MONTE_CARLO_WORKERS = int(os.getenv('MONTE_CARLO_WORKERS', '0'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'WheelTracker.instrumentation': {
+            'handlers': ['console'],
+            'level': os.getenv('PERF_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 ROOT_URLCONF = "WheelTracker.urls"
 
 TEMPLATES = [
@@ -71,7 +103,46 @@ WSGI_APPLICATION = "WheelTracker.wsgi.application"
 
 USE_AZURE_SQL = os.getenv('USE_AZURE_SQL', 'False') == 'True'
 
-if USE_AZURE_SQL:
+# Postgres connection reuse. By default each connection is kept open for
+# DB_CONN_MAX_AGE seconds and reused by later requests handled by the same
+# worker, instead of paying a new TLS handshake per request. DB_POOL=True
+# switches to a psycopg 3 connection pool, which is preferable under ASGI;
+# pooling replaces persistent connections. requirements.txt only has psycopg2,
+# so install it with `pip install "psycopg[pool]"` first.
+DB_POOL = os.getenv('DB_POOL', 'False') == 'True'
+if DB_POOL and not (find_spec('psycopg') and find_spec('psycopg_pool')):
+    raise ImproperlyConfigured('DB_POOL=True needs psycopg 3 with its pool: pip install "psycopg[pool]"')
+DB_CONN_MAX_AGE = 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', '60'))
+DB_CONN_HEALTH_CHECKS = os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '0'))
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '2'))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '10'))
+
+
+def postgres_options():
+    """Connection OPTIONS for Postgres: statement timeout and optional pool"""
+    options = {}
+    if DB_STATEMENT_TIMEOUT_MS:
+        options['options'] = f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}'
+    if DB_POOL:
+        options['pool'] = {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+        }
+    return options
+
+
+if os.getenv('DATABASE_URL'):
+    DATABASES = {
+        'default': dj_database_url.parse(
+            os.getenv('DATABASE_URL'),
+            conn_max_age=DB_CONN_MAX_AGE,
+            conn_health_checks=DB_CONN_HEALTH_CHECKS,
+        ),
+    }
+elif USE_AZURE_SQL:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.postgresql',
@@ -80,6 +151,8 @@ if USE_AZURE_SQL:
             'PASSWORD': os.getenv('AZURE_DB_PASSWORD'),
             'HOST': os.getenv('AZURE_DB_HOST'),
             'PORT': os.getenv('AZURE_DB_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
         },
     }
 else:
@@ -90,6 +163,83 @@ else:
         }
     }
 
+if 'postgresql' in DATABASES['default']['ENGINE']:
+    DATABASES['default'].setdefault('OPTIONS', {}).update(postgres_options())
+
+# SQLite tuning, applied on every new connection unless SQLITE_TUNING=False:
+# WAL lets dashboard reads proceed while a write (e.g. auto-closing expired
+# positions) is in progress, and IMMEDIATE transactions take the write lock up
+# front so two writers wait on busy_timeout instead of failing to upgrade a
+# read lock with "database is locked".
+SQLITE_TUNING = os.getenv('SQLITE_TUNING', 'True') == 'True'
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', '20'))  # seconds
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',  # Durable across app crashes; only an OS crash can lose the last commits
+    'mmap_size': 256 * 1024 * 1024,  # bytes
+    'cache_size': -64 * 1024,  # negative = KiB, i.e. 64 MiB per connection
+    'temp_store': 'MEMORY',
+}
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3' and SQLITE_TUNING:
+    DATABASES['default'].setdefault('OPTIONS', {}).update({
+        'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+        'timeout': SQLITE_BUSY_TIMEOUT,
+        'transaction_mode': 'IMMEDIATE',
+    })
+
+    # Optional read-only connection to the same file for read-heavy endpoints.
+    # With WAL it never blocks or is blocked by the writer.
+    if os.getenv('SQLITE_READ_REPLICA', 'False') == 'True':
+        DATABASES['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': f"file:{DATABASES['default']['NAME']}?mode=ro",
+            'OPTIONS': {
+                'uri': True,
+                'init_command': ';'.join(
+                    f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()
+                    if name != 'journal_mode'  # Set by the writer; a read-only connection cannot change it
+                ),
+                'timeout': SQLITE_BUSY_TIMEOUT,
+            },
+            'TEST': {'MIRROR': 'default'},
+        }
+
+# Optional read replica for analytics endpoints (see WheelTracker/db_routers.py).
+# A Postgres replica is configured with DATABASE_REPLICA_URL; SQLite deployments
+# can use SQLITE_READ_REPLICA above. After a write, the user's reads stay on the
+# primary for DB_REPLICA_STICKY_SECONDS to cover replication lag.
+if os.getenv('DATABASE_REPLICA_URL'):
+    DATABASES['replica'] = dj_database_url.parse(
+        os.getenv('DATABASE_REPLICA_URL'),
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=DB_CONN_HEALTH_CHECKS,
+    )
+    DATABASES['replica']['OPTIONS'] = postgres_options()
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['WheelTracker.db_routers.ReplicaRouter']
+DB_REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', '15'))
+
+# Cache (unread notification counters). Counters are only cached in a cache
+# every worker shares, i.e. with REDIS_URL set (requires the redis package);
+# with the per-process memory cache a change handled by one worker would leave
+# the others serving stale counts, so each count is queried instead.
+UNREAD_COUNT_CACHE = bool(os.getenv('REDIS_URL'))
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -116,6 +266,10 @@ USE_I18N = True
 
 USE_TZ = True
 
+# Pin the as-of clock used for day counts and expiry (e.g. "2025-01-17T16:30" ET).
+# Leave unset to follow the wall clock; see WheelTracker/clock.py
+CLOCK_AS_OF = os.getenv('CLOCK_AS_OF') or None
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
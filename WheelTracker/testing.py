@@ -0,0 +1,50 @@
+"""
+Test helpers shared by the apps' test suites.
+"""
+import time
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+class EndpointPerformanceMixin:
+    """
+    Query-count and wall-time bounds for a user's endpoints at one portfolio size.
+    Query bounds are the same at every size, so an N+1 in a serializer or
+    summary fails at the larger sizes.
+
+    Subclasses set SIZE, UNIT (what SIZE counts, for messages), MAX_QUERIES
+    ({name: max queries per request}) and seed, a staticmethod(user, size)
+    that creates the rows and returns how many it created (stored as cls.seeded).
+    """
+    SIZE = None
+    UNIT = 'rows'
+    MAX_QUERIES = {}
+    seed = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('perf', password='perf')
+        cls.seeded = cls.seed(cls.user, cls.SIZE)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def max_seconds(self, per_thousand):
+        """Generous wall-time bound: fixed overhead plus a per-1k-rows budget"""
+        return 1.0 + per_thousand * self.SIZE / 1000
+
+    def assert_bounds(self, url, name, per_thousand):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = self.client.get(url)
+            elapsed = time.perf_counter() - start
+        self.assertEqual(response.status_code, 200, response.content[:500])
+        self.assertLessEqual(
+            len(queries), self.MAX_QUERIES[name],
+            f"{url} issued {len(queries)} queries for {self.SIZE} {self.UNIT}",
+        )
+        self.assertLess(elapsed, self.max_seconds(per_thousand), f"{url} took {elapsed:.2f}s")
+        return response
@@ -0,0 +1,172 @@
+"""
+NYSE trading calendar.
+
+Holidays and early closes are generated offline by
+``python manage.py generate_trading_calendar`` into
+``WheelTracker/nyse_calendar_data.py`` as sorted arrays of date ordinals.
+Every lookup here is a bisect over those arrays, so counting sessions between
+two dates or finding the close of a session is O(log n) with no per-day loop.
+
+Dates outside the generated range are treated as plain weekdays.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from WheelTracker.clock import ET_TZ
+
+REGULAR_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+# One-off closures that no rule produces (national days of mourning, weather)
+SPECIAL_CLOSURES = [
+    date(2001, 9, 11), date(2001, 9, 12), date(2001, 9, 13), date(2001, 9, 14),
+    date(2004, 6, 11),
+    date(2007, 1, 2),
+    date(2012, 10, 29), date(2012, 10, 30),
+    date(2018, 12, 5),
+    date(2025, 1, 9),
+]
+
+
+def _nth_weekday(year, month, weekday, n):
+    """Return the n-th (1-based) given weekday of a month"""
+    first = date(year, month, 1)
+    offset = (weekday - first.weekday()) % 7
+    return first + timedelta(days=offset + 7 * (n - 1))
+
+
+def _last_weekday(year, month, weekday):
+    """Return the last given weekday of a month"""
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year):
+    """Return Western Easter Sunday (anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(day):
+    """Move a Saturday holiday to Friday and a Sunday holiday to Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def build_nyse_calendar(first_year, last_year):
+    """
+    Compute NYSE full-day holidays and 1:00 PM early closes from the
+    exchange's rules. Returns two sorted lists of dates.
+    """
+    holidays = set()
+    early_closes = set()
+
+    for year in range(first_year, last_year + 1):
+        # New Year's Day is not observed on the preceding Friday
+        new_year = date(year, 1, 1)
+        if new_year.weekday() == 6:
+            holidays.add(new_year + timedelta(days=1))
+        elif new_year.weekday() < 5:
+            holidays.add(new_year)
+
+        holidays.add(_nth_weekday(year, 1, 0, 3))  # Martin Luther King Jr. Day
+        holidays.add(_nth_weekday(year, 2, 0, 3))  # Washington's Birthday
+        holidays.add(_easter(year) - timedelta(days=2))  # Good Friday
+        holidays.add(_last_weekday(year, 5, 0))  # Memorial Day
+        if year >= 2022:
+            holidays.add(_observed(date(year, 6, 19)))  # Juneteenth
+        holidays.add(_observed(date(year, 7, 4)))  # Independence Day
+        holidays.add(_nth_weekday(year, 9, 0, 1))  # Labor Day
+        thanksgiving = _nth_weekday(year, 11, 3, 4)
+        holidays.add(thanksgiving)
+        holidays.add(_observed(date(year, 12, 25)))  # Christmas
+
+        # Early closes: July 3rd and Christmas Eve when they fall Mon-Thu,
+        # and the day after Thanksgiving
+        july_3 = date(year, 7, 3)
+        if july_3.weekday() < 4:
+            early_closes.add(july_3)
+        early_closes.add(thanksgiving + timedelta(days=1))
+        christmas_eve = date(year, 12, 24)
+        if christmas_eve.weekday() < 4:
+            early_closes.add(christmas_eve)
+
+    holidays.update(d for d in SPECIAL_CLOSURES if first_year <= d.year <= last_year)
+    early_closes -= holidays
+    return sorted(holidays), sorted(early_closes)
+
+
+try:
+    from WheelTracker.nyse_calendar_data import FIRST_YEAR, LAST_YEAR, HOLIDAYS, EARLY_CLOSES
+except ImportError:  # Data module not generated yet; fall back to a plain weekday calendar
+    FIRST_YEAR, LAST_YEAR = 1, 1
+    HOLIDAYS, EARLY_CLOSES = array('i'), array('i')
+
+
+def _weekdays_through(ordinal):
+    """Number of Mon-Fri days with ordinal in [1, ordinal] (ordinal 1 is a Monday)"""
+    weeks, rest = divmod(ordinal, 7)
+    return weeks * 5 + min(rest, 5)
+
+
+def _contains(ordinals, ordinal):
+    index = bisect_left(ordinals, ordinal)
+    return index < len(ordinals) and ordinals[index] == ordinal
+
+
+def is_trading_day(day):
+    """Check if the exchange holds a session on the given date"""
+    return day.weekday() < 5 and not _contains(HOLIDAYS, day.toordinal())
+
+
+def session_close(day):
+    """Return the ET closing time of the session on day, or None if the market is closed"""
+    if not is_trading_day(day):
+        return None
+    if _contains(EARLY_CLOSES, day.toordinal()):
+        return EARLY_CLOSE
+    return REGULAR_CLOSE
+
+
+def trading_days_between(start, end):
+    """Count trading sessions in the half-open interval (start, end]"""
+    if end <= start:
+        return 0
+    start_ord, end_ord = start.toordinal(), end.toordinal()
+    weekdays = _weekdays_through(end_ord) - _weekdays_through(start_ord)
+    holidays = bisect_right(HOLIDAYS, end_ord) - bisect_right(HOLIDAYS, start_ord)
+    return weekdays - holidays
+
+
+def previous_trading_day(day):
+    """Return the last trading session on or before day"""
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+
+def expiration_session(expiration):
+    """
+    Return the session in which a contract expiring on the given date stops trading.
+    Expirations that land on a holiday (e.g. Good Friday) move to the prior session.
+    """
+    return previous_trading_day(expiration)
+
+
+def expiration_close_et(expiration):
+    """Return the aware ET datetime at which a contract expiring on the given date expires"""
+    session = expiration_session(expiration)
+    return ET_TZ.localize(datetime.combine(session, session_close(session)))
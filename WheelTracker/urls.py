@@ -22,11 +22,12 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 from Dashboard.auth_views import register, current_user
-from Dashboard.views import health_check
+from Dashboard.views import health_check, perf_stats
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/health/", health_check, name='health_check'),
+    path("api/admin/perf/", perf_stats, name='perf_stats'),
     path("api/auth/login/", TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path("api/auth/refresh/", TokenRefreshView.as_view(), name='token_refresh'),
     path("api/auth/register/", register, name='register'),
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Load test: concurrent quote refreshes served by one ASGI worker vs one WSGI worker.
+
+Yahoo Finance is simulated with a fixed per-chain latency so the numbers do not
+depend on the network. The same async view is driven two ways, in-process:
+- ASGI: all requests in flight at once on a single event loop (one uvicorn worker)
+- WSGI: requests handled one after another (one gunicorn sync worker)
+
+Run with: python benchmarks/asgi_vs_wsgi.py [--requests 50] [--latency 0.2] [--chains 4]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'WheelTracker.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark-only-secret-key-not-for-production')
+
+import django
+
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import setup_test_environment
+from rest_framework_simplejwt.tokens import RefreshToken
+from Dashboard.models import Position
+from WheelTracker.clock import today_et
+
+
+def seed(chains):
+    """Create a user with one open put per (stock, expiration) chain"""
+    user = User.objects.create_user('loadtest', password='loadtest')
+    today = today_et()
+    Position.objects.bulk_create([
+        Position(
+            user=user,
+            open_date=today,
+            stock=f'T{i}',
+            expiration=today + timedelta(days=30),
+            type='P',
+            num_contracts=1,
+            strike=Decimal('100'),
+            premium=Decimal('2.00'),
+        )
+        for i in range(chains)
+    ])
+    return str(RefreshToken.for_user(user).access_token)
+
+
+def fake_option_mids(latency):
+    def fetch(stock, expiration):
+        time.sleep(latency)  # Stand-in for the Yahoo Finance round trip
+        return {('P', Decimal('100')): Decimal('1.00')}
+    return fetch
+
+
+async def run_asgi(requests, headers):
+    client = AsyncClient()
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(
+        client.post('/api/quotes/refresh/', headers=headers) for _ in range(requests)
+    ))
+    elapsed = time.perf_counter() - start
+    assert all(r.status_code == 200 for r in responses), [r.status_code for r in responses]
+    return elapsed
+
+
+def run_wsgi(requests, headers):
+    client = Client()
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.post('/api/quotes/refresh/', headers=headers)
+        assert response.status_code == 200, response.status_code
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=50, help='Concurrent refresh requests')
+    parser.add_argument('--latency', type=float, default=0.2, help='Simulated seconds per option chain fetch')
+    parser.add_argument('--chains', type=int, default=4, help='Option chains per refresh')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        headers = {'Authorization': f'Bearer {seed(args.chains)}'}
+        with mock.patch('Dashboard.async_views.fetch_option_mids', fake_option_mids(args.latency)):
+            asgi = asyncio.run(run_asgi(args.requests, headers))
+            wsgi = run_wsgi(args.requests, headers)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(f"{args.requests} quote refreshes, {args.chains} chains each, {args.latency * 1000:.0f} ms per chain")
+    print(f"{'worker':<12}{'total (s)':>12}{'req/s':>10}")
+    for name, elapsed in (('ASGI', asgi), ('WSGI sync', wsgi)):
+        print(f"{name:<12}{elapsed:>12.2f}{args.requests / elapsed:>10.1f}")
+    print(f"ASGI serves {wsgi / asgi:.1f}x the requests per worker")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+"""
+Microbenchmarks for the FORMULAS.md math behind the list and summary endpoints.
+
+For each portfolio size a throwaway test database is seeded with
+generate_sample_data, then the script times:
+- every Position and CreditSpread property, per instance (memoized metrics are
+  cleared before each pass, so the first computation is what is measured)
+- the full PositionSerializer / CreditSpreadSerializer over the portfolio
+- the summary, roi_summary and spread summary actions, and the greeks and
+  scenarios (50 moves x 20 days) actions over the open legs (view code only, no HTTP)
+
+Each timing is the best of --repeat runs. Results are written as JSON keyed by
+size and benchmark, with the commit they were measured on, so two runs can be
+compared:
+
+    python benchmarks/metrics.py --sizes 100 1000 10000
+    python benchmarks/metrics.py --compare benchmarks/results/metrics-<old commit>.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'WheelTracker.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark-only-secret-key-not-for-production')
+
+import django
+
+django.setup()
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import setup_test_environment
+from rest_framework.test import APIRequestFactory, force_authenticate
+from CreditSpread.models import CreditSpread
+from CreditSpread.serializers import CreditSpreadSerializer
+from CreditSpread.views import CreditSpreadViewSet
+from Dashboard.models import Position
+from Dashboard.serializers import PositionSerializer
+from Dashboard.views import PositionViewSet
+from WheelTracker import clock
+
+# Properties that query the database; they are covered by the serializer timing
+DB_PROPERTIES = {'pk', 'wheel_cycle_number', 'is_wheel_complete'}
+
+# Pinned as-of date, so day counts and open/closed splits are the same on every run
+AS_OF = '2025-06-02T12:00'
+
+# The 50 moves x 20 days stress-test grid the scenarios endpoint is sized for
+SCENARIO_GRID = (
+    'moves=' + ','.join(str(move) for move in range(-25, 25)) +
+    '&days=' + ','.join(str(day) for day in range(0, 40, 2))
+)
+
+# A regression is reported when a benchmark is this much slower than the baseline
+REGRESSION_THRESHOLD = 1.10
+
+# Benchmarks faster than this (seconds) are too noisy to compare
+MIN_COMPARABLE_SECONDS = 0.001
+
+
+def metric_properties(model):
+    return sorted(
+        name for name in dir(model)
+        if isinstance(getattr(model, name, None), property) and name not in DB_PROPERTIES
+    )
+
+
+def reset(instances):
+    """Drop memoized metrics and prefetched wheel cycles"""
+    for instance in instances:
+        instance.__dict__.pop('_metrics_cache', None)
+        instance.__dict__.pop('_wheel_cycle', None)
+
+
+def best_of(repeat, func, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def seed(size):
+    """Create a user with about `size` positions (in wheel cycles) and `size` spreads"""
+    prefix = f'bench{size}_'
+    # generate_sample_data averages roughly 9 legs per wheel cycle
+    call_command(
+        'generate_sample_data', users=1, cycles=max(1, size // 9), spreads=size,
+        seed=size, username_prefix=prefix, stdout=open(os.devnull, 'w'),
+    )
+    return User.objects.get(username__startswith=prefix)
+
+
+def run_size(size, repeat):
+    user = seed(size)
+    positions = list(Position.objects.filter(user=user))
+    spreads = list(CreditSpread.objects.filter(user=user))
+    results = {'_counts': {'positions': len(positions), 'credit_spreads': len(spreads)}}
+
+    def record(name, seconds, calls):
+        results[name] = {'seconds': seconds, 'us_per_call': seconds / max(calls, 1) * 1e6, 'calls': calls}
+
+    for model, instances in ((Position, positions), (CreditSpread, spreads)):
+        for name in metric_properties(model):
+            record(
+                f'{model.__name__}.{name}',
+                best_of(repeat, lambda: [getattr(i, name) for i in instances], lambda: reset(instances)),
+                len(instances),
+            )
+
+    record(
+        'PositionSerializer',
+        best_of(repeat, lambda: PositionSerializer(positions, many=True).data, lambda: reset(positions)),
+        len(positions),
+    )
+    record(
+        'CreditSpreadSerializer',
+        best_of(repeat, lambda: CreditSpreadSerializer(spreads, many=True).data, lambda: reset(spreads)),
+        len(spreads),
+    )
+
+    factory = APIRequestFactory()
+    actions = [
+        ('PositionViewSet.summary', PositionViewSet, 'summary', '/api/positions/summary/', len(positions)),
+        ('PositionViewSet.roi_summary', PositionViewSet, 'roi_summary', '/api/positions/roi_summary/', len(positions)),
+        ('CreditSpreadViewSet.summary', CreditSpreadViewSet, 'summary', '/api/credit-spreads/summary/', len(spreads)),
+        ('PositionViewSet.greeks', PositionViewSet, 'greeks', '/api/positions/greeks/', len(positions)),
+        ('PositionViewSet.scenarios', PositionViewSet, 'scenarios',
+         f'/api/positions/scenarios/?{SCENARIO_GRID}', len(positions)),
+    ]
+    for name, viewset, action, url, rows in actions:
+        view = viewset.as_view({'get': action})
+
+        def call():
+            request = factory.get(url)
+            force_authenticate(request, user=user)
+            response = view(request)
+            assert response.status_code == 200, response.status_code
+
+        record(name, best_of(repeat, call), rows)
+
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=ROOT, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(report, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline['commit']} ({baseline_path}):")
+    regressions = 0
+    for size, benchmarks in report['results'].items():
+        old_benchmarks = baseline['results'].get(size, {})
+        for name, result in benchmarks.items():
+            old = old_benchmarks.get(name)
+            if name.startswith('_') or not old or old['seconds'] < MIN_COMPARABLE_SECONDS:
+                continue
+            ratio = result['seconds'] / old['seconds'] if old['seconds'] else 1
+            if ratio >= REGRESSION_THRESHOLD:
+                regressions += 1
+                print(f"  SLOWER  {size:>6} {name:<45} {ratio:5.2f}x")
+            elif ratio <= 1 / REGRESSION_THRESHOLD:
+                print(f"  faster  {size:>6} {name:<45} {ratio:5.2f}x")
+    print(f"{regressions} regression(s) over {REGRESSION_THRESHOLD:.2f}x")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help='Portfolio sizes')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per benchmark; the fastest is kept')
+    parser.add_argument('--output', help='JSON results file (default: benchmarks/results/metrics-<commit>.json)')
+    parser.add_argument('--compare', help='Baseline JSON results to compare against')
+    args = parser.parse_args()
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'repeat': args.repeat,
+        'results': {},
+    }
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        with clock.frozen(AS_OF):
+            for size in args.sizes:
+                report['results'][str(size)] = run_size(size, args.repeat)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    for size, benchmarks in report['results'].items():
+        counts = benchmarks['_counts']
+        print(f"\n{counts['positions']} positions / {counts['credit_spreads']} credit spreads")
+        print(f"{'benchmark':<45}{'total ms':>12}{'us/row':>10}")
+        for name, result in benchmarks.items():
+            if not name.startswith('_'):
+                print(f"{name:<45}{result['seconds'] * 1000:>12.2f}{result['us_per_call']:>10.2f}")
+
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results', f'metrics-{commit}.json')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+Concurrency benchmark: default SQLite settings vs the tuned profile in settings.py.
+
+Reader threads run dashboard-style aggregate queries while writer threads run
+auto-close style transactions (read expired rows, then update them), all
+against one database file. Reports completed operations and "database is
+locked" errors for each profile:
+- default: rollback journal, synchronous=FULL, deferred transactions
+- tuned: SQLITE_PRAGMAS (WAL, synchronous=NORMAL, mmap, cache) and BEGIN IMMEDIATE
+
+Run with: python benchmarks/sqlite_concurrency.py [--readers 8] [--writers 4] [--seconds 5]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'WheelTracker.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark-only-secret-key-not-for-production')
+
+import django
+
+django.setup()
+
+from django.conf import settings
+
+ROWS = 20000
+
+
+def seed(path):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        'CREATE TABLE position (id INTEGER PRIMARY KEY, user_id INTEGER, stock TEXT, '
+        'expiration INTEGER, premium REAL, closed INTEGER DEFAULT 0)'
+    )
+    conn.executemany(
+        'INSERT INTO position (user_id, stock, expiration, premium) VALUES (?, ?, ?, ?)',
+        [(i % 50, f'T{i % 200}', i % 365, random.random() * 5) for i in range(ROWS)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def connect(path, tuned, timeout):
+    conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+    if tuned:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            conn.execute(f'PRAGMA {name}={value}')
+    return conn
+
+
+def reader(path, tuned, timeout, stop, stats):
+    conn = connect(path, tuned, timeout)
+    while not stop.is_set():
+        try:
+            conn.execute('BEGIN')
+            conn.execute(
+                'SELECT stock, SUM(premium), COUNT(*) FROM position WHERE user_id = ? GROUP BY stock',
+                (random.randrange(50),),
+            ).fetchall()
+            conn.execute('COMMIT')
+            stats['reads'] += 1
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            stats['read_errors'] += 1
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+    conn.close()
+
+
+def writer(path, tuned, timeout, stop, stats):
+    conn = connect(path, tuned, timeout)
+    while not stop.is_set():
+        try:
+            conn.execute('BEGIN IMMEDIATE' if tuned else 'BEGIN')
+            day = random.randrange(365)
+            ids = [row[0] for row in conn.execute(
+                'SELECT id FROM position WHERE expiration = ? LIMIT 20', (day,)
+            )]
+            conn.executemany('UPDATE position SET closed = 1 - closed WHERE id = ?', [(i,) for i in ids])
+            conn.execute('COMMIT')
+            stats['writes'] += 1
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            stats['write_errors'] += 1
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+    conn.close()
+
+
+def run(tuned, args):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite3')
+        seed(path)
+        stats = {'reads': 0, 'writes': 0, 'read_errors': 0, 'write_errors': 0}
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=reader, args=(path, tuned, args.timeout, stop, stats))
+            for _ in range(args.readers)
+        ] + [
+            threading.Thread(target=writer, args=(path, tuned, args.timeout, stop, stats))
+            for _ in range(args.writers)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=8, help='Concurrent reader threads')
+    parser.add_argument('--writers', type=int, default=4, help='Concurrent writer threads')
+    parser.add_argument('--seconds', type=float, default=5, help='Duration of each run')
+    parser.add_argument('--timeout', type=float, default=0.1,
+                        help='Busy timeout in seconds (same for both profiles; kept short to expose contention)')
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:.0f}s per profile, "
+          f"busy timeout {args.timeout * 1000:.0f} ms")
+    print(f"{'profile':<10}{'reads':>10}{'writes':>10}{'read locked':>14}{'write locked':>14}")
+    for name, tuned in (('default', False), ('tuned', True)):
+        stats = run(tuned, args)
+        print(f"{name:<10}{stats['reads']:>10}{stats['writes']:>10}"
+              f"{stats['read_errors']:>14}{stats['write_errors']:>14}")
+
+
+if __name__ == '__main__':
+    main()
@@ -260,6 +260,56 @@ export const api = {
             throw error;
         }
     },
+    // ASGI deployments only: calls onCount(count) on connect and whenever the unread count
+    // changes, from the server-sent events stream. Under WSGI (e.g. Vercel) the stream answers
+    // 501 and this gives up, so poll getUnreadNotificationCount() there instead.
+    // The server closes the stream periodically; it is reopened until the returned stop() is called.
+    subscribeUnreadNotificationCount(onCount) {
+        let stopped = false;
+        let controller = null;
+
+        const connect = async () => {
+            while (!stopped) {
+                controller = new AbortController();
+                try {
+                    const response = await fetch(`${API_BASE_URL}/notifications/stream/`, {
+                        credentials: 'include',
+                        headers: getAuthHeaders(),
+                        signal: controller.signal
+                    });
+                    if (response.status === 401 || response.status === 501) {
+                        return;
+                    }
+                    const reader = response.body.getReader();
+                    const decoder = new TextDecoder();
+                    let buffer = '';
+                    for (;;) {
+                        const { done, value } = await reader.read();
+                        if (done) break;
+                        buffer += decoder.decode(value, { stream: true });
+                        const events = buffer.split('\n\n');
+                        buffer = events.pop();
+                        for (const event of events) {
+                            const data = event.split('\n').find((line) => line.startsWith('data: '));
+                            if (event.startsWith('event: unread_count') && data) {
+                                onCount(JSON.parse(data.slice(6)).count);
+                            }
+                        }
+                    }
+                } catch (error) {
+                    if (stopped) return;
+                    console.error('Unread count stream failed:', error);
+                    await new Promise((resolve) => setTimeout(resolve, 5000));
+                }
+            }
+        };
+
+        connect();
+        return () => {
+            stopped = true;
+            controller?.abort();
+        };
+    },
 
     async createCreditSpread(data) {
         try {